@@ -0,0 +1,164 @@
+"""
+Asyncio micro-batching for single-transaction scoring.
+
+Requests to `/predict` are queued and flushed into one
+`DecisionEngine.evaluate_batch` call when either `max_batch_size` rows are
+waiting or the oldest has waited `max_wait_ms`. Each caller awaits its own
+future. Batches run one at a time on a worker thread, so requests that
+arrive during a flush form the next, larger batch.
+"""
+
+import asyncio
+from collections import Counter
+
+import numpy as np
+
+
+class QueueFullError(Exception):
+    """Raised when the scoring queue is at its configured depth."""
+
+
+class MicroBatcher:
+
+    def __init__(
+        self,
+        engine,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        queue_depth: int = 1024,
+        executor=None,
+    ) -> None:
+
+        self.engine = engine
+        # An api.executor.EngineExecutor; None uses the loop's default pool
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.queue_depth = queue_depth
+
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+        self.batch_sizes: Counter = Counter()
+        self.rejected = 0
+
+    # ============================================================
+    # LIFECYCLE
+    # ============================================================
+
+    def _ensure_started(self) -> None:
+
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.queue_depth)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ============================================================
+    # SUBMISSION
+    # ============================================================
+
+    async def submit(self, features: np.ndarray, include_anomaly_score: bool = False) -> dict:
+
+        self._ensure_started()
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((features, include_anomaly_score, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"Scoring queue is full ({self.queue_depth} pending)")
+
+        return await future
+
+    # ============================================================
+    # DISPATCH LOOP
+    # ============================================================
+
+    async def _run(self) -> None:
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000.0
+
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already queued before waiting for more
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list) -> None:
+
+        X = np.vstack([features for features, _, _ in batch])
+        include = np.array([flag for _, flag, _ in batch], dtype=bool)
+
+        self.batch_sizes[len(batch)] += 1
+
+        try:
+            if self.executor is not None:
+                # Micro-batches only carry /predict requests
+                results = await self.executor.run(
+                    self.engine.evaluate_batch, X, include, profile=True
+                )
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    None, self.engine.evaluate_batch, X, include
+                )
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            # The caller may have gone away (client disconnect)
+            if not future.done():
+                future.set_result(result)
+
+    # ============================================================
+    # STATS
+    # ============================================================
+
+    def report(self) -> dict:
+
+        batches = sum(self.batch_sizes.values())
+        requests = sum(size * n for size, n in self.batch_sizes.items())
+
+        # Power-of-two buckets: "4" counts batches of size 3-4
+        distribution: Counter = Counter()
+        for size, n in self.batch_sizes.items():
+            distribution[str(1 << (size - 1).bit_length())] += n
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queue_depth": self.queue_depth,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "rejected": self.rejected,
+            "batches": batches,
+            "requests": requests,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "batch_size_distribution": dict(
+                sorted(distribution.items(), key=lambda item: int(item[0]))
+            ),
+        }
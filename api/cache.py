@@ -0,0 +1,125 @@
+"""
+Decision result cache for single-transaction scoring.
+
+Gateways retry and the demo frontends resend identical feature vectors, so
+`/predict` results are cached by a hash of the float64 feature bytes, the
+anomaly-score flag and the engine's model fingerprint. Entries expire after
+`ttl_seconds` and the least recently used entry is evicted past
+`max_entries`. Concurrent identical requests share one computation: the
+first caller starts it as a task and later callers await the same task.
+
+All bookkeeping runs on the event loop, so no locks are needed.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Awaitable, Callable
+
+import numpy as np
+
+
+class DecisionCache:
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0) -> None:
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: OrderedDict = OrderedDict()
+        self._inflight: dict = {}
+        self._version: str | None = None
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def key(features: np.ndarray, include_anomaly_score: bool) -> bytes:
+
+        row = np.ascontiguousarray(features, dtype=np.float64)
+        digest = hashlib.blake2b(row.tobytes(), digest_size=16)
+        digest.update(b"\x01" if include_anomaly_score else b"\x00")
+
+        return digest.digest()
+
+    def invalidate(self) -> None:
+
+        self._entries.clear()
+        # Running computations still answer their callers but are not stored
+        self._inflight.clear()
+        self.stats["invalidations"] += 1
+
+    async def get_or_compute(
+        self,
+        features: np.ndarray,
+        include_anomaly_score: bool,
+        version: str,
+        compute: Callable[[], Awaitable[dict]],
+    ) -> dict:
+
+        if version != self._version:
+            if self._version is not None:
+                self.invalidate()
+            self._version = version
+
+        key = self.key(features, include_anomaly_score)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, result = entry
+            if expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return result
+            del self._entries[key]
+            self.stats["expired"] += 1
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._store, key, version))
+
+        # A disconnecting caller must not cancel the shared computation
+        return await asyncio.shield(task)
+
+    def _store(self, key: bytes, version: str, task: asyncio.Future) -> None:
+
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        if task.cancelled() or task.exception() is not None or version != self._version:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, task.result())
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def report(self) -> dict:
+
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "in_flight": len(self._inflight),
+            **self.stats,
+            "hit_rate": (self.stats["hits"] + self.stats["coalesced"]) / lookups
+            if lookups
+            else 0.0,
+        }
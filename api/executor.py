@@ -0,0 +1,113 @@
+"""
+Dedicated, sized executor for engine calls.
+
+Starlette's shared threadpool runs every sync handler with no bound on how
+many engine calls overlap. Here engine work runs on its own
+`ThreadPoolExecutor`, and an `asyncio.Semaphore` admits at most
+`max_concurrency` calls. XGBoost prediction and the NumPy traversal release
+the GIL, so each admitted call gets a real core. The rest wait on the event
+loop, where their queue time is measured, instead of piling up as threads.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Upper bounds in milliseconds for the queue-time histogram; the last
+# bucket catches everything above
+QUEUE_BUCKETS_MS = (0.1, 0.5, 1.0, 5.0, 10.0, 50.0, 100.0, 500.0, 1000.0, float("inf"))
+
+
+class EngineExecutor:
+
+    def __init__(self, threads: int = 4, max_concurrency: int | None = None) -> None:
+
+        self.threads = threads
+        self.max_concurrency = max_concurrency or threads
+
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="engine")
+        self._semaphore: asyncio.Semaphore | None = None
+
+        # An api.profiling.Profiler; wraps calls made with profile=True while
+        # a session is open
+        self.profiler = None
+
+        self.waiting = 0
+        self.running = 0
+        self.stats = {"calls": 0, "queue_seconds": 0.0, "max_queue_seconds": 0.0}
+        self.queue_histogram = [0] * len(QUEUE_BUCKETS_MS)
+
+    async def run(self, fn: Callable[..., Any], *args, profile: bool = False) -> Any:
+        """`fn(*args)` on the pool; `profile` lets an open profiling session capture it."""
+
+        if self._semaphore is None:
+            # Created lazily so it binds to the serving event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self._record_queue(time.perf_counter() - queued)
+
+        if profile and self.profiler is not None:
+            fn = self.profiler.wrap(fn)
+
+        loop = asyncio.get_running_loop()
+        self.running += 1
+        future = self._pool.submit(fn, *args)
+        # Released when the call finishes, not when the awaiting task does:
+        # a cancelled request cannot stop a running thread, and releasing
+        # early would let more than max_concurrency calls run
+        future.add_done_callback(lambda _: self._call_done(loop))
+
+        return await asyncio.wrap_future(future)
+
+    def _call_done(self, loop: asyncio.AbstractEventLoop) -> None:
+
+        def release() -> None:
+            self.running -= 1
+            self._semaphore.release()
+
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            # Loop already closed at shutdown; nothing is waiting any more
+            pass
+
+    def _record_queue(self, seconds: float) -> None:
+
+        self.stats["calls"] += 1
+        self.stats["queue_seconds"] += seconds
+        self.stats["max_queue_seconds"] = max(self.stats["max_queue_seconds"], seconds)
+
+        ms = seconds * 1e3
+        for i, bound in enumerate(QUEUE_BUCKETS_MS):
+            if ms <= bound:
+                self.queue_histogram[i] += 1
+                break
+
+    def shutdown(self) -> None:
+
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def report(self) -> dict:
+
+        calls = self.stats["calls"]
+
+        return {
+            "threads": self.threads,
+            "max_concurrency": self.max_concurrency,
+            "running": self.running,
+            "waiting": self.waiting,
+            "calls": calls,
+            "mean_queue_ms": self.stats["queue_seconds"] / calls * 1e3 if calls else 0.0,
+            "max_queue_ms": self.stats["max_queue_seconds"] * 1e3,
+            "queue_ms_histogram": {
+                ("+Inf" if bound == float("inf") else f"{bound:g}"): n
+                for bound, n in zip(QUEUE_BUCKETS_MS, self.queue_histogram)
+            },
+        }
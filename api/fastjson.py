@@ -0,0 +1,149 @@
+"""
+Fast JSON codec for single-transaction `/predict`.
+
+The default path runs `json.loads`, pydantic validation of `list[float]`,
+`np.array` and FastAPI's `jsonable_encoder` + `json.dumps` for every
+request. With `PREDICT_FAST_JSON=1` the body is parsed by orjson and copied
+once into a float64 buffer. That buffer is checked for length 31 and
+finiteness, and the result dict is written straight to bytes by orjson.
+orjson is an optional dependency.
+
+Benchmark the codec overhead, model time excluded (from the project root):
+
+    python -m api.fastjson
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional dependency; only needed for the fast path
+    orjson = None
+
+from backend.engine.replay import N_FEATURES
+
+
+class FastJSONError(ValueError):
+    """Request body rejected by the fast path; the message is client-facing."""
+
+
+def require_orjson() -> None:
+
+    if orjson is None:
+        raise RuntimeError(
+            "PREDICT_FAST_JSON=1 needs the optional orjson package (pip install orjson)"
+        )
+
+
+def parse_transaction(body: bytes) -> Tuple[np.ndarray, bool]:
+    """(features of shape (1, 31), include_anomaly_score) from a /predict body."""
+
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError as exc:
+        raise FastJSONError(f"Invalid JSON: {exc}") from exc
+
+    if not isinstance(payload, dict):
+        raise FastJSONError("Expected a JSON object")
+
+    values = payload.get("features")
+    if not isinstance(values, list) or len(values) != N_FEATURES:
+        raise FastJSONError("Expected 31 features")
+
+    include_anomaly_score = payload.get("include_anomaly_score", False)
+    if not isinstance(include_anomaly_score, bool):
+        raise FastJSONError("include_anomaly_score must be a boolean")
+
+    features = np.empty((1, N_FEATURES))
+    try:
+        features[0] = values
+    except (TypeError, ValueError) as exc:
+        raise FastJSONError("Features must be numbers") from exc
+
+    if not np.isfinite(features).all():
+        raise FastJSONError("Features must be finite")
+
+    return features, include_anomaly_score
+
+
+def dumps(result: dict) -> bytes:
+
+    return orjson.dumps(result)
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+
+def _per_call_us(fn, repeats: int) -> float:
+
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best / repeats * 1e6
+
+
+def benchmark(repeats: int) -> None:
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from api.main import TransactionInput, engine
+    from backend.engine.replay import synthetic_rows
+
+    require_orjson()
+
+    X = synthetic_rows(1)
+    body = json.dumps({"features": X[0].tolist()}).encode()
+    # Scored once up front: only the codec is timed
+    result = engine.evaluate_transaction(X)
+
+    def default_parse():
+        txn = TransactionInput.model_validate(json.loads(body))
+        return np.array(txn.features).reshape(1, -1)
+
+    def default_serialize():
+        return JSONResponse(jsonable_encoder(result)).body
+
+    def fast_parse():
+        return parse_transaction(body)
+
+    def fast_serialize():
+        return dumps(result)
+
+    rows = [
+        ("parse + validate", _per_call_us(default_parse, repeats), _per_call_us(fast_parse, repeats)),
+        ("serialize", _per_call_us(default_serialize, repeats), _per_call_us(fast_serialize, repeats)),
+    ]
+    rows.append(("total", rows[0][1] + rows[1][1], rows[0][2] + rows[1][2]))
+
+    print(f"\n[fastjson] Per-request codec overhead, model time excluded ({repeats} calls)")
+    print(f"{'stage':<18} {'default (us)':>13} {'fast (us)':>10} {'speedup':>9}")
+    for stage, default_us, fast_us in rows:
+        print(f"{stage:<18} {default_us:>13.2f} {fast_us:>10.2f} {default_us / fast_us:>8.1f}x")
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Benchmark the /predict JSON codecs")
+    parser.add_argument("--repeats", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    benchmark(args.repeats)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
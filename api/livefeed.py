@@ -0,0 +1,251 @@
+"""
+Shared live scoring feed behind the `/ws/feed` WebSocket.
+
+One background task ticks every `interval_ms`. Each tick it takes the
+transactions relayed by clients since the last tick, tops them up with
+synthetic rows at `rate` per second, and scores the lot in one
+`DecisionEngine.score_batch` call. The results are broadcast to every
+subscriber, so N viewers cost one inference per transaction, not N. The
+task runs only while someone is subscribed.
+
+Each subscriber asks for its own rate; a token bucket trims every broadcast
+to it. Slow subscribers have a bounded outbox: when it is full the oldest
+message is dropped and counted, since for a live view the newest points
+matter most.
+
+A tick that fails to score is logged and counted. Its rows, relayed ones
+included, are dropped, and the feed carries on with the next tick.
+"""
+
+import asyncio
+import json
+import time
+
+import numpy as np
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from backend.engine.replay import FEATURE_COLUMNS, N_FEATURES, synthetic_rows
+
+# Model vectors hold log1p(Amount) and hour; viewers want dollars and a clock
+AMOUNT = FEATURE_COLUMNS.index("Amount")
+HOUR = FEATURE_COLUMNS.index("hour")
+
+
+class Subscriber:
+
+    def __init__(self, rate: float, outbox_depth: int) -> None:
+
+        self.rate = rate
+        self.allowance = 1.0
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=outbox_depth)
+        self.dropped = 0
+
+    def offer(self, message: dict) -> None:
+
+        if self.outbox.full():
+            self.outbox.get_nowait()
+            self.dropped += 1
+        self.outbox.put_nowait(message)
+
+
+class LiveFeed:
+
+    def __init__(
+        self,
+        engine,
+        executor,
+        rate: float = 20.0,
+        interval_ms: float = 250.0,
+        synthetic: bool = True,
+        max_relay: int = 1024,
+        outbox_depth: int = 16,
+    ) -> None:
+
+        self.engine = engine
+        # An api.executor.EngineExecutor
+        self.executor = executor
+        self.rate = rate
+        self.interval_ms = interval_ms
+        self.synthetic = synthetic
+        self.max_relay = max_relay
+        self.outbox_depth = outbox_depth
+
+        self.subscribers: set = set()
+        self._relayed: list = []
+        self._task: asyncio.Task | None = None
+        self._seq = 0
+
+        self.stats = {
+            "ticks": 0,
+            "rows_scored": 0,
+            "rows_relayed": 0,
+            "messages_sent": 0,
+            "failed_ticks": 0,
+            "rows_dropped": 0,
+        }
+
+    # ============================================================
+    # SUBSCRIPTIONS
+    # ============================================================
+
+    def subscribe(self, rate: float | None = None) -> Subscriber:
+
+        subscriber = Subscriber(self._clamp(rate), self.outbox_depth)
+        self.subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _clamp(self, rate: float | None) -> float:
+        """Subscribers get at most what the feed produces."""
+
+        if rate is None or rate <= 0:
+            return self.rate
+
+        return min(rate, max(self.rate, 1.0))
+
+    def relay(self, features) -> None:
+        """Queue a client transaction for the next tick; raises ValueError."""
+
+        if len(self._relayed) >= self.max_relay:
+            raise ValueError("Relay buffer full")
+
+        row = np.asarray(features, dtype=np.float64)
+        if row.shape != (N_FEATURES,):
+            raise ValueError("Expected 31 features")
+        if not np.isfinite(row).all():
+            raise ValueError("Features must be finite")
+
+        self._relayed.append(row)
+
+    # ============================================================
+    # FEED
+    # ============================================================
+
+    async def _run(self) -> None:
+
+        interval = self.interval_ms / 1e3
+        owed = 0.0
+        last = time.monotonic()
+
+        while True:
+            await asyncio.sleep(max(0.0, last + interval - time.monotonic()))
+            now = time.monotonic()
+            elapsed, last = now - last, now
+
+            rows, self._relayed = self._relayed, []
+            n_relayed = len(rows)
+            if self.synthetic:
+                owed += self.rate * elapsed
+                n_synthetic = int(owed)
+                owed -= n_synthetic
+                if n_synthetic:
+                    rows.extend(synthetic_rows(n_synthetic, seed=self._seq))
+            if not rows:
+                continue
+
+            X = np.vstack(rows)
+            try:
+                scores = await self.executor.run(self.engine.score_batch, X, True)
+                results = self.engine.results_from_scores(scores)
+            except Exception as exc:
+                # One bad batch must not end the feed for every subscriber
+                print(f"[livefeed] Tick {self._seq} failed, dropping {len(X)} rows: {exc!r}")
+                self.stats["failed_ticks"] += 1
+                self.stats["rows_dropped"] += len(X)
+                self._seq += 1
+                continue
+
+            amounts = np.expm1(X[:, AMOUNT])
+            seconds = X[:, HOUR] * 3600
+            transactions = [
+                {
+                    "features": features.tolist(),
+                    "amount": float(amounts[i]),
+                    "time": float(seconds[i]),
+                    "relayed": i < n_relayed,
+                    "result": result,
+                }
+                for i, (features, result) in enumerate(zip(X, results))
+            ]
+            self._broadcast(transactions, elapsed)
+
+            self._seq += 1
+            self.stats["ticks"] += 1
+            self.stats["rows_scored"] += len(X)
+            self.stats["rows_relayed"] += n_relayed
+
+    def _broadcast(self, transactions: list, elapsed: float) -> None:
+
+        for subscriber in self.subscribers:
+            # Token bucket with up to one second of burst
+            subscriber.allowance = min(
+                subscriber.allowance + subscriber.rate * elapsed, max(subscriber.rate, 1.0)
+            )
+            take = min(int(subscriber.allowance), len(transactions))
+            if take == 0:
+                continue
+            subscriber.allowance -= take
+            subscriber.offer({"type": "transactions", "seq": self._seq, "transactions": transactions[:take]})
+
+    # ============================================================
+    # WEBSOCKET
+    # ============================================================
+
+    async def serve(self, websocket: WebSocket, rate: float | None = None) -> None:
+        """
+        Run one subscription until the client disconnects.
+
+        Clients may send `{"rate": r}` to change their rate and
+        `{"features": [...]}` to relay a transaction into the feed.
+        """
+
+        await websocket.accept()
+        subscriber = self.subscribe(rate)
+        subscriber.offer({"type": "subscribed", "rate": subscriber.rate, "feed_rate": self.rate})
+
+        async def pump():
+            while True:
+                message = await subscriber.outbox.get()
+                await websocket.send_text(json.dumps(message))
+                self.stats["messages_sent"] += 1
+
+        sender = asyncio.get_running_loop().create_task(pump())
+        try:
+            while True:
+                text = await websocket.receive_text()
+                try:
+                    message = json.loads(text)
+                    if not isinstance(message, dict):
+                        raise ValueError("Expected a JSON object")
+                    if "rate" in message:
+                        subscriber.rate = self._clamp(float(message["rate"]))
+                        subscriber.offer({"type": "subscribed", "rate": subscriber.rate, "feed_rate": self.rate})
+                    if "features" in message:
+                        self.relay(message["features"])
+                except (TypeError, ValueError) as exc:
+                    subscriber.offer({"type": "error", "error": str(exc)})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            self.unsubscribe(subscriber)
+
+    def report(self) -> dict:
+
+        return {
+            "rate": self.rate,
+            "interval_ms": self.interval_ms,
+            "synthetic": self.synthetic,
+            "subscribers": len(self.subscribers),
+            "dropped": sum(s.dropped for s in self.subscribers),
+            **self.stats,
+        }
@@ -0,0 +1,361 @@
+"""
+Offline load generator and traffic replayer for the scoring API.
+
+Starts the API locally (uvicorn, or the pre-fork server from `api.serve`)
+on a free localhost port, or targets a running `--url`. It then sends
+`/predict` traffic in one of two ways:
+
+- open loop, `--rate` requests/s on a fixed schedule. Latency is measured
+  from each request's scheduled time, so a stalled server shows up as
+  latency rather than as a lower send rate.
+- closed loop, `--concurrency` clients sending back to back.
+
+Traffic is synthetic by default. `--replay` reads a JSONL log instead: one
+request body per line, either a `/predict` body (`{"features": [...]}`) or
+`{"path": ..., "body": ...}`. `--repeat-fraction` resends a small hot set
+of vectors to exercise the result cache. The report has latency
+percentiles, error rates and decision counts, overall and per 1 s window.
+Server environment variables (PREDICT_BATCHING, PREDICT_CACHE, ...) are
+passed through.
+
+Usage (from the project root; needs httpx):
+
+    python -m api.loadtest --rate 200 --duration 30
+    PREDICT_BATCHING=1 python -m api.loadtest --concurrency 64 --duration 30 --output load.json
+    python -m api.loadtest --server prefork --workers 4 --rate 500
+    python -m api.loadtest --replay traffic.jsonl --rate 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+from backend.engine.replay import synthetic_rows
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOT_SET = 100
+
+
+# ============================================================
+# TRAFFIC
+# ============================================================
+
+
+def synthetic_requests(n: int, repeat_fraction: float, seed: int) -> List[tuple]:
+
+    rng = np.random.default_rng(seed)
+    X = synthetic_rows(n, seed=seed)
+
+    requests = []
+    for i in range(n):
+        row = X[rng.integers(min(HOT_SET, n))] if rng.random() < repeat_fraction else X[i]
+        requests.append(("/predict", {"features": row.tolist()}))
+
+    return requests
+
+
+def replay_requests(path: str) -> List[tuple]:
+
+    requests, skipped = [], 0
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "features" in record:
+                requests.append(("/predict", record))
+            elif "transactions" in record:
+                requests.append(("/predict/batch", record))
+            elif "path" in record and "body" in record:
+                requests.append((record["path"], record["body"]))
+            else:
+                skipped += 1
+
+    if skipped:
+        print(f"[loadtest] Skipped {skipped} lines that are not request bodies")
+    if not requests:
+        raise ValueError(f"No replayable requests in {path}")
+
+    return requests
+
+
+# ============================================================
+# SERVER
+# ============================================================
+
+
+def _free_port() -> int:
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind: str, workers: int, port: int) -> subprocess.Popen:
+
+    if kind == "prefork":
+        cmd = [sys.executable, "-m", "api.serve", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning"]
+
+    return subprocess.Popen(cmd, cwd=PROJECT_ROOT)
+
+
+async def wait_ready(client, timeout: float) -> None:
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.25)
+
+    raise RuntimeError(f"Server not ready after {timeout:.0f}s")
+
+
+# ============================================================
+# LOAD
+# ============================================================
+
+
+async def _send(client, path: str, body: dict, scheduled: float, records: list) -> None:
+
+    status, decisions = "error", []
+    try:
+        response = await client.post(path, json=body)
+        if response.status_code != 200:
+            status = str(response.status_code)
+        else:
+            payload = response.json()
+            if "error" in payload:
+                status = "app_error"
+            else:
+                status = "ok"
+                results = payload.get("results", [payload])
+                decisions = [r.get("decision") for r in results]
+    except Exception as exc:
+        status = type(exc).__name__
+
+    records.append((scheduled, time.perf_counter() - scheduled, status, decisions))
+
+
+async def open_loop(client, requests: List[tuple], rate: float, duration: float) -> list:
+
+    records: list = []
+    tasks = []
+    start = time.perf_counter()
+    n = int(rate * duration)
+
+    for i in range(n):
+        scheduled = start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        path, body = requests[i % len(requests)]
+        tasks.append(asyncio.create_task(_send(client, path, body, scheduled, records)))
+
+    await asyncio.gather(*tasks)
+
+    return records
+
+
+async def closed_loop(client, requests: List[tuple], concurrency: int, duration: float) -> list:
+
+    records: list = []
+    end = time.perf_counter() + duration
+    counter = iter(range(sys.maxsize))
+
+    async def worker():
+        while time.perf_counter() < end:
+            path, body = requests[next(counter) % len(requests)]
+            await _send(client, path, body, time.perf_counter(), records)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return records
+
+
+# ============================================================
+# REPORT
+# ============================================================
+
+
+def _latency_summary(latencies: List[float]) -> dict:
+
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+
+    ms = np.asarray(latencies) * 1e3
+
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def build_report(records: list, elapsed: float) -> dict:
+
+    origin = min(r[0] for r in records) if records else 0.0
+    windows: dict = {}
+    statuses: Counter = Counter()
+    decisions: Counter = Counter()
+
+    for scheduled, latency, status, row_decisions in records:
+        second = int(scheduled - origin)
+        window = windows.setdefault(
+            second, {"latencies": [], "statuses": Counter(), "decisions": Counter()}
+        )
+        # Same rule as the overall summary: latency of ok requests only,
+        # failures and timeouts are counted as errors
+        if status == "ok":
+            window["latencies"].append(latency)
+        window["statuses"][status] += 1
+        window["decisions"].update(row_decisions)
+        statuses[status] += 1
+        decisions.update(row_decisions)
+
+    ok_latencies = [r[1] for r in records if r[2] == "ok"]
+
+    return {
+        "requests": len(records),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(records) / elapsed if elapsed else 0.0,
+        "error_rate": 1 - statuses["ok"] / len(records) if records else 0.0,
+        "statuses": dict(statuses),
+        "latency": _latency_summary(ok_latencies),
+        "decisions": dict(decisions),
+        "windows": [
+            {
+                "second": second,
+                "requests": sum(w["statuses"].values()),
+                "errors": sum(n for s, n in w["statuses"].items() if s != "ok"),
+                **_latency_summary(w["latencies"]),
+                "decisions": dict(w["decisions"]),
+            }
+            for second, w in sorted(windows.items())
+        ],
+    }
+
+
+def print_report(report: dict) -> None:
+
+    latency = report["latency"]
+    print("\n===== LOAD TEST =====")
+    print(f"Requests:    {report['requests']} in {report['elapsed_s']:.1f}s ({report['throughput_rps']:.1f} req/s)")
+    print(f"Error rate:  {report['error_rate']:.2%}  {report['statuses']}")
+    if latency["p50_ms"] is not None:
+        print(
+            f"Latency ms:  p50 {latency['p50_ms']:.2f}  p95 {latency['p95_ms']:.2f}  "
+            f"p99 {latency['p99_ms']:.2f}  max {latency['max_ms']:.2f}"
+        )
+    print(f"Decisions:   {report['decisions']}")
+
+    print(f"\n{'second':>6} {'reqs':>6} {'errors':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for w in report["windows"]:
+        if w["p50_ms"] is None:
+            print(f"{w['second']:>6} {w['requests']:>6} {w['errors']:>6} {'-':>8} {'-':>8} {'-':>8}")
+            continue
+        print(
+            f"{w['second']:>6} {w['requests']:>6} {w['errors']:>6} "
+            f"{w['p50_ms']:>8.2f} {w['p95_ms']:>8.2f} {w['p99_ms']:>8.2f}"
+        )
+
+
+async def run(args) -> dict:
+
+    import httpx
+
+    if args.replay:
+        requests = replay_requests(args.replay)
+    else:
+        n = int(args.rate * args.duration) if args.rate else 10000
+        requests = synthetic_requests(max(1, n), args.repeat_fraction, args.seed)
+
+    server = None
+    url = args.url
+    if url is None:
+        port = _free_port()
+        server = start_server(args.server, args.workers, port)
+        url = f"http://127.0.0.1:{port}"
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+            await wait_ready(client, args.startup_timeout)
+            print(f"[loadtest] {url} ready; {len(requests)} distinct requests")
+
+            start = time.perf_counter()
+            if args.rate:
+                records = await open_loop(client, requests, args.rate, args.duration)
+            else:
+                records = await closed_loop(client, requests, args.concurrency, args.duration)
+            elapsed = time.perf_counter() - start
+
+            report = build_report(records, elapsed)
+            report["config"] = {
+                "url": url,
+                "server": None if args.url else args.server,
+                "rate": args.rate,
+                "concurrency": None if args.rate else args.concurrency,
+                "duration_s": args.duration,
+                "replay": args.replay,
+            }
+            # Server-side view: batching, cache and executor stats when enabled
+            report["server_health"] = (await client.get("/health")).json()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    return report
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Offline load test for the scoring API")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rate", type=float, default=None, help="Open-loop requests per second")
+    load.add_argument("--concurrency", type=int, default=16, help="Closed-loop clients")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--replay", default=None, help="JSONL file of request bodies")
+    parser.add_argument("--repeat-fraction", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", default=None, help="Target a running server instead of starting one")
+    parser.add_argument("--server", choices=["uvicorn", "prefork"], default="uvicorn")
+    parser.add_argument("--workers", type=int, default=2, help="Workers for --server prefork")
+    parser.add_argument("--max-connections", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[loadtest] Report written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
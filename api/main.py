@@ -1,17 +1,40 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from functools import partial
+import hmac
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, ValidationError
 import numpy as np
 import sys
 import os
+import time
 
 # Make backend importable
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(PROJECT_ROOT)
 
 from backend.engine.decision_engine import DecisionEngine
+from api.batching import MicroBatcher, QueueFullError
+from api.cache import DecisionCache
+from api.executor import EngineExecutor
+from api.livefeed import LiveFeed
+from api.profiling import Profiler
+from api.streaming import NDJSON, NDJSONResponse, NDJSONScorer
+from api import fastjson, wire
 
-app = FastAPI(title="Risk-Aware Fraud Decision API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if batcher is not None:
+        await batcher.close()
+    executor.shutdown()
+
+
+app = FastAPI(title="Risk-Aware Fraud Decision API", lifespan=lifespan)
 
 # ── CORS ──────────────────────────────────────────────────────────────────
 # Public research/demo API — allow all origins.
@@ -23,12 +46,136 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# ── Request timing ────────────────────────────────────────────────────────
+# Plain ASGI middleware (BaseHTTPMiddleware costs tens of microseconds);
+# only scoring paths are timed to keep /metrics label cardinality fixed.
+TIMED_PATHS = {"/predict", "/predict/batch"}
+
+
+class RequestTimer:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in TIMED_PATHS:
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            engine.metrics.record_request(scope["path"], time.perf_counter() - start)
+
+
+app.add_middleware(RequestTimer)
+
 # ── Engine (loaded once at startup) ───────────────────────────────────────
-engine = DecisionEngine()
+# ENGINE_MODE=compiled serves the flat-array ensemble export (lower latency),
+# memory-mapped from artifacts/native/ when that export exists.
+# ENGINE_VERIFY_NATIVE=1 hashes every native array at startup (reads them all).
+# ENGINE_CASCADE=1 screens with one member and runs the full ensemble only
+# near a risk threshold (see backend/engine/cascade.py for the replay check).
+# ENGINE_EARLY_EXIT=bound|confidence stops evaluating members once the rest
+# of the ensemble cannot change the decision.
+# ENGINE_LAZY_ANOMALY=1 runs the Isolation Forest only where novelty can change
+# the decision; anomaly_score is then null for other rows unless the request
+# sets include_anomaly_score.
+# ENGINE_METRICS=0 turns off the stage timers and counters behind /metrics.
+# ENGINE_THRESHOLDS=path loads routing thresholds written by
+# backend/engine/threshold_optimizer.py.
+engine = DecisionEngine(
+    mode=os.environ.get("ENGINE_MODE", "sklearn"),
+    verify_native=os.environ.get("ENGINE_VERIFY_NATIVE", "0") == "1",
+    cascade=os.environ.get("ENGINE_CASCADE", "0") == "1",
+    cascade_margin=float(os.environ.get("ENGINE_CASCADE_MARGIN", "0.05")),
+    early_exit=os.environ.get("ENGINE_EARLY_EXIT") or None,
+    lazy_anomaly=os.environ.get("ENGINE_LAZY_ANOMALY", "0") == "1",
+    booster_threads=int(os.environ["ENGINE_BOOSTER_THREADS"])
+    if os.environ.get("ENGINE_BOOSTER_THREADS")
+    else None,
+    metrics=os.environ.get("ENGINE_METRICS", "1") == "1",
+    thresholds_path=os.environ.get("ENGINE_THRESHOLDS") or None,
+)
+
+# Score a synthetic batch before serving so the first real requests do not
+# pay for page faults; ENGINE_WARMUP=0 skips it
+warmup_seconds = engine.warmup() if os.environ.get("ENGINE_WARMUP", "1") == "1" else None
+
+# ── Executor ──────────────────────────────────────────────────────────────
+# Engine calls run on ENGINE_THREADS dedicated threads. At most
+# ENGINE_MAX_CONCURRENCY run at once (default: one per thread); the rest wait
+# on the event loop and their queue time is reported in /health. Pair with
+# ENGINE_BOOSTER_THREADS=1 so concurrent calls do not each claim every core.
+executor = EngineExecutor(
+    threads=int(os.environ.get("ENGINE_THREADS", str(os.cpu_count() or 1))),
+    max_concurrency=int(os.environ["ENGINE_MAX_CONCURRENCY"])
+    if os.environ.get("ENGINE_MAX_CONCURRENCY")
+    else None,
+)
+
+# ── Micro-batching ────────────────────────────────────────────────────────
+# PREDICT_BATCHING=1 queues /predict calls and scores them together, flushing
+# at PREDICT_BATCH_MAX_SIZE rows or after PREDICT_BATCH_MAX_WAIT_MS. Requests
+# beyond PREDICT_BATCH_QUEUE_DEPTH pending are rejected with 503.
+batcher = None
+if os.environ.get("PREDICT_BATCHING", "0") == "1":
+    batcher = MicroBatcher(
+        engine,
+        max_batch_size=int(os.environ.get("PREDICT_BATCH_MAX_SIZE", "64")),
+        max_wait_ms=float(os.environ.get("PREDICT_BATCH_MAX_WAIT_MS", "2")),
+        queue_depth=int(os.environ.get("PREDICT_BATCH_QUEUE_DEPTH", "1024")),
+        executor=executor,
+    )
+
+# ── Result cache ──────────────────────────────────────────────────────────
+# PREDICT_CACHE=1 serves repeated /predict vectors from an LRU/TTL cache and
+# runs concurrent identical requests once. Entries are keyed on the engine's
+# model fingerprint, so loading different artifacts invalidates them.
+cache = None
+if os.environ.get("PREDICT_CACHE", "0") == "1":
+    cache = DecisionCache(
+        max_entries=int(os.environ.get("PREDICT_CACHE_MAX_ENTRIES", "10000")),
+        ttl_seconds=float(os.environ.get("PREDICT_CACHE_TTL_SECONDS", "60")),
+    )
+
+# ── Streaming ─────────────────────────────────────────────────────────────
+# /predict/stream scores NDJSON in batches of up to STREAM_BATCH_SIZE rows.
+# At most STREAM_MAX_PENDING_BATCHES parsed batches wait per stream before
+# the body stops being read, so memory is bounded however long it runs.
+streamer = NDJSONScorer(
+    engine,
+    executor,
+    batch_size=int(os.environ.get("STREAM_BATCH_SIZE", "256")),
+    max_pending=int(os.environ.get("STREAM_MAX_PENDING_BATCHES", "4")),
+    max_line_bytes=int(os.environ.get("STREAM_MAX_LINE_BYTES", "65536")),
+)
+
+# ── Live feed ─────────────────────────────────────────────────────────────
+# /ws/feed broadcasts scored transactions to every subscriber: relayed ones
+# plus LIVE_FEED_RATE synthetic rows/s (LIVE_FEED_SYNTHETIC=0 relays only),
+# scored together every LIVE_FEED_INTERVAL_MS and shared by all viewers.
+feed = LiveFeed(
+    engine,
+    executor,
+    rate=float(os.environ.get("LIVE_FEED_RATE", "20")),
+    interval_ms=float(os.environ.get("LIVE_FEED_INTERVAL_MS", "250")),
+    synthetic=os.environ.get("LIVE_FEED_SYNTHETIC", "1") == "1",
+)
+
+
+N_FEATURES = 31
 
 
 class TransactionInput(BaseModel):
     features: list[float]  # must be length 31
+    # The anomaly model only runs when routing needs it; set to always get
+    # explanations.anomaly_score
+    include_anomaly_score: bool = False
+
+
+class BatchInput(BaseModel):
+    transactions: list[list[float]]  # each row must be length 31
+    include_anomaly_score: bool = False
 
 
 @app.get("/")
@@ -38,12 +185,266 @@ def root():
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "model": "xgb_ensemble_v2"}
+    status = {"status": "ok", "model": engine.model_version, "thresholds": engine.thresholds()}
+    if warmup_seconds is not None:
+        status["warmup_ms"] = round(warmup_seconds * 1e3, 2)
+    if engine.cascade:
+        status["cascade"] = engine.cascade_report()
+    if engine.early_exit is not None:
+        status["early_exit"] = engine.early_exit_report()
+    status["anomaly"] = engine.anomaly_report()
+    status["executor"] = executor.report()
+    if batcher is not None:
+        status["batching"] = batcher.report()
+    if cache is not None:
+        status["cache"] = cache.report()
+    status["streaming"] = streamer.report()
+    status["live_feed"] = feed.report()
+    return status
+
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus text exposition format
+    gauges = {
+        "fraud_executor_running": executor.running,
+        "fraud_executor_waiting": executor.waiting,
+        "fraud_streams_active": streamer.stats["active"],
+        "fraud_feed_subscribers": len(feed.subscribers),
+    }
+    if batcher is not None:
+        gauges["fraud_batch_queue_depth"] = batcher.report()["queued"]
+    if cache is not None:
+        gauges["fraud_cache_entries"] = cache.report()["entries"]
+    return PlainTextResponse(
+        engine.metrics.render(
+            extra=gauges,
+            work={
+                "cascade": engine.cascade_stats,
+                "early_exit": engine.early_exit_stats,
+                "anomaly": engine.anomaly_stats,
+            },
+        ),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+# ── Admin: live profiling ─────────────────────────────────────────────────
+# Set ADMIN_TOKEN to enable /admin/*; requests send it as X-Admin-Token.
+# Profiles are written under PROFILE_DIR (default: <tmp>/fraud-profiles).
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+profiler = Profiler(output_dir=os.environ.get("PROFILE_DIR") or None)
+executor.profiler = profiler
+
+
+class ProfileRequest(BaseModel):
+    calls: int | None = 100  # /predict engine calls to profile; a micro-batch is one call
+    seconds: float | None = None
+    tracemalloc: bool = False
+
 
+def admin_denied(request: Request) -> JSONResponse | None:
+    if not ADMIN_TOKEN:
+        return JSONResponse(status_code=404, content={"error": "Admin endpoints are disabled"})
+    token = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return JSONResponse(status_code=403, content={"error": "Invalid admin token"})
+    return None
 
-@app.post("/predict")
-def predict(txn: TransactionInput):
-    if len(txn.features) != 31:
+
+@app.post("/admin/profile")
+def start_profile(body: ProfileRequest, request: Request):
+    denied = admin_denied(request)
+    if denied is not None:
+        return denied
+    try:
+        started = profiler.start(body.calls, body.seconds, body.tracemalloc)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    if not started:
+        return JSONResponse(
+            status_code=409, content={"error": "A profiling session is already running"}
+        )
+    return profiler.status()
+
+
+@app.get("/admin/profile")
+def profile_report(request: Request):
+    denied = admin_denied(request)
+    if denied is not None:
+        return denied
+    status = profiler.status()
+    status["report"] = profiler.last_report
+    return status
+
+
+@app.get("/admin/profile/collapsed")
+def profile_collapsed(request: Request):
+    denied = admin_denied(request)
+    if denied is not None:
+        return denied
+    collapsed = profiler.collapsed()
+    if collapsed is None:
+        return JSONResponse(status_code=404, content={"error": "No finished profile yet"})
+    return PlainTextResponse(collapsed)
+
+
+@app.websocket("/ws/feed")
+async def live_feed(websocket: WebSocket, rate: float | None = None):
+    # ?rate= caps the transactions/s this client receives; see api/livefeed.py
+    await feed.serve(websocket, rate)
+
+
+async def score_transaction(features: np.ndarray, include_anomaly_score: bool) -> dict:
+    if batcher is not None:
+        return await batcher.submit(features, include_anomaly_score)
+    return await executor.run(
+        engine.evaluate_transaction, features, include_anomaly_score, profile=True
+    )
+
+
+async def evaluate(features: np.ndarray, include_anomaly_score: bool) -> dict:
+    if cache is not None:
+        return await cache.get_or_compute(
+            features,
+            include_anomaly_score,
+            engine.model_fingerprint,
+            partial(score_transaction, features, include_anomaly_score),
+        )
+    return await score_transaction(features, include_anomaly_score)
+
+
+async def predict(txn: TransactionInput):
+    if len(txn.features) != N_FEATURES:
         return {"error": "Expected 31 features"}
+    t0 = time.perf_counter()
     features = np.array(txn.features).reshape(1, -1)
-    return engine.evaluate_transaction(features)
\ No newline at end of file
+    t1 = time.perf_counter()
+    try:
+        result = await evaluate(features, txn.include_anomaly_score)
+    except QueueFullError as exc:
+        return JSONResponse(status_code=503, content={"error": str(exc)})
+    t2 = time.perf_counter()
+    # Encoded here rather than by FastAPI so serialization can be timed
+    response = JSONResponse(jsonable_encoder(result))
+    engine.metrics.record_stages(parse=t1 - t0, serialize=time.perf_counter() - t2)
+    return response
+
+
+async def predict_fast(request: Request):
+    body = await request.body()
+    t0 = time.perf_counter()
+    try:
+        features, include_anomaly_score = fastjson.parse_transaction(body)
+    except fastjson.FastJSONError as exc:
+        return {"error": str(exc)}
+    t1 = time.perf_counter()
+    try:
+        result = await evaluate(features, include_anomaly_score)
+    except QueueFullError as exc:
+        return JSONResponse(status_code=503, content={"error": str(exc)})
+    t2 = time.perf_counter()
+    response = Response(content=fastjson.dumps(result), media_type="application/json")
+    engine.metrics.record_stages(parse=t1 - t0, serialize=time.perf_counter() - t2)
+    return response
+
+
+# PREDICT_FAST_JSON=1 swaps pydantic + FastAPI encoding for orjson on
+# /predict (see api/fastjson.py); request and response bodies are unchanged
+if os.environ.get("PREDICT_FAST_JSON", "0") == "1":
+    fastjson.require_orjson()
+    app.add_api_route(
+        "/predict",
+        predict_fast,
+        methods=["POST"],
+        openapi_extra={
+            "requestBody": {
+                "required": True,
+                "content": {"application/json": {"schema": TransactionInput.model_json_schema()}},
+            }
+        },
+    )
+else:
+    app.add_api_route("/predict", predict, methods=["POST"])
+
+
+BATCH_FORMATS = ("rows", "columnar", "binary")
+
+
+@app.post(
+    "/predict/batch",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": BatchInput.model_json_schema()},
+                wire.OCTET_STREAM: {"schema": {"type": "string", "format": "binary"}},
+                wire.ARROW_STREAM: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    },
+)
+async def predict_batch(
+    request: Request, format: str = "rows", include_anomaly_score: bool = False
+):
+    # Body: JSON (BatchInput), a raw matrix or Arrow IPC; see api/wire.py.
+    # format=columnar returns arrays instead of row objects, format=binary
+    # the packed columnar layout.
+    if format not in BATCH_FORMATS:
+        return {"error": f"Unknown format {format!r}; expected one of {BATCH_FORMATS}"}
+
+    content_type = request.headers.get("content-type", "application/json")
+    content_type = content_type.split(";")[0].strip().lower()
+    body = await request.body()
+
+    t0 = time.perf_counter()
+    try:
+        if content_type == wire.OCTET_STREAM:
+            features = wire.decode_matrix(body)
+        elif content_type in (wire.ARROW_STREAM, wire.ARROW_FILE):
+            features = wire.decode_arrow(body, file_format=content_type == wire.ARROW_FILE)
+        else:
+            try:
+                batch = BatchInput.model_validate_json(body)
+            except ValidationError as exc:
+                raise RequestValidationError(exc.errors(include_url=False)) from exc
+            for i, row in enumerate(batch.transactions):
+                if len(row) != N_FEATURES:
+                    return {"error": f"Expected 31 features in row {i}"}
+            features = np.array(batch.transactions, dtype=float).reshape(-1, N_FEATURES)
+            include_anomaly_score = include_anomaly_score or batch.include_anomaly_score
+    except wire.ArrowUnavailableError as exc:
+        return JSONResponse(status_code=415, content={"error": str(exc)})
+    except ValueError as exc:
+        return {"error": str(exc)}
+
+    t1 = time.perf_counter()
+
+    scores = await executor.run(engine.score_batch, features, include_anomaly_score)
+
+    t2 = time.perf_counter()
+    if format == "binary":
+        response = Response(content=wire.columnar_binary(scores), media_type=wire.OCTET_STREAM)
+    elif format == "columnar":
+        response = JSONResponse(wire.columnar_json(scores))
+    else:
+        response = JSONResponse(
+            jsonable_encoder({"results": engine.results_from_scores(scores)})
+        )
+    engine.metrics.record_stages(parse=t1 - t0, serialize=time.perf_counter() - t2)
+    return response
+
+
+@app.post(
+    "/predict/stream",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {NDJSON: {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+async def predict_stream(request: Request):
+    # One /predict body per line, optionally with an "id" that is echoed;
+    # one result (or {"error", "line"}) per line comes back in input order
+    return NDJSONResponse(streamer.stream(request.stream()), media_type=NDJSON)
@@ -0,0 +1,293 @@
+"""
+On-demand profiling of live engine calls.
+
+An admin request opens a session covering the next N `/predict` engine
+calls or the next T seconds, whichever ends first. Only callers that ask for
+it are wrapped (`EngineExecutor.run(..., profile=True)`), so live-feed,
+batch and stream calls neither use up N nor appear in the profile.
+
+Only one call is profiled at a time. Python allows a single active
+profiler per process (from 3.12, a second `cProfile.Profile.enable` raises
+ValueError), so a call that arrives while another is being captured runs
+unprofiled and is not counted. Finished profiles are merged into one
+`pstats.Stats` under a lock. With `tracemalloc`, the top allocation sites
+are captured when the session closes.
+
+The report is kept in memory and written to `PROFILE_DIR` in three forms:
+`.pstats` for `python -m pstats` / snakeviz, `.collapsed` for
+flamegraph.pl / speedscope, and `.tracemalloc.txt`. With no session open,
+`wrap` returns the function unchanged and requests are unaffected.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable
+
+# Collapsed stacks stop expanding below this depth or this share of time
+MAX_STACK_DEPTH = 64
+MIN_STACK_SECONDS = 1e-6
+
+
+class ProfileSession:
+
+    def __init__(self, calls: int | None, seconds: float | None, memory: bool) -> None:
+
+        self.max_calls = calls
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.memory = memory
+        self.started_at = datetime.utcnow()
+
+        self.started = 0
+        self.completed = 0
+        self.closing = False
+        self.stats: pstats.Stats | None = None
+
+    def accepting(self) -> bool:
+
+        if self.closing:
+            return False
+        if self.max_calls is not None and self.started >= self.max_calls:
+            return False
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return False
+
+        return True
+
+
+class Profiler:
+
+    def __init__(self, output_dir: str | None = None) -> None:
+
+        self.output_dir = output_dir or os.path.join(tempfile.gettempdir(), "fraud-profiles")
+
+        self._lock = threading.Lock()
+        # Held by the one call being captured
+        self._capturing = threading.Lock()
+        self.session: ProfileSession | None = None
+        self.last_report: dict | None = None
+        self._last_stats: pstats.Stats | None = None
+        self._started_tracemalloc = False
+
+    # ============================================================
+    # SESSION CONTROL
+    # ============================================================
+
+    def start(self, calls: int | None, seconds: float | None, memory: bool = False) -> bool:
+        """Open a session; False if one is already running."""
+
+        if calls is None and seconds is None:
+            raise ValueError("Give a number of calls, a duration or both")
+
+        with self._lock:
+            if self.session is not None:
+                return False
+            if memory and not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                self._started_tracemalloc = True
+            self.session = ProfileSession(calls, seconds, memory)
+
+        return True
+
+    def poll(self) -> None:
+        """Close a session whose time ran out while no calls were running."""
+
+        with self._lock:
+            session = self.session
+            if session is not None and not session.accepting():
+                session.closing = True
+                if session.completed == session.started:
+                    self._finish(session)
+
+    def status(self) -> dict:
+
+        self.poll()
+        session = self.session
+        if session is None:
+            return {"active": False, "last_report": self.last_report is not None}
+
+        return {
+            "active": True,
+            "calls_profiled": session.completed,
+            "max_calls": session.max_calls,
+            "seconds_left": max(0.0, session.deadline - time.monotonic())
+            if session.deadline is not None
+            else None,
+            "tracemalloc": session.memory,
+        }
+
+    # ============================================================
+    # CAPTURE
+    # ============================================================
+
+    def wrap(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+
+        # Unlocked fast path: no session, no cost
+        if self.session is None:
+            return fn
+
+        def profiled(*args):
+            if not self._capturing.acquire(blocking=False):
+                return fn(*args)
+
+            try:
+                with self._lock:
+                    session = self.session
+                    if session is not None and session.accepting():
+                        session.started += 1
+                    else:
+                        session = None
+                if session is None:
+                    return fn(*args)
+
+                profile = cProfile.Profile()
+                try:
+                    return profile.runcall(fn, *args)
+                finally:
+                    self._collect(session, profile)
+            finally:
+                self._capturing.release()
+
+        return profiled
+
+    def _collect(self, session: ProfileSession, profile: cProfile.Profile) -> None:
+
+        with self._lock:
+            if session.stats is None:
+                session.stats = pstats.Stats(profile)
+            else:
+                session.stats.add(profile)
+            session.completed += 1
+
+            if not session.accepting():
+                session.closing = True
+                if session.completed == session.started:
+                    self._finish(session)
+
+    # ============================================================
+    # REPORT
+    # ============================================================
+
+    def _finish(self, session: ProfileSession) -> None:
+        """Called with the lock held."""
+
+        self.session = None
+
+        memory_text = None
+        if session.memory and tracemalloc.is_tracing():
+            top = tracemalloc.take_snapshot().statistics("lineno")[:25]
+            memory_text = "\n".join(str(stat) for stat in top)
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+        stamp = session.started_at.strftime("%Y%m%dT%H%M%S")
+        base = os.path.join(self.output_dir, f"profile-{stamp}")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        report = {
+            "started_at": str(session.started_at),
+            "calls_profiled": session.completed,
+            "files": {},
+        }
+
+        if session.stats is not None:
+            session.stats.dump_stats(base + ".pstats")
+            with open(base + ".collapsed", "w") as f:
+                f.write(collapsed_stacks(session.stats))
+            report["files"]["pstats"] = base + ".pstats"
+            report["files"]["collapsed"] = base + ".collapsed"
+
+            buffer = io.StringIO()
+            session.stats.stream = buffer
+            session.stats.sort_stats("cumulative").print_stats(30)
+            report["top_cumulative"] = buffer.getvalue()
+
+        if memory_text is not None:
+            with open(base + ".tracemalloc.txt", "w") as f:
+                f.write(memory_text + "\n")
+            report["files"]["tracemalloc"] = base + ".tracemalloc.txt"
+            report["tracemalloc_top"] = memory_text
+
+        self.last_report = report
+        self._last_stats = session.stats
+
+    def collapsed(self) -> str | None:
+
+        if self._last_stats is None:
+            return None
+
+        return collapsed_stacks(self._last_stats)
+
+
+# ============================================================
+# COLLAPSED STACKS
+# ============================================================
+
+
+def _frame_name(func: tuple) -> str:
+
+    filename, line, name = func
+    if filename == "~":
+        return name
+
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> str:
+    """
+    Flamegraph input ("a;b;c <microseconds>") rebuilt from the call graph.
+
+    cProfile keeps caller->callee edges, not full stacks, so each callee's
+    time under a caller is split in proportion to that edge's share of the
+    callee's cumulative time.
+    """
+
+    callees: dict = {}
+    roots = []
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            # edge = (primitive calls, calls, own time, cumulative time)
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    totals: dict = {}
+
+    def expand(func: tuple, path: tuple, weight: float) -> None:
+
+        _, _, own, cumulative, _ = stats.stats[func]
+        stack = path + (_frame_name(func),)
+
+        own_seconds = own * weight
+        if own_seconds >= MIN_STACK_SECONDS:
+            key = ";".join(stack)
+            totals[key] = totals.get(key, 0.0) + own_seconds
+
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+
+        for callee, edge_cumulative in callees.get(func, []):
+            callee_cumulative = stats.stats[callee][3]
+            share = weight * edge_cumulative
+            if callee_cumulative <= 0 or share < MIN_STACK_SECONDS:
+                continue
+            if _frame_name(callee) in stack:
+                # Recursion: the edge's time is already inside this stack
+                continue
+            expand(callee, stack, share / callee_cumulative)
+
+    for root in roots:
+        expand(root, (), 1.0)
+
+    return "".join(
+        f"{stack} {int(round(seconds * 1e6))}\n"
+        for stack, seconds in sorted(totals.items())
+        if seconds * 1e6 >= 0.5
+    )
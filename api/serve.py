@@ -0,0 +1,214 @@
+"""
+Pre-fork serving: load the engine once, then fork workers that share it.
+
+`uvicorn --workers N` imports `api.main` in every worker, so each one loads
+and holds its own copy of the models. Here the master imports the app
+once, freezes the heap out of the garbage collector and forks N workers
+that serve the same listening socket. Model arrays are then shared
+copy-on-write, or through the page cache when compiled mode memory-maps
+`artifacts/native/`. Each worker's OpenMP/BLAS/joblib threads are pinned
+to `cores // workers` so workers × threads stays within the machine.
+
+Engine warmup runs in each worker after the fork. Starting OpenMP thread
+pools in the master would leave the children unable to use them.
+
+Usage (from the project root, POSIX only):
+
+    ENGINE_MODE=compiled python -m api.serve --workers 4
+    python -m api.serve memory <master pid>
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import List
+
+from backend.engine.threads import pin_threads
+
+
+def _bind(host: str, port: int) -> socket.socket:
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    return sock
+
+
+def _run_worker(app_module, sock: socket.socket, warmup: bool, log_level: str) -> None:
+
+    import uvicorn
+
+    if warmup:
+        app_module.warmup_seconds = app_module.engine.warmup()
+
+    config = uvicorn.Config(app_module.app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+# ============================================================
+# MASTER
+# ============================================================
+
+
+def serve(host: str, port: int, workers: int, threads: int | None, log_level: str) -> int:
+
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Pre-fork serving needs os.fork (Linux/macOS)")
+
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    pin_threads(threads)
+    # api.main otherwise sizes each worker's engine executor to every core
+    os.environ.setdefault("ENGINE_THREADS", str(threads))
+
+    # The master only loads; each worker warms up after the fork
+    warmup = os.environ.get("ENGINE_WARMUP", "1") == "1"
+    os.environ["ENGINE_WARMUP"] = "0"
+    import api.main as app_module
+
+    sock = _bind(host, port)
+
+    # Keep the collector from touching (and so copying) the loaded objects
+    gc.collect()
+    gc.freeze()
+
+    print(
+        f"[serve] Master {os.getpid()} on {host}:{port}: "
+        f"{workers} workers x {threads} threads"
+    )
+
+    children: set = set()
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                _run_worker(app_module, sock, warmup, log_level)
+            finally:
+                os._exit(0)
+        children.add(pid)
+        print(f"[serve] Worker {pid} started")
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+
+        if not stopping:
+            print(f"[serve] Worker {pid} exited with status {status}; restarting")
+            time.sleep(1.0)
+            spawn()
+
+    sock.close()
+    print("[serve] All workers stopped")
+
+    return 0
+
+
+# ============================================================
+# MEMORY REPORT
+# ============================================================
+
+
+def _smaps_rollup(pid: int) -> dict:
+
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+
+    return fields
+
+
+def _children(pid: int) -> List[int]:
+
+    children = []
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{tid}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+
+    return children
+
+
+def memory_report(master_pid: int) -> None:
+    """
+    RSS counts shared pages in full for every process; PSS divides them
+    between the processes sharing them, so the sum of PSS is the real total.
+    """
+
+    pids = [master_pid] + _children(master_pid)
+
+    print(f"{'pid':>8} {'role':<7} {'rss (MB)':>9} {'pss (MB)':>9} {'shared (MB)':>12} {'private (MB)':>13}")
+    total_pss = 0
+    for pid in pids:
+        m = _smaps_rollup(pid)
+        shared = m.get("Shared_Clean", 0) + m.get("Shared_Dirty", 0)
+        private = m.get("Private_Clean", 0) + m.get("Private_Dirty", 0)
+        total_pss += m.get("Pss", 0)
+        print(
+            f"{pid:>8} {'master' if pid == master_pid else 'worker':<7} "
+            f"{m.get('Rss', 0) / 1024:>9.1f} {m.get('Pss', 0) / 1024:>9.1f} "
+            f"{shared / 1024:>12.1f} {private / 1024:>13.1f}"
+        )
+
+    print(f"Total PSS: {total_pss / 1024:.1f} MB across {len(pids)} processes")
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Pre-fork API server")
+    sub = parser.add_subparsers(dest="command")
+
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_WORKERS", "2")))
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Threads per worker (default: cores // workers)",
+    )
+    parser.add_argument("--log-level", default="info")
+
+    memory = sub.add_parser("memory", help="RSS/PSS of a running master and its workers")
+    memory.add_argument("pid", type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "memory":
+        memory_report(args.pid)
+        return 0
+
+    return serve(args.host, args.port, args.workers, args.threads, args.log_level)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+NDJSON streaming for `/predict/stream`.
+
+The request body is read chunk by chunk and split into lines, each a
+`/predict` body optionally carrying an `id` that is echoed back. Parsed
+rows are grouped into micro-batches of up to `batch_size` rows; a partial
+batch is sent as soon as the rows already received are used up, so a slow
+feed is not held back waiting for a full batch. Batches go through a queue
+of `max_pending` entries to one `DecisionEngine.score_batch` call each, and
+results are written back as NDJSON in input order.
+
+Memory stays bounded for any stream length. When the queue is full the
+reader stops pulling from the socket, so TCP flow control slows the
+sender. When the client reads responses slowly, scoring waits on it in
+turn. Bad lines produce an `{"error": ..., "line": n}` result at their
+position and the stream continues.
+"""
+
+import asyncio
+import json
+
+import numpy as np
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from backend.engine.replay import N_FEATURES
+
+NDJSON = "application/x-ndjson"
+
+
+class StreamLineError(ValueError):
+    """A line that cannot be scored; reported in place, the stream continues."""
+
+
+class NDJSONResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves `receive` to the request body reader.
+
+    Below ASGI spec 2.4 Starlette listens for disconnects on `receive` while
+    streaming, which would swallow the body chunks still arriving. Here a
+    disconnect surfaces through `request.stream()` instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+
+        await self.stream_response(send)
+
+
+class NDJSONScorer:
+
+    def __init__(
+        self,
+        engine,
+        executor,
+        batch_size: int = 256,
+        max_pending: int = 4,
+        max_line_bytes: int = 65536,
+    ) -> None:
+
+        self.engine = engine
+        # An api.executor.EngineExecutor
+        self.executor = executor
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_line_bytes = max_line_bytes
+
+        self.stats = {
+            "streams": 0,
+            "active": 0,
+            "rows": 0,
+            "errors": 0,
+            "batches": 0,
+            "disconnects": 0,
+        }
+
+    # ============================================================
+    # PARSING
+    # ============================================================
+
+    @staticmethod
+    def parse_line(line: bytes) -> tuple:
+        """(features row, include_anomaly_score, id) from one NDJSON line."""
+
+        try:
+            payload = json.loads(line)
+        except ValueError as exc:
+            raise StreamLineError(f"Invalid JSON: {exc}") from exc
+
+        if not isinstance(payload, dict):
+            raise StreamLineError("Expected a JSON object")
+
+        values = payload.get("features")
+        if not isinstance(values, list) or len(values) != N_FEATURES:
+            raise StreamLineError("Expected 31 features")
+
+        include_anomaly_score = payload.get("include_anomaly_score", False)
+        if not isinstance(include_anomaly_score, bool):
+            raise StreamLineError("include_anomaly_score must be a boolean")
+
+        try:
+            row = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError) as exc:
+            raise StreamLineError("Features must be numbers") from exc
+
+        if not np.isfinite(row).all():
+            raise StreamLineError("Features must be finite")
+
+        return row, include_anomaly_score, payload.get("id")
+
+    # ============================================================
+    # STREAM
+    # ============================================================
+
+    async def _read(self, chunks, queue: asyncio.Queue) -> None:
+        """Split the body into lines and queue batches; None marks the end."""
+
+        buffer = b""
+        line_number = 0
+        batch: list = []
+
+        async def flush():
+            nonlocal batch
+            if batch:
+                # Blocks while max_pending batches wait: backpressure
+                await queue.put(batch)
+                batch = []
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                if len(buffer) > self.max_line_bytes:
+                    raise StreamLineError(f"Line exceeds {self.max_line_bytes} bytes")
+
+                for line in lines:
+                    line_number += 1
+                    if not line.strip():
+                        continue
+                    try:
+                        batch.append((line_number,) + self.parse_line(line))
+                    except StreamLineError as exc:
+                        batch.append((line_number, exc))
+                    if len(batch) >= self.batch_size:
+                        await flush()
+
+                # Rows received so far are scored without waiting for more
+                await flush()
+
+            if buffer.strip():
+                line_number += 1
+                try:
+                    batch.append((line_number,) + self.parse_line(buffer))
+                except StreamLineError as exc:
+                    batch.append((line_number, exc))
+                await flush()
+        except StreamLineError as exc:
+            await flush()
+            await queue.put([(line_number + 1, exc)])
+        except ClientDisconnect:
+            self.stats["disconnects"] += 1
+        finally:
+            await queue.put(None)
+
+    async def _score(self, batch: list) -> list:
+
+        rows = [item for item in batch if len(item) == 4]
+        results = {}
+        if rows:
+            X = np.vstack([item[1] for item in rows])
+            include = np.array([item[2] for item in rows])
+            scores = await self.executor.run(self.engine.score_batch, X, include)
+            for item, result in zip(rows, self.engine.results_from_scores(scores)):
+                if item[3] is not None:
+                    result["id"] = item[3]
+                results[item[0]] = result
+
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(rows)
+        self.stats["errors"] += len(batch) - len(rows)
+
+        return [
+            results[item[0]] if len(item) == 4 else {"error": str(item[1]), "line": item[0]}
+            for item in batch
+        ]
+
+    async def stream(self, chunks):
+        """Async iterator of NDJSON result bytes for an async iterator of body chunks."""
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        reader = asyncio.get_running_loop().create_task(self._read(chunks, queue))
+
+        self.stats["streams"] += 1
+        self.stats["active"] += 1
+        try:
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    break
+                results = await self._score(batch)
+                yield "".join(json.dumps(result) + "\n" for result in results).encode()
+            # Surface unexpected reader failures
+            await reader
+        finally:
+            self.stats["active"] -= 1
+            if not reader.done():
+                reader.cancel()
+
+    def report(self) -> dict:
+
+        return {
+            "batch_size": self.batch_size,
+            "max_pending_batches": self.max_pending,
+            **self.stats,
+        }
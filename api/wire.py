@@ -0,0 +1,174 @@
+"""
+Binary request and response formats for bulk scoring.
+
+Raw matrix (`application/octet-stream`), a 16-byte little-endian header
+followed by the row-major data:
+
+    offset  size  field
+    0       4     magic b"RAFM"
+    4       1     itemsize: 4 (float32) or 8 (float64)
+    5       3     reserved, zero
+    8       4     n_rows (uint32)
+    12      4     n_cols (uint32), must be 31
+
+The payload is wrapped with `np.frombuffer`, so decoding copies nothing.
+
+Arrow IPC (`application/vnd.apache.arrow.stream` or `.file`) needs the
+optional `pyarrow` package. Columns are matched by the cleaned feature names
+when present, otherwise taken in order.
+
+Columnar binary response, a 16-byte header followed by three arrays:
+
+    0   4   magic b"RAFC"
+    4   4   n_rows (uint32)
+    8   8   reserved, zero
+    16  n_rows          decision codes (uint8, index into DECISIONS)
+    ..  pad to 8 bytes
+    ..  8 * n_rows      risk_score (float64)
+    ..  8 * n_rows      uncertainty (float64, NaN on the cascade fast path)
+"""
+
+import struct
+
+import numpy as np
+
+from backend.engine.decision_engine import DECISIONS
+from backend.engine.replay import FEATURE_COLUMNS, N_FEATURES
+
+OCTET_STREAM = "application/octet-stream"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+
+MATRIX_MAGIC = b"RAFM"
+MATRIX_HEADER = struct.Struct("<4sB3xII")
+
+COLUMNAR_MAGIC = b"RAFC"
+COLUMNAR_HEADER = struct.Struct("<4sI8x")
+
+_DTYPES = {4: np.dtype("<f4"), 8: np.dtype("<f8")}
+
+
+class ArrowUnavailableError(Exception):
+    """Raised for Arrow input when pyarrow is not installed."""
+
+
+# ============================================================
+# RAW MATRIX
+# ============================================================
+
+
+def encode_matrix(X: np.ndarray, dtype=np.float64) -> bytes:
+
+    X = np.ascontiguousarray(X, dtype=np.dtype(dtype).newbyteorder("<"))
+    if X.ndim != 2:
+        raise ValueError("Expected a 2-D matrix")
+
+    header = MATRIX_HEADER.pack(MATRIX_MAGIC, X.itemsize, X.shape[0], X.shape[1])
+
+    return header + X.tobytes()
+
+
+def decode_matrix(body: bytes) -> np.ndarray:
+    """(n_rows, 31) read-only view over the request body."""
+
+    if len(body) < MATRIX_HEADER.size:
+        raise ValueError("Body is shorter than the 16-byte matrix header")
+
+    magic, itemsize, n_rows, n_cols = MATRIX_HEADER.unpack_from(body)
+    if magic != MATRIX_MAGIC:
+        raise ValueError(f"Bad magic {magic!r}; expected {MATRIX_MAGIC!r}")
+    if itemsize not in _DTYPES:
+        raise ValueError(f"Unsupported itemsize {itemsize}; expected 4 or 8")
+    if n_cols != N_FEATURES:
+        raise ValueError(f"Expected {N_FEATURES} features per row, got {n_cols}")
+
+    expected = MATRIX_HEADER.size + n_rows * n_cols * itemsize
+    if len(body) != expected:
+        raise ValueError(f"Body is {len(body)} bytes; header implies {expected}")
+
+    X = np.frombuffer(
+        body, dtype=_DTYPES[itemsize], count=n_rows * n_cols, offset=MATRIX_HEADER.size
+    )
+
+    return X.reshape(n_rows, n_cols)
+
+
+# ============================================================
+# ARROW IPC
+# ============================================================
+
+
+def decode_arrow(body: bytes, file_format: bool = False) -> np.ndarray:
+
+    try:
+        import pyarrow as pa
+    except ImportError as exc:
+        raise ArrowUnavailableError(
+            "Arrow input needs the optional pyarrow package (pip install pyarrow)"
+        ) from exc
+
+    # py_buffer wraps the body without copying it
+    source = pa.py_buffer(body)
+    reader = pa.ipc.open_file(source) if file_format else pa.ipc.open_stream(source)
+    table = reader.read_all()
+
+    if all(name in table.column_names for name in FEATURE_COLUMNS):
+        columns = [table.column(name) for name in FEATURE_COLUMNS]
+    elif table.num_columns == N_FEATURES:
+        columns = table.columns
+    else:
+        raise ValueError(
+            f"Expected the {N_FEATURES} feature columns by name or position, "
+            f"got {table.num_columns} columns"
+        )
+
+    # Arrow is columnar and the models want rows, so this is the one copy
+    X = np.empty((table.num_rows, N_FEATURES))
+    for j, column in enumerate(columns):
+        if column.null_count:
+            raise ValueError(f"Column {j} contains nulls")
+        X[:, j] = column.to_numpy()
+
+    return X
+
+
+# ============================================================
+# COLUMNAR RESPONSES
+# ============================================================
+
+
+def decision_codes(decisions: np.ndarray) -> np.ndarray:
+
+    codes = np.zeros(len(decisions), dtype=np.uint8)
+    for code, label in enumerate(DECISIONS):
+        codes[decisions == label] = code
+
+    return codes
+
+
+def columnar_json(scores: dict) -> dict:
+
+    return {
+        "decision_labels": list(DECISIONS),
+        "decision_codes": decision_codes(scores["decision"]).tolist(),
+        "risk_score": scores["risk_score"].tolist(),
+        # null where the cascade fast path did not measure it
+        "uncertainty": [None if np.isnan(u) else u for u in scores["uncertainty"].tolist()],
+    }
+
+
+def columnar_binary(scores: dict) -> bytes:
+
+    n_rows = len(scores["decision"])
+    codes = decision_codes(scores["decision"]).tobytes()
+    padding = b"\x00" * (-len(codes) % 8)
+
+    return b"".join(
+        [
+            COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, n_rows),
+            codes,
+            padding,
+            np.asarray(scores["risk_score"], dtype="<f8").tobytes(),
+            np.asarray(scores["uncertainty"], dtype="<f8").tobytes(),
+        ]
+    )
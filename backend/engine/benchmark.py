@@ -0,0 +1,251 @@
+"""
+Reproducible latency/throughput benchmark for the decision engine.
+
+Scores a fixed synthetic workload (see `replay.synthetic_rows`): mostly
+low-risk rows, with one in ten scaled into high-risk and novel regions,
+roughly the mix in `phase2_results.csv`. Covered are `evaluate_transaction`
+and `evaluate_batch` at batch sizes 1..4096. Each case reports p50/p95/p99
+call latency, rows/s, process peak RSS and the peak traced allocation of
+one call. Results are written as JSON; given a baseline from an earlier
+run with the same configuration, the suite exits 1 when any case's p50,
+p99 or rows/s regresses past `--threshold`, and 2 when the configurations
+differ.
+
+Usage (from the project root):
+
+    python -m backend.engine.benchmark --output bench.json
+    python -m backend.engine.benchmark --mode compiled --baseline bench.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, List
+
+import numpy as np
+
+from backend.engine.decision_engine import EARLY_EXIT_RULES, ENGINE_MODES, DecisionEngine
+from backend.engine.replay import load_rows, synthetic_rows
+
+DEFAULT_BATCH_SIZES = [1, 4, 16, 64, 256, 1024, 4096]
+
+FORMAT_VERSION = 1
+
+
+def _peak_rss_mb() -> float:
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _peak_alloc_kb(call: Callable[[], object]) -> float:
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return (peak - baseline) / 1024
+
+
+def _case(name: str, rows_per_call: int, latencies: List[float], alloc_kb: float) -> dict:
+
+    ms = np.asarray(latencies) * 1e3
+
+    return {
+        "name": name,
+        "rows_per_call": rows_per_call,
+        "calls": len(latencies),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "rows_per_s": rows_per_call * len(latencies) / float(np.sum(latencies)),
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_alloc_kb": alloc_kb,
+    }
+
+
+def run(
+    engine: DecisionEngine,
+    X: np.ndarray,
+    calls: int,
+    batch_sizes: List[int],
+    target_rows: int,
+) -> List[dict]:
+
+    cases = []
+
+    # Single-row path, cycling through the workload
+    latencies = []
+    for i in range(calls):
+        row = X[i % len(X)].reshape(1, -1)
+        start = time.perf_counter()
+        engine.evaluate_transaction(row)
+        latencies.append(time.perf_counter() - start)
+    alloc = _peak_alloc_kb(lambda: engine.evaluate_transaction(X[:1]))
+    cases.append(_case("evaluate_transaction", 1, latencies, alloc))
+    print(f"[benchmark] evaluate_transaction: {cases[-1]['p50_ms']:.3f} ms p50")
+
+    for size in batch_sizes:
+        repeats = max(5, min(calls, target_rows // size))
+        latencies = []
+        for r in range(repeats):
+            start_row = (r * size) % max(1, len(X) - size + 1)
+            batch = X[start_row:start_row + size]
+            start = time.perf_counter()
+            engine.evaluate_batch(batch)
+            latencies.append(time.perf_counter() - start)
+        alloc = _peak_alloc_kb(lambda: engine.evaluate_batch(X[:size]))
+        cases.append(_case(f"evaluate_batch[{size}]", size, latencies, alloc))
+        print(
+            f"[benchmark] evaluate_batch[{size}]: {cases[-1]['p50_ms']:.3f} ms p50, "
+            f"{cases[-1]['rows_per_s']:.0f} rows/s"
+        )
+
+    return cases
+
+
+def config_mismatch(config: dict, baseline: dict) -> List[str]:
+    """Config keys whose values differ from the baseline's."""
+
+    base = baseline.get("config", {})
+
+    return [key for key in sorted(set(config) | set(base)) if config.get(key) != base.get(key)]
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Regressions of p50 or p99 latency or rows/s beyond `threshold` (a fraction)."""
+
+    mismatch = config_mismatch(results["config"], baseline)
+    if mismatch:
+        raise ValueError(f"Baseline was run with a different configuration: {mismatch}")
+
+    previous = {case["name"]: case for case in baseline["cases"]}
+    regressions = []
+
+    print(
+        f"\n{'case':<26} {'p50 base':>9} {'p50 now':>9} {'p99 base':>9} {'p99 now':>9} "
+        f"{'rows/s base':>12} {'rows/s now':>11}  status"
+    )
+    for case in results["cases"]:
+        base = previous.get(case["name"])
+        if base is None:
+            print(
+                f"{case['name']:<26} {'-':>9} {case['p50_ms']:>9.3f} {'-':>9} {case['p99_ms']:>9.3f} "
+                f"{'-':>12} {case['rows_per_s']:>11.0f}  new"
+            )
+            continue
+
+        failed = [
+            metric
+            for metric, worse in (
+                ("p50", case["p50_ms"] > base["p50_ms"] * (1 + threshold)),
+                ("p99", case["p99_ms"] > base["p99_ms"] * (1 + threshold)),
+                ("rows/s", case["rows_per_s"] < base["rows_per_s"] * (1 - threshold)),
+            )
+            if worse
+        ]
+        status = f"REGRESSED ({', '.join(failed)})" if failed else "ok"
+        if failed:
+            regressions.append(case["name"])
+
+        print(
+            f"{case['name']:<26} {base['p50_ms']:>9.3f} {case['p50_ms']:>9.3f} "
+            f"{base['p99_ms']:>9.3f} {case['p99_ms']:>9.3f} "
+            f"{base['rows_per_s']:>12.0f} {case['rows_per_s']:>11.0f}  {status}"
+        )
+
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Decision engine benchmark suite")
+    parser.add_argument("--mode", choices=ENGINE_MODES, default="sklearn")
+    parser.add_argument("--cascade", action="store_true")
+    parser.add_argument("--early-exit", choices=EARLY_EXIT_RULES, default=None)
+    parser.add_argument("--data", default=None, help="Model-ready .npy or cleaned .csv (default: synthetic)")
+    parser.add_argument("--rows", type=int, default=8192, help="Workload size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--calls", type=int, default=300, help="Single-row calls; cap on batch repeats")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--target-rows", type=int, default=16384, help="Rows scored per batch size")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    parser.add_argument("--baseline", default=None, help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed regression, e.g. 0.10 = 10%%")
+    args = parser.parse_args(argv)
+
+    if args.data is None:
+        X = synthetic_rows(args.rows, seed=args.seed)
+    else:
+        X, _ = load_rows(args.data, limit=args.rows)
+    X = np.ascontiguousarray(X, dtype=np.float64)
+
+    config = {
+        "mode": args.mode,
+        "cascade": args.cascade,
+        "early_exit": args.early_exit,
+        "data": args.data or f"synthetic(seed={args.seed})",
+        "rows": len(X),
+    }
+
+    # Checked before the run: a baseline of another configuration is not a
+    # baseline for this one
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatch = config_mismatch(config, baseline)
+        if mismatch:
+            print(f"[benchmark] {args.baseline} was run with a different configuration:")
+            for key in mismatch:
+                print(f"[benchmark]   {key}: baseline {baseline['config'].get(key)!r}, now {config.get(key)!r}")
+            return 2
+
+    engine = DecisionEngine(mode=args.mode, cascade=args.cascade, early_exit=args.early_exit)
+    engine.metrics.enabled = False
+    engine.warmup()
+
+    mix = Counter(engine.score_batch(X)["decision"].tolist())
+    print("[benchmark] Workload decisions: " + ", ".join(f"{k}={v}" for k, v in sorted(mix.items())))
+
+    results = {
+        "format_version": FORMAT_VERSION,
+        "config": config,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "workload_decisions": dict(mix),
+        "cases": run(engine, X, args.calls, args.batch_sizes, args.target_rows),
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[benchmark] Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"[benchmark] {len(regressions)} case(s) regressed beyond {args.threshold:.0%}: {regressions}")
+            return 1
+        print(f"[benchmark] No regressions beyond {args.threshold:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""
+Out-of-core bulk scoring of CSV or Parquet files.
+
+The input is read in chunks of `--chunk-size` rows and preprocessed the way
+`phase0_cleaning.py` and the training scripts do. A raw `Time` column
+becomes `hour` and `delta_time`, with the previous Time carried across chunk
+boundaries, and `Amount` becomes `log1p(Amount)`. Files that already have
+`hour` and `delta_time` are taken as cleaned. The input must be in Time
+order, as `creditcard.csv` is; rows that go back in time are counted in the
+summary.
+
+Chunks are scored by a pool of worker processes, each holding one engine,
+and their CSV text is appended to the output in input order. At most two
+chunks per worker are in flight, so memory stays flat however large the
+input is. After each chunk the output is fsynced and `<output>.progress.json`
+records how many rows and output bytes are committed, and the byte offset in
+a CSV input where the next row starts. `--resume` truncates whatever a crash
+left past that point and seeks straight to the next input row.
+
+Usage (from the project root):
+
+    python -m backend.engine.bulk_score creditcard.csv scored.csv --workers 4
+    python -m backend.engine.bulk_score transactions.parquet scored.csv --mode compiled --resume
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Tuple
+
+from backend.engine.threads import pin_threads
+
+DEFAULT_THREADS_PER_WORKER = 1
+
+if __name__ == "__main__":
+    # OpenMP and BLAS size their pools when numpy and the models' libraries
+    # are imported below, and forked workers inherit those pools, so the
+    # thread count is pinned before anything heavy loads
+    _threads = argparse.ArgumentParser(add_help=False)
+    _threads.add_argument("--threads-per-worker", type=int, default=DEFAULT_THREADS_PER_WORKER)
+    pin_threads(_threads.parse_known_args()[0].threads_per_worker)
+
+import numpy as np
+import pandas as pd
+
+from backend.engine.decision_engine import EARLY_EXIT_RULES, ENGINE_MODES, DecisionEngine
+from backend.engine.replay import FEATURE_COLUMNS
+
+OUTPUT_COLUMNS = [
+    "row",
+    "decision",
+    "risk_score",
+    "uncertainty",
+    "novelty_flag",
+    "tier",
+    "expected_loss",
+    "manual_review_cost",
+    "net_utility",
+    "anomaly_score",
+]
+
+
+# ============================================================
+# INPUT
+# ============================================================
+
+
+def read_chunks(
+    path: str, chunk_size: int, skip_rows: int = 0, offset: int | None = None
+) -> Iterator[Tuple[pd.DataFrame, int | None]]:
+    """
+    (DataFrame of up to `chunk_size` rows, input offset after it), starting
+    at byte `offset` of a CSV or else after the first `skip_rows` rows.
+    Parquet has no byte offsets and yields None.
+    """
+
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:  # optional dependency
+            raise RuntimeError("Parquet input needs the optional pyarrow package") from exc
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            if skip_rows >= batch.num_rows:
+                skip_rows -= batch.num_rows
+                continue
+            yield batch.slice(skip_rows).to_pandas(), None
+            skip_rows = 0
+        return
+
+    # Lines are split here and only each chunk is parsed, so the position
+    # of every chunk boundary is known; fields must not contain newlines
+    with open(path, "rb") as f:
+        header = f.readline()
+        if offset is not None:
+            f.seek(offset)
+        else:
+            for _ in range(skip_rows):
+                f.readline()
+
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            yield pd.read_csv(io.BytesIO(header + b"".join(lines))), f.tell()
+
+
+class Preprocessor:
+    """Phase 0 features for one chunk at a time, carrying Time across chunks."""
+
+    def __init__(self, last_time: float | None = None) -> None:
+
+        self.last_time = last_time
+        self.out_of_order = 0
+
+    def transform(self, chunk: pd.DataFrame) -> np.ndarray:
+
+        if "hour" not in chunk.columns or "delta_time" not in chunk.columns:
+            if "Time" not in chunk.columns:
+                raise ValueError("Input needs either Time or hour and delta_time columns")
+
+            t = chunk["Time"].to_numpy(dtype=np.float64)
+            previous = np.empty_like(t)
+            previous[1:] = t[:-1]
+            # The first row of the file has no predecessor: delta 0
+            previous[0] = t[0] if self.last_time is None else self.last_time
+            self.last_time = float(t[-1])
+
+            chunk = chunk.assign(hour=(t / 3600) % 24, delta_time=t - previous)
+            self.out_of_order += int((chunk["delta_time"] < 0).sum())
+
+        missing = [c for c in FEATURE_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Input is missing feature columns: {missing}")
+
+        X = chunk[FEATURE_COLUMNS].to_numpy(dtype=np.float64, copy=True)
+        X[:, FEATURE_COLUMNS.index("Amount")] = np.log1p(X[:, FEATURE_COLUMNS.index("Amount")])
+
+        return X
+
+
+# ============================================================
+# WORKERS
+# ============================================================
+
+_engine: DecisionEngine | None = None
+
+
+def _init_worker(engine_kwargs: dict) -> None:
+
+    global _engine
+    _engine = DecisionEngine(**engine_kwargs)
+
+
+def _score_chunk(start_row: int, X: np.ndarray, keep: pd.DataFrame | None, include: bool) -> bytes:
+    """CSV text (no header) for one chunk, rows numbered from `start_row`."""
+
+    scores = _engine.score_batch(X, include)
+
+    frame = pd.DataFrame({"row": np.arange(start_row, start_row + len(X))})
+    for column in OUTPUT_COLUMNS[1:]:
+        frame[column] = scores[column]
+    if keep is not None:
+        for column in keep.columns:
+            frame[column] = keep[column].to_numpy()
+
+    buffer = io.StringIO()
+    frame.to_csv(buffer, header=False, index=False)
+
+    return buffer.getvalue().encode()
+
+
+# ============================================================
+# CHECKPOINTS
+# ============================================================
+
+
+def _progress_path(output: str) -> str:
+
+    return output + ".progress.json"
+
+
+def load_progress(output: str, input_path: str) -> dict | None:
+
+    try:
+        with open(_progress_path(output)) as f:
+            progress = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if progress["input"] != os.path.abspath(input_path):
+        raise ValueError(f"{output} was written from {progress['input']}, not {input_path}")
+
+    return progress
+
+
+def save_progress(output: str, progress: dict) -> None:
+
+    path = _progress_path(output)
+    with open(path + ".tmp", "w") as f:
+        json.dump(progress, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+# ============================================================
+# DRIVER
+# ============================================================
+
+
+def score_file(
+    input_path: str,
+    output: str,
+    engine_kwargs: dict,
+    workers: int,
+    chunk_size: int,
+    keep_columns: List[str],
+    include_anomaly_score: bool,
+    resume: bool,
+) -> Tuple[int, float]:
+    """Score `input_path` into `output`; returns (rows scored this run, seconds)."""
+
+    progress = load_progress(output, input_path) if resume else None
+    if progress is None:
+        progress = {
+            "input": os.path.abspath(input_path),
+            "rows": 0,
+            "bytes": 0,
+            "offset": None,
+            "last_time": None,
+        }
+        with open(output, "wb") as f:
+            f.write((",".join(OUTPUT_COLUMNS + keep_columns) + "\n").encode())
+            progress["bytes"] = f.tell()
+        save_progress(output, progress)
+    else:
+        print(f"[bulk_score] Resuming after row {progress['rows']}")
+
+    preprocessor = Preprocessor(progress["last_time"])
+    start_rows = progress["rows"]
+
+    out = open(output, "r+b")
+    # Drop anything a crash wrote past the last checkpoint
+    out.truncate(progress["bytes"])
+    out.seek(progress["bytes"])
+
+    started = time.perf_counter()
+    last_report = started
+
+    def commit(future, n_rows: int, offset: int | None, last_time: float | None) -> None:
+        nonlocal last_report
+        out.write(future.result())
+        out.flush()
+        os.fsync(out.fileno())
+        progress["rows"] += n_rows
+        progress["bytes"] = out.tell()
+        progress["offset"] = offset
+        progress["last_time"] = last_time
+        save_progress(output, progress)
+
+        now = time.perf_counter()
+        if now - last_report >= 5.0:
+            done = progress["rows"] - start_rows
+            print(f"[bulk_score] {progress['rows']} rows, {done / (now - started):,.0f} rows/s")
+            last_report = now
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(engine_kwargs,)
+        ) as pool:
+            pending: deque = deque()
+            next_row = start_rows
+
+            chunks = read_chunks(
+                input_path, chunk_size, skip_rows=start_rows, offset=progress.get("offset")
+            )
+            for chunk, offset in chunks:
+                X = preprocessor.transform(chunk)
+                keep = chunk[keep_columns].reset_index(drop=True) if keep_columns else None
+                future = pool.submit(_score_chunk, next_row, X, keep, include_anomaly_score)
+                pending.append((future, len(X), offset, preprocessor.last_time))
+                next_row += len(X)
+
+                # Bounded in-flight work keeps memory flat; results are
+                # committed strictly in input order
+                while len(pending) >= 2 * workers:
+                    commit(*pending.popleft())
+
+            while pending:
+                commit(*pending.popleft())
+    finally:
+        out.close()
+
+    if preprocessor.out_of_order:
+        print(f"[bulk_score] Warning: {preprocessor.out_of_order} rows go back in Time; input is not sorted")
+
+    return progress["rows"] - start_rows, time.perf_counter() - started
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file out of core")
+    parser.add_argument("input", help="Raw (Time, V1..V28, Amount) or cleaned CSV/Parquet")
+    parser.add_argument("output", help="CSV of decisions, in input order")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--keep", nargs="+", default=[], help="Input columns copied to the output")
+    parser.add_argument("--include-anomaly-score", action="store_true")
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    parser.add_argument("--mode", choices=ENGINE_MODES, default="sklearn")
+    parser.add_argument("--cascade", action="store_true")
+    parser.add_argument("--early-exit", choices=EARLY_EXIT_RULES, default=None)
+    parser.add_argument("--threads-per-worker", type=int, default=DEFAULT_THREADS_PER_WORKER)
+    args = parser.parse_args(argv)
+
+    # Run as a module this was already done before the imports; for callers
+    # of main() it still covers spawned workers
+    pin_threads(args.threads_per_worker)
+
+    engine_kwargs = {
+        "mode": args.mode,
+        "cascade": args.cascade,
+        "early_exit": args.early_exit,
+        "booster_threads": args.threads_per_worker,
+        "metrics": False,
+    }
+
+    rows, seconds = score_file(
+        args.input,
+        args.output,
+        engine_kwargs,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        keep_columns=args.keep,
+        include_anomaly_score=args.include_anomaly_score,
+        resume=args.resume,
+    )
+
+    print(f"[bulk_score] Scored {rows} rows in {seconds:.1f}s ({rows / seconds if seconds else 0:,.0f} rows/s)")
+    print(f"[bulk_score] Output: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
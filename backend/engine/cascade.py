@@ -0,0 +1,111 @@
+"""
+Replay comparison of cascade scoring against full ensemble evaluation.
+
+Scores the same rows twice, once with the cascade off and once on, and
+reports how often the fast path was taken, how often the routed decision
+changed and what changed into what.
+
+Usage (from the project root):
+
+    python -m backend.engine.cascade --data creditcard_phase0_clean.csv
+    python -m backend.engine.cascade --rows 20000 --margin 0.02 0.05 0.10
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+from backend.engine.decision_engine import ENGINE_MODES, DecisionEngine
+from backend.engine.replay import load_rows, synthetic_rows
+
+
+def compare(engine: DecisionEngine, X: np.ndarray, y: np.ndarray | None = None) -> dict:
+
+    cascade_before = engine.cascade
+
+    engine.cascade = False
+    start = time.perf_counter()
+    full = engine.evaluate_batch(X)
+    full_seconds = time.perf_counter() - start
+
+    engine.cascade = True
+    engine.cascade_stats = {"rows": 0, "fast_path": 0}
+    start = time.perf_counter()
+    fast = engine.evaluate_batch(X)
+    cascade_seconds = time.perf_counter() - start
+
+    engine.cascade = cascade_before
+
+    changes = Counter(
+        (a["decision"], b["decision"])
+        for a, b in zip(full, fast)
+        if a["decision"] != b["decision"]
+    )
+
+    report = {
+        "rows": len(X),
+        "margin": engine.cascade_margin,
+        "fast_path_rate": engine.cascade_report()["fast_path_rate"],
+        "changed": sum(changes.values()),
+        "changed_rate": sum(changes.values()) / len(X) if len(X) else 0.0,
+        "changes": {f"{a} -> {b}": n for (a, b), n in changes.most_common()},
+        "full_seconds": full_seconds,
+        "cascade_seconds": cascade_seconds,
+    }
+
+    if y is not None:
+        # Frauds the full engine stopped or reviewed but the cascade approved
+        report["fraud_newly_approved"] = int(
+            sum(
+                1
+                for a, b, label in zip(full, fast, y)
+                if label == 1 and a["decision"] != "APPROVE" and b["decision"] == "APPROVE"
+            )
+        )
+
+    return report
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Cascade vs full evaluation replay")
+    parser.add_argument("--data", default=None, help="Model-ready .npy or cleaned .csv")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--margin", type=float, nargs="+", default=[0.05])
+    parser.add_argument("--mode", choices=ENGINE_MODES, default="sklearn")
+    args = parser.parse_args(argv)
+
+    if args.data is None:
+        X, y = synthetic_rows(args.rows), None
+    else:
+        X, y = load_rows(args.data, limit=args.rows)
+
+    engine = DecisionEngine(mode=args.mode)
+
+    for margin in args.margin:
+        engine.cascade_margin = margin
+        report = compare(engine, X, y)
+
+        print(f"\n===== CASCADE REPLAY (margin={margin}) =====")
+        print(f"Rows:              {report['rows']}")
+        print(f"Fast path rate:    {report['fast_path_rate']:.4f}")
+        print(f"Decisions changed: {report['changed']} ({report['changed_rate']:.4%})")
+        for change, n in report["changes"].items():
+            print(f"  {change:<36} {n}")
+        if "fraud_newly_approved" in report:
+            print(f"Fraud newly approved: {report['fraud_newly_approved']}")
+        print(
+            f"Full: {report['full_seconds']:.3f}s  "
+            f"Cascade: {report['cascade_seconds']:.3f}s  "
+            f"Speedup: {report['full_seconds'] / report['cascade_seconds']:.2f}x"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,441 @@
+"""
+Flat-array compilation of the calibrated XGBoost ensemble.
+
+`phase2_uncertainty.py` saves a list of `CalibratedClassifierCV(cv=3)`
+wrappers, so one prediction walks 15 boosters and 15 isotonic regressors
+through sklearn's Python dispatch. This module flattens every tree of every
+fold into contiguous node arrays and every isotonic calibrator into
+breakpoint arrays, then evaluates them with vectorized traversal and one
+`IsotonicTable` calibration pass.
+
+Usage (from the project root):
+
+    python -m backend.engine.compiled_ensemble export
+    python -m backend.engine.compiled_ensemble verify
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, List
+
+import numpy as np
+
+from backend.engine.isotonic_table import IsotonicTable
+from backend.engine.provenance import npz_fields, read_npz_source, source_record
+from backend.engine.replay import load_rows, synthetic_rows
+
+# Rows traversed per pass; bounds the (rows × trees) index matrix in memory
+ROW_CHUNK = 256
+
+FORMAT_VERSION = 1
+
+
+def _base_margin(learner: dict) -> float:
+
+    # XGBoost >= 2 stores base_score as "[3.3E-2]"; older versions as "0.033"
+    raw = learner["learner_model_param"]["base_score"]
+    base_score = float(raw.strip("[]").split(",")[0])
+
+    objective = learner["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"Unsupported XGBoost objective: {objective}")
+
+    return float(np.log(base_score / (1.0 - base_score)))
+
+
+class CompiledEnsemble:
+    """
+    Calibrated bootstrap ensemble as flat NumPy arrays.
+
+    Node arrays hold every tree of every booster back to back, renumbered so
+    that a right child always follows its left sibling: the next node is
+    `left[node] + go_right`. Leaves point to themselves behind a +inf
+    threshold, so traversal runs a fixed `max_depth` steps for all trees at
+    once. Boosters are grouped into members (one per CV fold); member
+    probability is the mean of its calibrated folds, as in
+    `CalibratedClassifierCV.predict_proba`.
+    """
+
+    ARRAY_FIELDS = (
+        "feature",
+        "threshold",
+        "left",
+        "default_left",
+        "value",
+        "tree_roots",
+        "booster_offsets",
+        "base_margin",
+        "member_offsets",
+        "iso_x",
+        "iso_y",
+        "iso_offsets",
+    )
+
+    def __init__(self, arrays: dict, max_depth: int, n_features: int) -> None:
+
+        for name in self.ARRAY_FIELDS:
+            setattr(self, name, arrays[name])
+
+        # Index arrays in the platform's native index type avoid a cast per
+        # gather; asarray keeps memory-mapped arrays that already are intp
+        self.feature = np.asarray(self.feature, dtype=np.intp)
+        self.left = np.asarray(self.left, dtype=np.intp)
+        self.tree_roots = np.asarray(self.tree_roots, dtype=np.intp)
+
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+
+        # Set by export and load: the pickle this was compiled from
+        self.source: dict | None = None
+
+        self.n_members = len(self.member_offsets) - 1
+        self.n_boosters = len(self.booster_offsets) - 1
+
+        # Number of folds per member, for the fold mean
+        self._folds_per_member = np.diff(self.member_offsets).astype(np.float64)
+
+        self.calibration = IsotonicTable.from_flat(self.iso_x, self.iso_y, self.iso_offsets)
+
+    # ============================================================
+    # COMPILATION
+    # ============================================================
+
+    @classmethod
+    def from_models(cls, models: List[Any]) -> "CompiledEnsemble":
+
+        feature, threshold, left = [], [], []
+        default_left, value = [], []
+        tree_roots, booster_offsets, base_margin = [], [0], []
+        member_offsets = [0]
+        iso_x, iso_y, iso_offsets = [], [], [0]
+
+        n_nodes = 0
+        n_trees = 0
+        max_depth = 0
+        n_features = None
+
+        for member in models:
+            for calibrated in member.calibrated_classifiers_:
+
+                if calibrated.method != "isotonic":
+                    raise ValueError(f"Unsupported calibration: {calibrated.method}")
+
+                booster = calibrated.estimator.get_booster()
+                learner = json.loads(booster.save_raw("json"))["learner"]
+                n_features = int(learner["learner_model_param"]["num_feature"])
+
+                for tree in learner["gradient_booster"]["model"]["trees"]:
+
+                    nodes, depth = cls._flatten_tree(tree)
+
+                    feature.append(nodes["feature"])
+                    threshold.append(nodes["threshold"])
+                    left.append(nodes["left"] + n_nodes)
+                    default_left.append(nodes["default_left"])
+                    value.append(nodes["value"])
+
+                    tree_roots.append(n_nodes)
+                    max_depth = max(max_depth, depth)
+                    n_nodes += len(nodes["left"])
+                    n_trees += 1
+
+                booster_offsets.append(n_trees)
+                base_margin.append(_base_margin(learner))
+
+                iso = calibrated.calibrators[0]
+                iso_x.append(np.asarray(iso.X_thresholds_, dtype=np.float64))
+                iso_y.append(np.asarray(iso.y_thresholds_, dtype=np.float64))
+                iso_offsets.append(iso_offsets[-1] + len(iso.X_thresholds_))
+
+            member_offsets.append(len(base_margin))
+
+        arrays = {
+            "feature": np.concatenate(feature),
+            "threshold": np.concatenate(threshold),
+            "left": np.concatenate(left),
+            "default_left": np.concatenate(default_left),
+            "value": np.concatenate(value),
+            "tree_roots": np.asarray(tree_roots, dtype=np.int32),
+            "booster_offsets": np.asarray(booster_offsets, dtype=np.int64),
+            "base_margin": np.asarray(base_margin, dtype=np.float64),
+            "member_offsets": np.asarray(member_offsets, dtype=np.int64),
+            "iso_x": np.concatenate(iso_x),
+            "iso_y": np.concatenate(iso_y),
+            "iso_offsets": np.asarray(iso_offsets, dtype=np.int64),
+        }
+
+        return cls(arrays, max_depth=max_depth, n_features=n_features)
+
+    @staticmethod
+    def _flatten_tree(tree: dict) -> tuple[dict, int]:
+
+        if any(tree["split_type"]):
+            raise ValueError("Categorical splits are not supported")
+
+        lc = tree["left_children"]
+        rc = tree["right_children"]
+
+        # Breadth-first renumbering: children of a node get consecutive ids
+        order = [0]
+        depth = [0]
+        new_left = []
+        for i, old in enumerate(order):
+            if lc[old] == -1:
+                new_left.append(i)
+            else:
+                new_left.append(len(order))
+                order += [lc[old], rc[old]]
+                depth += [depth[i] + 1, depth[i] + 1]
+
+        order = np.asarray(order)
+        is_leaf = np.asarray(lc)[order] == -1
+        # Leaf weights live in split_conditions for leaf nodes
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)[order]
+
+        nodes = {
+            "feature": np.where(is_leaf, 0, np.asarray(tree["split_indices"])[order]).astype(np.int32),
+            "threshold": np.where(is_leaf, np.inf, conditions).astype(np.float32),
+            "left": np.asarray(new_left, dtype=np.int32),
+            # NaN at a leaf must stay put as well
+            "default_left": np.where(is_leaf, True, np.asarray(tree["default_left"], dtype=bool)[order]),
+            "value": np.where(is_leaf, conditions, 0.0).astype(np.float32),
+        }
+
+        return nodes, max(depth)
+
+    def member(self, index: int) -> "CompiledEnsemble":
+        """
+        A single-member ensemble over this one's node arrays.
+
+        Only the member's tree roots are kept; node indices stay global, so
+        the (possibly memory-mapped) node arrays are shared, not copied.
+        """
+
+        b0, b1 = self.member_offsets[index], self.member_offsets[index + 1]
+        t0, t1 = self.booster_offsets[b0], self.booster_offsets[b1]
+        i0, i1 = self.iso_offsets[b0], self.iso_offsets[b1]
+
+        arrays = {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "default_left": self.default_left,
+            "value": self.value,
+            "tree_roots": self.tree_roots[t0:t1],
+            "booster_offsets": self.booster_offsets[b0:b1 + 1] - t0,
+            "base_margin": self.base_margin[b0:b1].copy(),
+            "member_offsets": np.array([0, b1 - b0], dtype=np.int64),
+            "iso_x": self.iso_x[i0:i1].copy(),
+            "iso_y": self.iso_y[i0:i1].copy(),
+            "iso_offsets": self.iso_offsets[b0:b1 + 1] - i0,
+        }
+
+        return CompiledEnsemble(arrays, max_depth=self.max_depth, n_features=self.n_features)
+
+    # ============================================================
+    # PERSISTENCE
+    # ============================================================
+
+    def save(self, path: str) -> None:
+
+        np.savez(
+            path,
+            format_version=np.int64(FORMAT_VERSION),
+            max_depth=np.int64(self.max_depth),
+            n_features=np.int64(self.n_features),
+            **npz_fields(self.source),
+            **{name: getattr(self, name) for name in self.ARRAY_FIELDS},
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledEnsemble":
+
+        with np.load(path) as data:
+            version = int(data["format_version"])
+            if version != FORMAT_VERSION:
+                raise ValueError(
+                    f"Compiled ensemble format {version} is not supported "
+                    f"(expected {FORMAT_VERSION}); re-run the export step."
+                )
+            arrays = {name: data[name] for name in cls.ARRAY_FIELDS}
+            max_depth = int(data["max_depth"])
+            n_features = int(data["n_features"])
+            source = read_npz_source(data)
+
+        compiled = cls(arrays, max_depth=max_depth, n_features=n_features)
+        compiled.source = source
+
+        return compiled
+
+    # ============================================================
+    # EVALUATION
+    # ============================================================
+
+    def booster_margins(self, X) -> np.ndarray:
+        """Raw margin of every booster, shape (n_rows, n_boosters), float32."""
+
+        # XGBoost compares features as float32
+        X32 = np.array(X, dtype=np.float32, ndmin=2)
+        # +inf would step past the +inf threshold that pins leaves in place;
+        # float32 max compares the same against every real split.
+        np.minimum(X32, np.finfo(np.float32).max, out=X32)
+        has_nan = bool(np.isnan(X32).any())
+
+        n_rows, n_features = X32.shape
+        margins = np.empty((n_rows, self.n_boosters), dtype=np.float32)
+        base = self.base_margin.astype(np.float32)
+
+        for start in range(0, n_rows, ROW_CHUNK):
+            rows = X32[start:start + ROW_CHUNK]
+            flat = rows.ravel()
+            row_base = (np.arange(len(rows)) * n_features)[:, None]
+            node = np.broadcast_to(self.tree_roots, (len(rows), len(self.tree_roots)))
+
+            for _ in range(self.max_depth):
+                x = flat[row_base + self.feature[node]]
+                go_right = x >= self.threshold[node]
+                if has_nan:
+                    go_right = np.where(np.isnan(x), ~self.default_left[node], go_right)
+                node = self.left[node] + go_right
+
+            leaf = self.value[node]
+
+            # XGBoost adds trees one at a time onto the base margin in
+            # float32; a sequential cumsum reproduces its rounding exactly.
+            for b in range(self.n_boosters):
+                lo, hi = self.booster_offsets[b], self.booster_offsets[b + 1]
+                block = np.empty((len(rows), hi - lo + 1), dtype=np.float32)
+                block[:, 0] = base[b]
+                block[:, 1:] = leaf[:, lo:hi]
+                margins[start:start + ROW_CHUNK, b] = np.cumsum(block, axis=1)[:, -1]
+
+        return margins
+
+    def booster_probs(self, X) -> np.ndarray:
+        """Calibrated probability of every booster, shape (n_rows, n_boosters)."""
+
+        # XGBoost's sigmoid is 1 / (1 + expf(-x)) in float32. glibc's expf is
+        # correctly rounded, which a float64 exp cast to float32 reproduces;
+        # NumPy's float32 exp can be off by one ulp.
+        margins = self.booster_margins(X)
+        exp_neg = np.exp(-margins.astype(np.float64)).astype(np.float32)
+        one = np.float32(1.0)
+        raw = one / (one + exp_neg)
+
+        return self.calibration.transform(raw)
+
+    def member_probs(self, X) -> np.ndarray:
+        """Per-member probability, shape (n_members, n_rows)."""
+
+        folds = self.booster_probs(X)
+        summed = np.add.reduceat(folds, self.member_offsets[:-1], axis=1)
+
+        return (summed / self._folds_per_member).T
+
+
+# ============================================================
+# EXPORT / VERIFY COMMANDS
+# ============================================================
+
+
+def _default_paths() -> tuple[str, str]:
+
+    engine_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.abspath(os.path.join(engine_dir, os.pardir, os.pardir))
+    artifacts_dir = os.path.join(project_root, "artifacts")
+
+    return (
+        os.path.join(artifacts_dir, "xgb_ensemble.pkl"),
+        os.path.join(artifacts_dir, "xgb_ensemble_compiled.npz"),
+    )
+
+
+def export(model_path: str, output_path: str) -> CompiledEnsemble:
+
+    import joblib
+
+    models = joblib.load(model_path)
+    compiled = CompiledEnsemble.from_models(models)
+    compiled.source = source_record(model_path)
+    compiled.save(output_path)
+
+    print(
+        f"[compiled_ensemble] Compiled {compiled.n_members} members, "
+        f"{compiled.n_boosters} boosters, {len(compiled.tree_roots)} trees, "
+        f"{len(compiled.feature)} nodes -> {output_path}"
+    )
+
+    return compiled
+
+
+def verify(
+    model_path: str,
+    compiled_path: str,
+    data_path: str | None,
+    n_rows: int,
+    tolerance: float,
+) -> bool:
+
+    import joblib
+
+    models = joblib.load(model_path)
+    compiled = CompiledEnsemble.load(compiled_path)
+
+    if data_path is None:
+        X = synthetic_rows(n_rows)
+    else:
+        X, _ = load_rows(data_path, limit=n_rows)
+
+    reference = np.vstack([m.predict_proba(X)[:, 1] for m in models])
+    candidate = compiled.member_probs(X)
+
+    checks = {
+        "member_prob": np.abs(reference - candidate).max(),
+        "mean_prob": np.abs(reference.mean(axis=0) - candidate.mean(axis=0)).max(),
+        "std_prob": np.abs(reference.std(axis=0) - candidate.std(axis=0)).max(),
+    }
+
+    ok = True
+    for name, diff in checks.items():
+        status = "OK" if diff <= tolerance else "FAIL"
+        ok = ok and diff <= tolerance
+        print(f"[compiled_ensemble] {name:<12} max |diff| = {diff:.3e}  {status}")
+
+    print(
+        f"[compiled_ensemble] {len(X)} rows, tolerance {tolerance:.1e}: "
+        f"{'equivalent' if ok else 'MISMATCH'}"
+    )
+
+    return ok
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    default_model, default_compiled = _default_paths()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--model", default=default_model)
+    parser.add_argument("--compiled", default=default_compiled)
+    parser.add_argument(
+        "--data",
+        default=None,
+        help="Model-ready .npy or cleaned .csv of rows to verify on (default: synthetic)",
+    )
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export(args.model, args.compiled)
+        return 0
+
+    ok = verify(args.model, args.compiled, args.data, args.rows, args.tolerance)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
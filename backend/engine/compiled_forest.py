@@ -0,0 +1,350 @@
+"""
+Flat-array compilation of the Isolation Forest novelty model.
+
+`IsolationForest.decision_function` validates input, loops over its 200
+trees in Python and dispatches through joblib (`n_jobs=-1` in
+`phase4_outlier.py`), which dominates a one-row call. This module packs all
+trees into contiguous node arrays, precomputes each leaf's path-length
+contribution and scores 1..N rows with vectorized traversal, reproducing
+sklearn's arithmetic exactly.
+
+Usage (from the project root):
+
+    python -m backend.engine.compiled_forest export
+    python -m backend.engine.compiled_forest verify
+"""
+
+import argparse
+import os
+import sys
+from typing import Any, List
+
+import numpy as np
+
+from backend.engine.provenance import npz_fields, read_npz_source, source_record
+from backend.engine.replay import load_rows, synthetic_rows
+
+# Rows traversed per pass; bounds the (rows × trees) index matrix in memory
+ROW_CHUNK = 256
+
+FORMAT_VERSION = 1
+
+
+def _average_path_length(n_samples_leaf: np.ndarray) -> np.ndarray:
+
+    # Same expression as sklearn.ensemble._iforest._average_path_length
+    n = np.asarray(n_samples_leaf, dtype=np.float64)
+    apl = np.zeros(n.shape)
+
+    mask_1 = n <= 1
+    mask_2 = n == 2
+    not_mask = ~np.logical_or(mask_1, mask_2)
+
+    apl[mask_2] = 1.0
+    apl[not_mask] = (
+        2.0 * (np.log(n[not_mask] - 1.0) + np.euler_gamma)
+        - 2.0 * (n[not_mask] - 1.0) / n[not_mask]
+    )
+
+    return apl
+
+
+class CompiledIsolationForest:
+    """
+    Isolation Forest as flat NumPy arrays.
+
+    Leaves point to themselves behind a +inf threshold, so traversal runs a
+    fixed `max_depth` steps for all trees at once. Each leaf stores
+    `depth + c(n_leaf_samples) - 1`, the amount sklearn adds to a row's
+    path length when it lands there. Exposes `decision_function` so the
+    engine can use it in place of the sklearn model.
+    """
+
+    ARRAY_FIELDS = (
+        "feature",
+        "threshold",
+        "left",
+        "right",
+        "missing_left",
+        "path_length",
+        "tree_roots",
+    )
+
+    def __init__(
+        self,
+        arrays: dict,
+        max_depth: int,
+        n_features: int,
+        denominator: float,
+        offset: float,
+    ) -> None:
+
+        for name in self.ARRAY_FIELDS:
+            setattr(self, name, arrays[name])
+
+        # asarray keeps memory-mapped arrays that are already intp
+        self.feature = np.asarray(self.feature, dtype=np.intp)
+        self.left = np.asarray(self.left, dtype=np.intp)
+        self.right = np.asarray(self.right, dtype=np.intp)
+        self.tree_roots = np.asarray(self.tree_roots, dtype=np.intp)
+
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features)
+        self.denominator = float(denominator)
+        self.offset_ = float(offset)
+
+        # Set by export and load: the pickle this was compiled from
+        self.source: dict | None = None
+
+    # ============================================================
+    # COMPILATION
+    # ============================================================
+
+    @classmethod
+    def from_model(cls, model: Any) -> "CompiledIsolationForest":
+
+        n_features = int(model.n_features_in_)
+        subsample = int(model._max_features) != n_features
+
+        feature, threshold, left, right = [], [], [], []
+        missing_left, path_length, tree_roots = [], [], []
+
+        n_nodes = 0
+        max_depth = 0
+
+        for tree, features in zip(model.estimators_, model.estimators_features_):
+            t = tree.tree_
+            lc = t.children_left.astype(np.int64)
+            rc = t.children_right.astype(np.int64)
+            is_leaf = lc == -1
+            local = np.arange(t.node_count)
+
+            node_feature = np.where(is_leaf, 0, t.feature)
+            if subsample:
+                # Trees index into their own feature subset
+                node_feature = np.asarray(features)[node_feature]
+
+            depths = t.compute_node_depths()
+            contribution = depths + _average_path_length(t.n_node_samples) - 1.0
+
+            if hasattr(t, "missing_go_to_left"):
+                goes_left = t.missing_go_to_left.astype(bool)
+            else:
+                goes_left = np.zeros(t.node_count, dtype=bool)
+
+            feature.append(node_feature.astype(np.int32))
+            threshold.append(np.where(is_leaf, np.inf, t.threshold))
+            left.append(np.where(is_leaf, local, lc) + n_nodes)
+            right.append(np.where(is_leaf, local, rc) + n_nodes)
+            # NaN at a leaf must stay put as well
+            missing_left.append(goes_left | is_leaf)
+            path_length.append(np.where(is_leaf, contribution, 0.0))
+
+            tree_roots.append(n_nodes)
+            max_depth = max(max_depth, int(t.max_depth))
+            n_nodes += t.node_count
+
+        arrays = {
+            "feature": np.concatenate(feature),
+            "threshold": np.concatenate(threshold),
+            "left": np.concatenate(left).astype(np.int32),
+            "right": np.concatenate(right).astype(np.int32),
+            "missing_left": np.concatenate(missing_left),
+            "path_length": np.concatenate(path_length),
+            "tree_roots": np.asarray(tree_roots, dtype=np.int32),
+        }
+
+        denominator = len(model.estimators_) * float(
+            _average_path_length(np.array([model._max_samples]))[0]
+        )
+
+        return cls(
+            arrays,
+            max_depth=max_depth,
+            n_features=n_features,
+            denominator=denominator,
+            offset=model.offset_,
+        )
+
+    # ============================================================
+    # PERSISTENCE
+    # ============================================================
+
+    def save(self, path: str) -> None:
+
+        np.savez(
+            path,
+            format_version=np.int64(FORMAT_VERSION),
+            max_depth=np.int64(self.max_depth),
+            n_features=np.int64(self.n_features_in_),
+            denominator=np.float64(self.denominator),
+            offset=np.float64(self.offset_),
+            **npz_fields(self.source),
+            **{name: getattr(self, name) for name in self.ARRAY_FIELDS},
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledIsolationForest":
+
+        with np.load(path) as data:
+            version = int(data["format_version"])
+            if version != FORMAT_VERSION:
+                raise ValueError(
+                    f"Compiled forest format {version} is not supported "
+                    f"(expected {FORMAT_VERSION}); re-run the export step."
+                )
+            arrays = {name: data[name] for name in cls.ARRAY_FIELDS}
+            scalars = {
+                "max_depth": int(data["max_depth"]),
+                "n_features": int(data["n_features"]),
+                "denominator": float(data["denominator"]),
+                "offset": float(data["offset"]),
+            }
+            source = read_npz_source(data)
+
+        compiled = cls(arrays, **scalars)
+        compiled.source = source
+
+        return compiled
+
+    # ============================================================
+    # EVALUATION
+    # ============================================================
+
+    def path_lengths(self, X) -> np.ndarray:
+        """Summed path length over all trees, shape (n_rows,)."""
+
+        # sklearn validates to float32, then compares against float64 thresholds
+        X32 = np.array(X, dtype=np.float32, ndmin=2)
+        has_nan = bool(np.isnan(X32).any())
+
+        n_rows, n_features = X32.shape
+        depths = np.empty(n_rows)
+
+        for start in range(0, n_rows, ROW_CHUNK):
+            rows = X32[start:start + ROW_CHUNK]
+            flat = rows.ravel()
+            row_base = (np.arange(len(rows)) * n_features)[:, None]
+            node = np.broadcast_to(self.tree_roots, (len(rows), len(self.tree_roots)))
+
+            for _ in range(self.max_depth):
+                x = flat[row_base + self.feature[node]]
+                go_left = x <= self.threshold[node]
+                if has_nan:
+                    go_left = np.where(np.isnan(x), self.missing_left[node], go_left)
+                node = np.where(go_left, self.left[node], self.right[node])
+
+            # sklearn accumulates tree by tree; cumsum keeps that order
+            depths[start:start + ROW_CHUNK] = np.cumsum(self.path_length[node], axis=1)[:, -1]
+
+        return depths
+
+    def score_samples(self, X) -> np.ndarray:
+
+        depths = self.path_lengths(X)
+
+        if self.denominator == 0:
+            # A single training sample: sklearn fixes the score at 1
+            return -np.ones_like(depths)
+
+        return -(2 ** (-(depths / self.denominator)))
+
+    def decision_function(self, X) -> np.ndarray:
+
+        return self.score_samples(X) - self.offset_
+
+
+# ============================================================
+# EXPORT / VERIFY COMMANDS
+# ============================================================
+
+
+def _default_paths() -> tuple[str, str]:
+
+    engine_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.abspath(os.path.join(engine_dir, os.pardir, os.pardir))
+    artifacts_dir = os.path.join(project_root, "artifacts")
+
+    return (
+        os.path.join(artifacts_dir, "isolation_forest.pkl"),
+        os.path.join(artifacts_dir, "isolation_forest_compiled.npz"),
+    )
+
+
+def export(model_path: str, output_path: str) -> CompiledIsolationForest:
+
+    import joblib
+
+    compiled = CompiledIsolationForest.from_model(joblib.load(model_path))
+    compiled.source = source_record(model_path)
+    compiled.save(output_path)
+
+    print(
+        f"[compiled_forest] Compiled {len(compiled.tree_roots)} trees, "
+        f"{len(compiled.feature)} nodes -> {output_path}"
+    )
+
+    return compiled
+
+
+def verify(
+    model_path: str,
+    compiled_path: str,
+    data_path: str | None,
+    n_rows: int,
+    tolerance: float,
+) -> bool:
+
+    import joblib
+
+    model = joblib.load(model_path)
+    compiled = CompiledIsolationForest.load(compiled_path)
+
+    if data_path is None:
+        X = synthetic_rows(n_rows)
+    else:
+        X, _ = load_rows(data_path, limit=n_rows)
+
+    reference = model.decision_function(X)
+    candidate = compiled.decision_function(X)
+
+    diff = float(np.abs(reference - candidate).max())
+    identical = bool(np.array_equal(reference, candidate))
+    ok = diff <= tolerance
+
+    print(
+        f"[compiled_forest] {len(X)} rows: max |diff| = {diff:.3e} "
+        f"({'bit-identical' if identical else 'within tolerance' if ok else 'MISMATCH'})"
+    )
+
+    return ok
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    default_model, default_compiled = _default_paths()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--model", default=default_model)
+    parser.add_argument("--compiled", default=default_compiled)
+    parser.add_argument(
+        "--data",
+        default=None,
+        help="Model-ready .npy or cleaned .csv of rows to verify on (default: synthetic)",
+    )
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--tolerance", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export(args.model, args.compiled)
+        return 0
+
+    ok = verify(args.model, args.compiled, args.data, args.rows, args.tolerance)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
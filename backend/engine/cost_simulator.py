@@ -0,0 +1,218 @@
+"""
+Vectorized decision routing and business-cost simulation.
+
+Decisions are small integer codes into a tuple of labels, so routing, cost
+lookup and per-decision totals are array operations (`np.select`,
+fancy indexing, `np.bincount`) rather than a Python loop per row. Two
+routing schemes are covered:
+
+- `route_engine`: the 5-state rules of `DecisionEngine.decide`.
+- `route_grid`: the 3 x 2 risk-zone x uncertainty grid of
+  `phase2_uncertainty.py`.
+
+A `CostConfig` gives each decision a realized cost when the transaction is
+fraud and when it is legitimate. `simulate` returns the total and a
+per-decision breakdown. `expected_cost` is the engine's per-transaction
+estimate for scalars or arrays.
+
+What-if over a saved results file (from the project root):
+
+    python -m backend.engine.cost_simulator phase2_results.csv --t-review 0.1 --u-threshold 0.02
+"""
+
+import argparse
+import sys
+from typing import List
+
+import numpy as np
+
+# The five engine decision states; position is the code
+DECISIONS = ("APPROVE", "STEP_UP_AUTH", "ESCALATE_INVEST", "ABSTAIN", "DECLINE")
+
+# phase2_uncertainty.py labels; code = 2 * risk zone + uncertain
+PHASE2_DECISIONS = (
+    "AUTO_APPROVE",     # low risk, certain
+    "STEP_UP_AUTH",     # low risk, uncertain
+    "MANUAL_REVIEW",    # medium risk, certain
+    "ABSTAIN",          # medium risk, uncertain
+    "AUTO_BLOCK",       # high risk, certain
+    "ESCALATE_INVEST",  # high risk, uncertain
+)
+
+
+# ============================================================
+# ROUTING
+# ============================================================
+
+
+def route_engine(
+    prob: np.ndarray,
+    uncertainty: np.ndarray,
+    novelty_flag: np.ndarray,
+    decline_threshold: float,
+    escalate_threshold: float,
+    auth_threshold: float,
+    uncertainty_thresholds: tuple,
+) -> np.ndarray:
+    """
+    Codes into DECISIONS, same priority order as DecisionEngine.decide.
+
+    `uncertainty_thresholds` is (low, band, high): the uncertainty cut below
+    auth_threshold, between escalate and decline, and above decline.
+    """
+
+    low_u, band_u, high_u = uncertainty_thresholds
+
+    high = prob >= decline_threshold
+    band = ~high & (prob >= escalate_threshold)
+    low = prob < auth_threshold
+
+    conditions = [
+        high & (uncertainty < high_u),
+        high,
+        band & (uncertainty >= band_u),
+        ~low & ~high,
+        low & (uncertainty >= low_u),
+        novelty_flag,
+    ]
+    choices = [4, 2, 2, 1, 3, 2]
+
+    return np.select(conditions, choices, default=0).astype(np.int8)
+
+
+def route_grid(
+    prob: np.ndarray,
+    uncertainty: np.ndarray,
+    review_threshold: float,
+    block_threshold: float,
+    uncertainty_threshold: float,
+) -> np.ndarray:
+    """Codes into PHASE2_DECISIONS."""
+
+    zone = (prob >= review_threshold).astype(np.int8) + (prob >= block_threshold)
+
+    return (2 * zone + (uncertainty >= uncertainty_threshold)).astype(np.int8)
+
+
+def labels(codes: np.ndarray, decisions: tuple = DECISIONS) -> np.ndarray:
+
+    return np.asarray(decisions)[codes]
+
+
+# ============================================================
+# COSTS
+# ============================================================
+
+
+class CostConfig:
+    """Realized cost of each decision for fraud and for legitimate rows."""
+
+    def __init__(self, decisions: tuple, on_fraud: dict, on_legit: dict) -> None:
+
+        unknown = (set(on_fraud) | set(on_legit)) - set(decisions)
+        if unknown:
+            raise ValueError(f"Costs given for unknown decisions: {sorted(unknown)}")
+
+        self.decisions = decisions
+        self.on_fraud = np.array([float(on_fraud.get(d, 0.0)) for d in decisions])
+        self.on_legit = np.array([float(on_legit.get(d, 0.0)) for d in decisions])
+
+
+def phase2_costs(
+    missed_fraud: float = 5000,
+    false_block: float = 200,
+    manual: float = 50,
+    step_up: float = 10,
+    escalate: float = 100,
+) -> CostConfig:
+    """The business-cost table of phase2_uncertainty.py."""
+
+    review = {"MANUAL_REVIEW": manual, "STEP_UP_AUTH": step_up, "ESCALATE_INVEST": escalate, "ABSTAIN": manual}
+
+    return CostConfig(
+        PHASE2_DECISIONS,
+        on_fraud={"AUTO_APPROVE": missed_fraud, **review},
+        on_legit={"AUTO_BLOCK": false_block, **review},
+    )
+
+
+def engine_costs(
+    fraud_cost: float = 1000, review_cost: float = 20, false_positive_cost: float = 50
+) -> CostConfig:
+    """Realized costs matching DecisionEngine's cost config."""
+
+    review = {d: review_cost for d in ("STEP_UP_AUTH", "ESCALATE_INVEST", "ABSTAIN")}
+
+    return CostConfig(
+        DECISIONS,
+        on_fraud={"APPROVE": fraud_cost, **review},
+        on_legit={"DECLINE": false_positive_cost, **review},
+    )
+
+
+def expected_cost(prob, is_review, fraud_cost: float, review_cost: float) -> tuple:
+    """(expected_loss, manual_review_cost, net_utility) for scalars or arrays."""
+
+    expected_loss = prob * fraud_cost
+    manual_cost = float(review_cost) * is_review
+    net_utility = -expected_loss - manual_cost
+
+    return expected_loss, manual_cost, net_utility
+
+
+def simulate(codes: np.ndarray, y: np.ndarray, config: CostConfig) -> dict:
+    """Total and per-decision realized cost of routed rows against labels."""
+
+    codes = np.asarray(codes)
+    fraud = np.asarray(y) == 1
+    n_decisions = len(config.decisions)
+
+    cost = np.where(fraud, config.on_fraud[codes], config.on_legit[codes])
+    counts = np.bincount(codes, minlength=n_decisions)
+    frauds = np.bincount(codes, weights=fraud, minlength=n_decisions)
+    costs = np.bincount(codes, weights=cost, minlength=n_decisions)
+
+    total = float(cost.sum())
+
+    return {
+        "rows": len(codes),
+        "total_cost": total,
+        "cost_per_transaction": total / len(codes) if len(codes) else 0.0,
+        "by_decision": {
+            decision: {"count": int(counts[i]), "fraud": int(frauds[i]), "cost": float(costs[i])}
+            for i, decision in enumerate(config.decisions)
+            if counts[i]
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+
+    print(f"\n{'decision':<16} {'count':>8} {'fraud':>6} {'cost':>12}")
+    for decision, row in report["by_decision"].items():
+        print(f"{decision:<16} {row['count']:>8} {row['fraud']:>6} {row['cost']:>12,.0f}")
+    print(f"\nTotal Cost: {report['total_cost']:,.0f}")
+    print(f"Average Cost per Transaction: {report['cost_per_transaction']:.4f}")
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Re-route saved phase 2 results and cost them")
+    parser.add_argument("results", help="CSV with probability, uncertainty and true_label")
+    parser.add_argument("--t-block", type=float, default=0.8)
+    parser.add_argument("--t-review", type=float, default=0.1164)
+    parser.add_argument("--u-threshold", type=float, default=0.015)
+    args = parser.parse_args(argv)
+
+    data = np.genfromtxt(args.results, delimiter=",", names=True, dtype=None, encoding="utf-8")
+
+    codes = route_grid(
+        data["probability"], data["uncertainty"], args.t_review, args.t_block, args.u_threshold
+    )
+    print_report(simulate(codes, data["true_label"], phase2_costs()))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
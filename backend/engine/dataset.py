@@ -0,0 +1,212 @@
+"""
+Cached, memory-mapped copy of the cleaned dataset for the phase scripts.
+
+The first load parses `creditcard_phase0_clean.csv` once, applies the
+`log1p(Amount)` transform the scripts use, and writes X (float64, all
+columns but Class) and y (int64) as `.npy` files under
+`.dataset_cache/`. Later loads memory-map them in milliseconds.
+
+The manifest records the source's size, mtime and sha256. Unchanged stat
+skips hashing. A touched file is re-hashed and only a changed hash
+triggers a rebuild. Stratified split indices are computed with the same
+`train_test_split(test_size, random_state, stratify=y)` call the scripts
+made and saved next to the arrays, so every script sees the same split.
+
+    python -m backend.engine.dataset build     # or: info
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from backend.engine.replay import LABEL_COLUMN
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SOURCE = os.path.join(PROJECT_ROOT, "creditcard_phase0_clean.csv")
+CACHE_DIR = os.path.join(PROJECT_ROOT, ".dataset_cache")
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def _sha256(path: str) -> str:
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+class Dataset:
+
+    def __init__(self, cache_dir: str, manifest: dict) -> None:
+
+        self.cache_dir = cache_dir
+        self.manifest = manifest
+        self.columns: List[str] = manifest["columns"]
+
+        self.X = np.load(os.path.join(cache_dir, "X.npy"), mmap_mode="r")
+        self.y = np.load(os.path.join(cache_dir, "y.npy"), mmap_mode="r")
+
+    def split(self, test_size: float = 0.2, random_state: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+        """(train, test) row indices; computed once per setting, then loaded."""
+
+        path = os.path.join(self.cache_dir, f"split-{test_size:g}-{random_state}.npz")
+        if os.path.exists(path):
+            saved = np.load(path)
+            return saved["train"], saved["test"]
+
+        from sklearn.model_selection import train_test_split
+
+        train, test = train_test_split(
+            np.arange(len(self.y)),
+            test_size=test_size,
+            random_state=random_state,
+            stratify=self.y,
+        )
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, train=train, test=test)
+        os.replace(tmp, path)
+
+        return train, test
+
+    def frames(self, test_size: float = 0.2, random_state: int = 42) -> tuple:
+        """
+        (X_train, X_test, y_train, y_test) as pandas objects with the
+        original row index, exactly as the scripts' train_test_split gave.
+        """
+
+        import pandas as pd
+
+        train, test = self.split(test_size, random_state)
+
+        def part(idx):
+            X = pd.DataFrame(self.X[idx], columns=self.columns, index=idx)
+            y = pd.Series(self.y[idx], index=idx, name=LABEL_COLUMN)
+            return X, y
+
+        (X_train, y_train), (X_test, y_test) = part(train), part(test)
+
+        return X_train, X_test, y_train, y_test
+
+
+def _current(source: str, cache_dir: str) -> dict | None:
+    """The manifest if the cache matches the source, else None."""
+
+    try:
+        with open(os.path.join(cache_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if manifest.get("format_version") != FORMAT_VERSION:
+        return None
+
+    stat = os.stat(source)
+    if manifest["size"] == stat.st_size and manifest["mtime_ns"] == stat.st_mtime_ns:
+        return manifest
+
+    # Touched or copied: only a content change forces a rebuild
+    if manifest["size"] == stat.st_size and manifest["sha256"] == _sha256(source):
+        manifest["mtime_ns"] = stat.st_mtime_ns
+        _write_manifest(cache_dir, manifest)
+        return manifest
+
+    return None
+
+
+def _write_manifest(cache_dir: str, manifest: dict) -> None:
+
+    path = os.path.join(cache_dir, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def build(source: str = SOURCE, cache_dir: str = CACHE_DIR) -> dict:
+
+    import pandas as pd
+
+    start = time.perf_counter()
+    stat = os.stat(source)
+    sha256 = _sha256(source)
+
+    df = pd.read_csv(source)
+    df["Amount"] = np.log1p(df["Amount"])
+    X = df.drop(columns=[LABEL_COLUMN])
+
+    # Splits and arrays of an older source must not survive
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.makedirs(cache_dir)
+    np.save(os.path.join(cache_dir, "X.npy"), np.ascontiguousarray(X.to_numpy(dtype=np.float64)))
+    np.save(os.path.join(cache_dir, "y.npy"), df[LABEL_COLUMN].to_numpy(dtype=np.int64))
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "source": os.path.abspath(source),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256,
+        "rows": len(df),
+        "columns": list(X.columns),
+    }
+    # Written last: a build interrupted before this point is rebuilt
+    _write_manifest(cache_dir, manifest)
+
+    print(f"[dataset] Cached {len(df)} rows from {source} in {time.perf_counter() - start:.1f}s")
+
+    return manifest
+
+
+def load(source: str = SOURCE, cache_dir: str = CACHE_DIR, rebuild: bool = False) -> Dataset:
+
+    manifest = None if rebuild else _current(source, cache_dir)
+    if manifest is None:
+        manifest = build(source, cache_dir)
+
+    return Dataset(cache_dir, manifest)
+
+
+def load_split(test_size: float = 0.2, random_state: int = 42) -> tuple:
+    """X_train, X_test, y_train, y_test for the phase scripts."""
+
+    return load().frames(test_size, random_state)
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Build or inspect the cached dataset")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--source", default=SOURCE)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build(args.source, args.cache_dir)
+        return 0
+
+    start = time.perf_counter()
+    dataset = load(args.source, args.cache_dir)
+    train, test = dataset.split()
+    elapsed = time.perf_counter() - start
+
+    print(f"Source:  {dataset.manifest['source']} (sha256 {dataset.manifest['sha256'][:12]}…)")
+    print(f"Shape:   X {dataset.X.shape}, y {dataset.y.shape}, fraud {int(dataset.y.sum())}")
+    print(f"Split:   {len(train)} train / {len(test)} test")
+    print(f"Loaded in {elapsed * 1e3:.1f} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,34 @@
+import hashlib
 import os
+import time
 from datetime import datetime
 from typing import Any, List, Tuple
 
 import joblib
 import numpy as np
 
+from backend.engine.compiled_ensemble import CompiledEnsemble
+from backend.engine.compiled_forest import CompiledIsolationForest
+from backend.engine import threshold_optimizer
+from backend.engine.cost_simulator import DECISIONS, expected_cost, labels, route_engine
+from backend.engine.isotonic_table import IsotonicTable
+from backend.engine.metrics import EngineMetrics
+from backend.engine import native_artifacts
+from backend.engine.provenance import stale_reason
+from backend.engine.replay import synthetic_rows
+
+# "sklearn" runs the pickled models; "compiled" runs the flat-array exports
+# from backend/engine/compiled_ensemble.py and compiled_forest.py
+ENGINE_MODES = ("sklearn", "compiled")
+
+# Sequential early-exit rules for the ensemble: "bound" only stops when the
+# remaining members provably cannot change the decision; "confidence" treats
+# the remaining members as draws like the ones seen so far
+EARLY_EXIT_RULES = ("bound", "confidence")
+
+# Decisions that route to a human or an extra customer step
+REVIEW_DECISIONS = ("STEP_UP_AUTH", "ESCALATE_INVEST", "ABSTAIN")
+
 
 class DecisionEngine:
     """
@@ -21,26 +45,168 @@ class DecisionEngine:
         self,
         model_path: str | None = None,
         anomaly_path: str | None = None,
+        mode: str = "sklearn",
+        compiled_path: str | None = None,
+        native_dir: str | None = None,
+        cascade: bool = False,
+        cascade_margin: float = 0.05,
+        early_exit: str | None = None,
+        lazy_anomaly: bool = False,
+        native: bool = True,
+        verify_native: bool = False,
+        booster_threads: int | None = None,
+        metrics: bool = True,
+        thresholds_path: str | None = None,
     ) -> None:
 
+        if mode not in ENGINE_MODES:
+            raise ValueError(f"Unknown engine mode {mode!r}; expected one of {ENGINE_MODES}")
+        if early_exit is not None and early_exit not in EARLY_EXIT_RULES:
+            raise ValueError(
+                f"Unknown early-exit rule {early_exit!r}; expected one of {EARLY_EXIT_RULES}"
+            )
+
         engine_dir = os.path.dirname(os.path.abspath(__file__))
         project_root = os.path.abspath(os.path.join(engine_dir, os.pardir, os.pardir))
         artifacts_dir = os.path.join(project_root, "artifacts")
 
         ensemble_path = model_path or os.path.join(artifacts_dir, "xgb_ensemble.pkl")
         isolation_path = anomaly_path or os.path.join(artifacts_dir, "isolation_forest.pkl")
+        compiled_forest_path = os.path.join(artifacts_dir, "isolation_forest_compiled.npz")
+        explicit_native = native_dir is not None
+        native_dir = native_dir or os.path.join(artifacts_dir, "native")
+        native_manifest = os.path.join(native_dir, native_artifacts.MANIFEST)
+
+        # The memory-mapped export is preferred unless other specific files
+        # were asked for
+        use_native = (
+            mode == "compiled"
+            and native
+            and (model_path is None or explicit_native)
+            and compiled_path is None
+            and os.path.exists(native_manifest)
+        )
+        compiled_path = compiled_path or os.path.join(artifacts_dir, "xgb_ensemble_compiled.npz")
 
         print(f"[DecisionEngine] Project root: {project_root}")
 
-        if not os.path.exists(ensemble_path):
-            raise FileNotFoundError(f"Ensemble not found at {ensemble_path}")
-
-        self.models: List[Any] = joblib.load(ensemble_path)
-        print(f"[DecisionEngine] Loaded ensemble with {len(self.models)} members.")
-
-        if os.path.exists(isolation_path):
+        self.mode = mode
+        self.models: List[Any] = []
+        self.compiled: CompiledEnsemble | None = None
+        self.artifact_paths: List[str] = []
+        native_forest: CompiledIsolationForest | None = None
+
+        # Exports of an older pickle are refused; the pickle is compiled in
+        # memory instead, so a retrained model is never shadowed
+        if use_native:
+            compiled, native_forest = native_artifacts.load(native_dir, verify=verify_native)
+            stale = stale_reason(compiled.source, ensemble_path)
+            if stale is None:
+                self.compiled = compiled
+                self.artifact_paths.append(native_manifest)
+                print(
+                    f"[DecisionEngine] Memory-mapped native ensemble with "
+                    f"{self.compiled.n_members} members."
+                )
+            else:
+                self._warn_stale(native_dir, stale, "native_artifacts")
+                native_forest = None
+
+        if self.compiled is None and mode == "compiled" and os.path.exists(compiled_path):
+            compiled = CompiledEnsemble.load(compiled_path)
+            stale = stale_reason(compiled.source, ensemble_path)
+            if stale is None:
+                self.compiled = compiled
+                self.artifact_paths.append(compiled_path)
+                print(
+                    f"[DecisionEngine] Loaded compiled ensemble with "
+                    f"{self.compiled.n_members} members."
+                )
+            else:
+                self._warn_stale(compiled_path, stale, "compiled_ensemble")
+
+        if self.compiled is None:
+            if not os.path.exists(ensemble_path):
+                raise FileNotFoundError(f"Ensemble not found at {ensemble_path}")
+
+            self.models = joblib.load(ensemble_path)
+            self.artifact_paths.append(ensemble_path)
+            print(f"[DecisionEngine] Loaded ensemble with {len(self.models)} members.")
+
+            # Uncalibrated fold boosters plus one stacked calibration table,
+            # in place of 15 IsotonicRegression.predict calls per request
+            self.fold_estimators = [
+                calibrated.estimator
+                for member in self.models
+                for calibrated in member.calibrated_classifiers_
+            ]
+            self.fold_offsets = np.cumsum(
+                [0] + [len(member.calibrated_classifiers_) for member in self.models]
+            )
+            self.calibration = IsotonicTable.from_models(self.models)
+
+            # XGBoost otherwise uses every core per call, which oversubscribes
+            # the CPU once several requests are scored concurrently
+            if booster_threads is not None:
+                for est in self.fold_estimators:
+                    est.set_params(n_jobs=booster_threads)
+                    est.get_booster().set_param({"nthread": booster_threads})
+            self.member_calibration = [
+                IsotonicTable.from_models([member]) for member in self.models
+            ]
+
+            if mode == "compiled":
+                self.compiled = CompiledEnsemble.from_models(self.models)
+                print(
+                    "[DecisionEngine] Compiled ensemble not found; compiled in memory. "
+                    "Run `python -m backend.engine.compiled_ensemble export` to persist it."
+                )
+
+        if self.compiled is not None:
+            self.compiled_members = [
+                self.compiled.member(m) for m in range(self.compiled.n_members)
+            ]
+            self.n_members = self.compiled.n_members
+        else:
+            self.n_members = len(self.models)
+
+        # Compiled mode swaps in the array evaluator; it exposes the same
+        # decision_function and gives identical scores
+        compiled_forest = None
+        if native_forest is not None and anomaly_path is None:
+            stale = stale_reason(native_forest.source, isolation_path)
+            if stale is None:
+                compiled_forest = native_forest
+                print("[DecisionEngine] Memory-mapped native Isolation Forest.")
+            else:
+                self._warn_stale(native_dir, stale, "native_artifacts")
+        if (
+            compiled_forest is None
+            and mode == "compiled"
+            and anomaly_path is None
+            and os.path.exists(compiled_forest_path)
+        ):
+            loaded = CompiledIsolationForest.load(compiled_forest_path)
+            stale = stale_reason(loaded.source, isolation_path)
+            if stale is None:
+                compiled_forest = loaded
+                self.artifact_paths.append(compiled_forest_path)
+                print("[DecisionEngine] Compiled Isolation Forest loaded.")
+            else:
+                self._warn_stale(compiled_forest_path, stale, "compiled_forest")
+
+        if compiled_forest is not None:
+            self.anomaly_model = compiled_forest
+        elif os.path.exists(isolation_path):
             self.anomaly_model = joblib.load(isolation_path)
+            self.artifact_paths.append(isolation_path)
+            # Trained with n_jobs=-1: a joblib pool per call costs more than
+            # it saves at serving batch sizes and competes with the boosters
+            self.anomaly_model.set_params(n_jobs=1)
             print("[DecisionEngine] Isolation Forest loaded.")
+            if mode == "compiled":
+                self.anomaly_model = CompiledIsolationForest.from_model(self.anomaly_model)
+                print("[DecisionEngine] Isolation Forest compiled in memory.")
         else:
             self.anomaly_model = None
             print("[DecisionEngine] Isolation Forest not found. Novelty disabled.")
@@ -53,32 +219,312 @@ class DecisionEngine:
         # Uncertainty threshold
         self.uncertainty_threshold = 0.02
 
+        # Per risk zone: below auth, escalate..decline, at or above decline
+        self.low_uncertainty_threshold = self.uncertainty_threshold
+        self.band_uncertainty_threshold = self.uncertainty_threshold
+        self.high_uncertainty_threshold = self.uncertainty_threshold
+
+        # Tuned thresholds from backend/engine/threshold_optimizer.py
+        if thresholds_path is not None:
+            self.load_thresholds(thresholds_path)
+            self.artifact_paths.append(thresholds_path)
+            print(f"[DecisionEngine] Thresholds loaded from {thresholds_path}.")
+
+        # Changes whenever a different artifact file is loaded; result
+        # caches key on it
+        self.model_version = "xgb_ensemble_v2"
+        self.model_fingerprint = self._fingerprint()
+
         # Anomaly threshold
         self.anomaly_threshold = -0.08
 
+        # Novelty only changes the outcome of rows the ensemble would
+        # APPROVE. When lazy, the Isolation Forest is scored for those rows
+        # only unless the caller asks for the anomaly score; off by default
+        # because other rows then report anomaly_score as null
+        self.lazy_anomaly = lazy_anomaly
+        self.anomaly_stats = {"evaluated": 0, "skipped": 0}
+
         # Cost config
         self.fraud_cost = 1000
         self.review_cost = 20
         self.false_positive_cost = 50
 
+        # Cascade: one member screens every row and the full ensemble only
+        # runs when its score lies within cascade_margin of a risk
+        # threshold. Fast-path rows have no uncertainty estimate, so they are
+        # routed as certain; decisions can differ from full scoring (see
+        # backend/engine/cascade.py)
+        self.cascade = cascade
+        self.cascade_member = 0
+        self.cascade_margin = cascade_margin
+        self.cascade_stats = {"rows": 0, "fast_path": 0}
+
+        # Early exit: members are evaluated one at a time and a row stops as
+        # soon as the rest of the ensemble cannot move it across a threshold
+        self.early_exit = early_exit
+        self.early_exit_min_members = 2
+        self.early_exit_z = 3.0
+        self.early_exit_stats = {"rows": 0, "members": 0}
+
+        # Per-stage timings and decision counters, rendered at /metrics
+        self.metrics = EngineMetrics(enabled=metrics)
+
+    @staticmethod
+    def _warn_stale(path: str, reason: str, module: str) -> None:
+
+        print(
+            f"[DecisionEngine] WARNING: ignoring stale export {path}: {reason}. "
+            f"Re-run `python -m backend.engine.{module} export`."
+        )
+
+    def _fingerprint(self) -> str:
+
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(f"{self.model_version}:{self.mode}".encode())
+        for path in self.artifact_paths:
+            stat = os.stat(path)
+            digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+        return f"{self.model_version}:{digest.hexdigest()}"
+
+    def warmup(self, n_rows: int = 64) -> float:
+        """
+        Score a synthetic batch and a single row so first requests do not pay
+        for page faults and lazy initialisation. Stats are left untouched.
+        Returns the elapsed seconds.
+        """
+
+        saved = (
+            dict(self.cascade_stats),
+            dict(self.early_exit_stats),
+            dict(self.anomaly_stats),
+        )
+        metrics_enabled, self.metrics.enabled = self.metrics.enabled, False
+
+        start = time.perf_counter()
+        X = synthetic_rows(n_rows)
+        self.evaluate_batch(X, include_anomaly_score=True)
+        self.evaluate_transaction(X[:1], include_anomaly_score=True)
+        elapsed = time.perf_counter() - start
+
+        self.cascade_stats, self.early_exit_stats, self.anomaly_stats = saved
+        self.metrics.enabled = metrics_enabled
+
+        return elapsed
+
     # ============================================================
     # ENSEMBLE PREDICTION
     # ============================================================
 
     def predict_proba(self, X) -> Tuple[float, float]:
 
-        probs = []
-        for model in self.models:
-            prob = model.predict_proba(X)[:, 1]
-            probs.append(prob)
+        mean_prob, std_prob = self.predict_proba_batch(X)
+
+        return float(mean_prob[0]), float(std_prob[0])
+
+    def predict_proba_batch(self, X) -> Tuple[np.ndarray, np.ndarray]:
+
+        mean_prob, std_prob, _ = self.ensemble_scores(X)
+
+        return mean_prob, std_prob
+
+    def ensemble_scores(self, X) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(mean, std, members_evaluated) per row."""
+
+        if self.early_exit is not None:
+            return self.predict_proba_sequential(X)
+
+        mean_prob, std_prob = self._predict_proba_all(X)
+
+        return mean_prob, std_prob, np.full(len(mean_prob), self.n_members)
+
+    def _predict_proba_all(self, X) -> Tuple[np.ndarray, np.ndarray]:
+
+        # Shape (n_members, n_rows): one column per transaction
+        if self.compiled is not None:
+            probs_arr = self.compiled.member_probs(X)
+        else:
+            raw = np.column_stack(
+                [est.predict_proba(X)[:, 1] for est in self.fold_estimators]
+            )
+            folds = self.calibration.transform(raw)
 
-        probs_arr = np.vstack(probs)
+            # CalibratedClassifierCV averages its calibrated folds
+            probs_arr = (
+                np.add.reduceat(folds, self.fold_offsets[:-1], axis=1)
+                / np.diff(self.fold_offsets)
+            ).T
 
-        mean_prob = float(np.mean(probs_arr))
-        std_prob = float(np.std(probs_arr))
+        mean_prob = probs_arr.mean(axis=0)
+        std_prob = probs_arr.std(axis=0)
 
         return mean_prob, std_prob
 
+    def member_proba(self, X, index: int) -> np.ndarray:
+
+        if self.compiled is not None:
+            return self.compiled_members[index].member_probs(X)[0]
+
+        lo, hi = self.fold_offsets[index], self.fold_offsets[index + 1]
+        raw = np.column_stack(
+            [est.predict_proba(X)[:, 1] for est in self.fold_estimators[lo:hi]]
+        )
+
+        return self.member_calibration[index].transform(raw).mean(axis=1)
+
+    # ============================================================
+    # SEQUENTIAL EARLY EXIT
+    # ============================================================
+
+    def predict_proba_sequential(self, X) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Evaluate members one at a time, only on rows still undecided.
+
+        Returns (mean, std, members_evaluated). Rows that exit early report
+        the mean and std of the members they saw.
+        """
+
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        n = self.n_members
+        total = np.zeros(len(X))
+        total_sq = np.zeros(len(X))
+        counts = np.zeros(len(X), dtype=np.int64)
+        active = np.arange(len(X))
+
+        for k in range(1, n + 1):
+            prob = self.member_proba(X[active], k - 1)
+            total[active] += prob
+            total_sq[active] += prob * prob
+            counts[active] = k
+
+            if k == n:
+                break
+            if k >= self.early_exit_min_members:
+                done = self._early_exit_settled(total[active], total_sq[active], k)
+                active = active[~done]
+                if len(active) == 0:
+                    break
+
+        mean_prob = total / counts
+        var = np.maximum(total_sq / counts - mean_prob**2, 0.0)
+
+        self.metrics.increment(self.early_exit_stats, rows=len(X), members=int(counts.sum()))
+
+        return mean_prob, np.sqrt(var), counts
+
+    def _early_exit_settled(self, total: np.ndarray, total_sq: np.ndarray, k: int) -> np.ndarray:
+
+        n = self.n_members
+        rest = n - k
+
+        # Provable box: the remaining members each lie in [0, 1].
+        # Mean: all-zero to all-one. Std: lowest when the rest equal the
+        # running mean; highest at an extreme point, i.e. j ones and the
+        # rest zeros for some j.
+        mean_lo = total / n
+        mean_hi = (total + rest) / n
+
+        var_k = np.maximum(total_sq / k - (total / k) ** 2, 0.0)
+        std_lo = np.sqrt(var_k * k / n)
+
+        ones = np.arange(rest + 1)[:, None]
+        var_hi = ((total_sq + ones) / n - ((total + ones) / n) ** 2).max(axis=0)
+        std_hi = np.sqrt(np.maximum(var_hi, 0.0))
+
+        if self.early_exit == "confidence" and k >= 2:
+            # Remaining members as draws from the same spread as those seen
+            mean_k = total / k
+            s = np.sqrt(var_k * k / (k - 1))
+            z = self.early_exit_z
+
+            half = z * s * (rest / n) * np.sqrt(1.0 / rest + 1.0 / k)
+            mean_lo = np.maximum(mean_lo, mean_k - half)
+            mean_hi = np.minimum(mean_hi, mean_k + half)
+
+            spread = z / np.sqrt(2.0 * (k - 1))
+            std_lo = np.maximum(std_lo, s * max(0.0, 1.0 - spread))
+            std_hi = np.minimum(std_hi, s * (1.0 + spread))
+
+        # Routing regions are rectangles on the (prob, uncertainty) grid, so
+        # the decision is fixed on the box iff all four corners agree.
+        # Novelty only relabels APPROVE, so it cannot break agreement.
+        no_novelty = np.zeros(len(total), dtype=bool)
+        corners = [
+            self.decide_batch(p, u, no_novelty)
+            for p in (mean_lo, mean_hi)
+            for u in (std_lo, std_hi)
+        ]
+
+        return (
+            (corners[0] == corners[1])
+            & (corners[0] == corners[2])
+            & (corners[0] == corners[3])
+        )
+
+    def early_exit_report(self) -> dict:
+
+        rows = self.early_exit_stats["rows"]
+        members = self.early_exit_stats["members"]
+
+        return {
+            "rule": self.early_exit,
+            "rows": rows,
+            "members_per_row": members / rows if rows else 0.0,
+            "ensemble_size": self.n_members,
+        }
+
+    # ============================================================
+    # CASCADE
+    # ============================================================
+
+    def cascade_ambiguous(self, stage_one: np.ndarray) -> np.ndarray:
+
+        thresholds = np.array(
+            [self.auth_threshold, self.escalate_threshold, self.decline_threshold]
+        )
+        distance = np.abs(stage_one[:, None] - thresholds[None, :]).min(axis=1)
+
+        return distance <= self.cascade_margin
+
+    def cascade_scores(self, X):
+        """
+        Two-stage scoring for an (N, n_features) matrix.
+
+        Rows whose single-member score is clear of every threshold take the
+        fast path: that score is the risk and the uncertainty is unknown
+        (NaN). The rest get the full ensemble. Returns (prob, uncertainty,
+        members_evaluated, full_mask).
+        """
+
+        prob = self.member_proba(X, self.cascade_member)
+        uncertainty = np.full(len(X), np.nan)
+        members = np.ones(len(X), dtype=np.int64)
+
+        full = self.cascade_ambiguous(prob)
+        if full.any():
+            prob[full], uncertainty[full], members[full] = self.ensemble_scores(X[full])
+
+        self.metrics.increment(self.cascade_stats, rows=len(X), fast_path=int(len(X) - full.sum()))
+
+        return prob, uncertainty, members, full
+
+    def cascade_report(self) -> dict:
+
+        rows = self.cascade_stats["rows"]
+        fast = self.cascade_stats["fast_path"]
+
+        return {
+            "enabled": self.cascade,
+            "margin": self.cascade_margin,
+            "rows": rows,
+            "fast_path": fast,
+            "fast_path_rate": fast / rows if rows else 0.0,
+        }
+
     # ============================================================
     # ANOMALY DETECTION
     # ============================================================
@@ -93,18 +539,111 @@ class DecisionEngine:
 
         return score, novelty_flag
 
+    def anomaly_score_batch(self, X) -> Tuple[np.ndarray | None, np.ndarray]:
+
+        if self.anomaly_model is None:
+            return None, np.zeros(len(X), dtype=bool)
+
+        scores = self.anomaly_model.decision_function(X)
+        novelty_flags = scores < self.anomaly_threshold
+
+        return scores, novelty_flags
+
+    def novelty_batch(
+        self,
+        X: np.ndarray,
+        prob: np.ndarray,
+        uncertainty: np.ndarray,
+        include_anomaly_score: bool | np.ndarray = False,
+    ) -> Tuple[np.ndarray | None, np.ndarray]:
+        """
+        Anomaly scores and novelty flags, scoring only the rows that need it.
+
+        With lazy scoring, rows are scored for routing only if the ensemble
+        alone would APPROVE them. Requested scores (a flag, or a per-row
+        mask) are filled in without affecting routing. Unscored rows are NaN.
+        """
+
+        novelty_flags = np.zeros(len(X), dtype=bool)
+        if self.anomaly_model is None:
+            return None, novelty_flags
+
+        routed = np.ones(len(X), dtype=bool)
+        if self.lazy_anomaly:
+            base = self.decide_batch(prob, uncertainty, novelty_flags)
+            routed = routed & (base == "APPROVE")
+
+        needed = routed | include_anomaly_score
+        scores = np.full(len(X), np.nan)
+        if needed.any():
+            scores[needed], _ = self.anomaly_score_batch(X[needed])
+
+        # NaN compares False, so unscored rows are never novel
+        novelty_flags = routed & (scores < self.anomaly_threshold)
+
+        evaluated = int(needed.sum())
+        self.metrics.increment(self.anomaly_stats, evaluated=evaluated, skipped=len(X) - evaluated)
+
+        return scores, novelty_flags
+
+    def anomaly_report(self) -> dict:
+
+        evaluated = self.anomaly_stats["evaluated"]
+        skipped = self.anomaly_stats["skipped"]
+        total = evaluated + skipped
+
+        return {
+            "lazy": self.lazy_anomaly,
+            "evaluated": evaluated,
+            "skipped": skipped,
+            "skipped_rate": skipped / total if total else 0.0,
+        }
+
     # ============================================================
     # 5-STATE ROUTING LOGIC
     # ============================================================
 
+    def thresholds(self) -> dict:
+        """Current thresholds in the config file layout; None = no split."""
+
+        zones = {
+            "low": self.low_uncertainty_threshold,
+            "band": self.band_uncertainty_threshold,
+            "high": self.high_uncertainty_threshold,
+        }
+
+        return {
+            "risk": {
+                "auth": self.auth_threshold,
+                "escalate": self.escalate_threshold,
+                "decline": self.decline_threshold,
+            },
+            "uncertainty": {k: None if np.isinf(v) else v for k, v in zones.items()},
+        }
+
+    def load_thresholds(self, path: str) -> None:
+
+        config = threshold_optimizer.load_config(path)
+
+        self.auth_threshold = config["risk"]["auth"]
+        self.escalate_threshold = config["risk"]["escalate"]
+        self.decline_threshold = config["risk"]["decline"]
+        self.low_uncertainty_threshold = config["uncertainty"]["low"]
+        self.band_uncertainty_threshold = config["uncertainty"]["band"]
+        self.high_uncertainty_threshold = config["uncertainty"]["high"]
+
     def decide(self, prob: float, uncertainty: float, novelty_flag: bool) -> str:
 
         # 1️⃣ Hard fraud
-        if prob >= self.decline_threshold and uncertainty < self.uncertainty_threshold:
+        if prob >= self.decline_threshold and uncertainty < self.high_uncertainty_threshold:
             return "DECLINE"
 
         # 2️⃣ High risk but uncertain
-        if prob >= self.escalate_threshold and uncertainty >= self.uncertainty_threshold:
+        if prob >= self.escalate_threshold and uncertainty >= (
+            self.high_uncertainty_threshold
+            if prob >= self.decline_threshold
+            else self.band_uncertainty_threshold
+        ):
             return "ESCALATE_INVEST"
 
         # 3️⃣ Medium risk
@@ -112,7 +651,7 @@ class DecisionEngine:
             return "STEP_UP_AUTH"
 
         # 4️⃣ Low risk but uncertain
-        if prob < self.auth_threshold and uncertainty >= self.uncertainty_threshold:
+        if prob < self.auth_threshold and uncertainty >= self.low_uncertainty_threshold:
             return "ABSTAIN"
 
         # 5️⃣ Novel behaviour override
@@ -122,22 +661,47 @@ class DecisionEngine:
         # 6️⃣ Safe
         return "APPROVE"
 
+    def decide_batch(
+        self,
+        prob: np.ndarray,
+        uncertainty: np.ndarray,
+        novelty_flag: np.ndarray,
+    ) -> np.ndarray:
+
+        # Same priority order as decide(); see backend/engine/cost_simulator.py
+        codes = route_engine(
+            prob,
+            uncertainty,
+            novelty_flag,
+            self.decline_threshold,
+            self.escalate_threshold,
+            self.auth_threshold,
+            (
+                self.low_uncertainty_threshold,
+                self.band_uncertainty_threshold,
+                self.high_uncertainty_threshold,
+            ),
+        )
+
+        return labels(codes, DECISIONS)
+
     # ============================================================
     # COST ESTIMATION
     # ============================================================
 
     def estimate_cost(self, prob: float, decision: str) -> tuple[float, float, float]:
 
-        expected_loss = prob * self.fraud_cost
+        return expected_cost(
+            prob, decision in REVIEW_DECISIONS, self.fraud_cost, self.review_cost
+        )
 
-        if decision in ["STEP_UP_AUTH", "ESCALATE_INVEST", "ABSTAIN"]:
-            manual_cost = self.review_cost
-        else:
-            manual_cost = 0.0
-
-        net_utility = -expected_loss - manual_cost
+    def estimate_cost_batch(
+        self, prob: np.ndarray, decision: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
 
-        return expected_loss, manual_cost, net_utility
+        return expected_cost(
+            prob, np.isin(decision, REVIEW_DECISIONS), self.fraud_cost, self.review_cost
+        )
 
     # ============================================================
     # RISK TIER
@@ -151,26 +715,243 @@ class DecisionEngine:
             return "medium_risk"
         return "low_risk"
 
+    def tier_batch(self, prob: np.ndarray) -> np.ndarray:
+
+        return np.select(
+            [prob >= self.decline_threshold, prob >= self.auth_threshold],
+            ["high_risk", "medium_risk"],
+            default="low_risk",
+        )
+
     # ============================================================
     # MAIN EVALUATION
     # ============================================================
 
-    def evaluate_transaction(self, X) -> dict:
+    def evaluate_transaction(self, X, include_anomaly_score: bool = False) -> dict:
 
-        prob, uncertainty = self.predict_proba(X)
+        if self.cascade or self.early_exit is not None:
+            return self.evaluate_batch(X, include_anomaly_score)[0]
 
-        anomaly_score, novelty_flag = self.anomaly_score(X)
+        t0 = time.perf_counter()
+        prob, uncertainty = self.predict_proba(X)
+        t1 = time.perf_counter()
+
+        if (
+            self.lazy_anomaly
+            and not include_anomaly_score
+            and self.decide(prob, uncertainty, False) != "APPROVE"
+        ):
+            anomaly_score, novelty_flag = None, False
+            self.metrics.increment(self.anomaly_stats, skipped=1)
+        else:
+            anomaly_score, novelty_flag = self.anomaly_score(X)
+            if self.anomaly_model is not None:
+                self.metrics.increment(self.anomaly_stats, evaluated=1)
 
+        t2 = time.perf_counter()
         decision = self.decide(prob, uncertainty, novelty_flag)
+        t3 = time.perf_counter()
 
         expected_loss, manual_cost, net_utility = self.estimate_cost(prob, decision)
+        t4 = time.perf_counter()
+
+        if self.metrics.enabled:
+            self.metrics.record_stages(
+                predict_proba=t1 - t0,
+                anomaly_score=t2 - t1,
+                decide=t3 - t2,
+                estimate_cost=t4 - t3,
+            )
+            self.metrics.record_decisions(decision, novelty_flag)
+
+        return self._build_result(
+            decision=decision,
+            prob=prob,
+            uncertainty=uncertainty,
+            novelty_flag=novelty_flag,
+            tier=self.tier(prob),
+            expected_loss=expected_loss,
+            manual_cost=manual_cost,
+            net_utility=net_utility,
+            anomaly_score=anomaly_score,
+            timestamp=str(datetime.utcnow()),
+        )
+
+    # ============================================================
+    # BATCH EVALUATION
+    # ============================================================
+
+    def evaluate_batch(
+        self, X, include_anomaly_score: bool | np.ndarray = False
+    ) -> List[dict]:
+        """
+        Score an (N, n_features) matrix in one pass per model.
+
+        Every ensemble member runs once over the whole matrix and the
+        Isolation Forest once over the rows that need it; routing, tiering
+        and costing are array operations. Returns one dict per row,
+        identical in shape to evaluate_transaction. `include_anomaly_score`
+        may be a per-row mask, so requests with different flags can share
+        one batch.
+        """
+
+        return self.results_from_scores(self.score_batch(X, include_anomaly_score))
+
+    def score_batch(
+        self, X, include_anomaly_score: bool | np.ndarray = False
+    ) -> dict:
+        """
+        Columnar form of evaluate_batch: one array per output field.
+
+        `anomaly_score` is NaN for rows that were not scored;
+        `scoring_path_full` is None unless the cascade is on, and cascade
+        fast-path rows have NaN `uncertainty`.
+        """
+
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if len(X) == 0:
+            empty = np.empty(0)
+            return {
+                "decision": np.empty(0, dtype="<U15"),
+                "risk_score": empty,
+                "uncertainty": empty,
+                "novelty_flag": np.empty(0, dtype=bool),
+                "tier": np.empty(0, dtype="<U11"),
+                "expected_loss": empty,
+                "manual_review_cost": empty,
+                "net_utility": empty,
+                "anomaly_score": empty,
+                "members_evaluated": np.empty(0, dtype=np.int64),
+                "scoring_path_full": None,
+            }
+
+        t0 = time.perf_counter()
+        if self.cascade:
+            prob, uncertainty, members, full = self.cascade_scores(X)
+            # Fast-path rows are clear of every threshold by construction and
+            # are routed as certain; novelty still applies to those approved
+            routing_uncertainty = np.where(full, uncertainty, 0.0)
+        else:
+            prob, uncertainty, members = self.ensemble_scores(X)
+            full = None
+            routing_uncertainty = uncertainty
+        t1 = time.perf_counter()
+
+        anomaly_scores, novelty_flags = self.novelty_batch(
+            X, prob, routing_uncertainty, include_anomaly_score=include_anomaly_score
+        )
+        if anomaly_scores is None:
+            anomaly_scores = np.full(len(X), np.nan)
+        t2 = time.perf_counter()
+
+        decisions = self.decide_batch(prob, routing_uncertainty, novelty_flags)
+        t3 = time.perf_counter()
+
+        expected_loss, manual_cost, net_utility = self.estimate_cost_batch(prob, decisions)
+        t4 = time.perf_counter()
+
+        if self.metrics.enabled:
+            self.metrics.record_stages(
+                predict_proba=t1 - t0,
+                anomaly_score=t2 - t1,
+                decide=t3 - t2,
+                estimate_cost=t4 - t3,
+            )
+            self.metrics.record_decisions(decisions, novelty_flags)
 
         return {
+            "decision": decisions,
+            "risk_score": prob,
+            "uncertainty": uncertainty,
+            "novelty_flag": novelty_flags,
+            "tier": self.tier_batch(prob),
+            "expected_loss": expected_loss,
+            "manual_review_cost": manual_cost,
+            "net_utility": net_utility,
+            "anomaly_score": anomaly_scores,
+            "members_evaluated": members,
+            "scoring_path_full": full,
+        }
+
+    def results_from_scores(self, scores: dict) -> List[dict]:
+        """Per-row result dicts from the output of score_batch."""
+
+        n_rows = len(scores["decision"])
+
+        meta_extra = [{} for _ in range(n_rows)]
+        if scores["scoring_path_full"] is not None:
+            # "fast": single-member screen only, uncertainty not measured;
+            # "full": whole ensemble
+            for extra, is_full in zip(meta_extra, scores["scoring_path_full"].tolist()):
+                extra["scoring_path"] = "full" if is_full else "fast"
+                extra["cascade_fast_path"] = not is_full
+        if self.early_exit is not None or self.cascade:
+            for extra, count in zip(meta_extra, scores["members_evaluated"].tolist()):
+                extra["members_evaluated"] = count
+
+        timestamp = str(datetime.utcnow())
+        anomaly_scores = [
+            None if np.isnan(s) else s for s in scores["anomaly_score"].tolist()
+        ]
+        uncertainties = [
+            None if np.isnan(u) else u for u in scores["uncertainty"].tolist()
+        ]
+
+        return [
+            self._build_result(
+                decision=row[0],
+                prob=row[1],
+                uncertainty=row[2],
+                novelty_flag=row[3],
+                tier=row[4],
+                expected_loss=row[5],
+                manual_cost=row[6],
+                net_utility=row[7],
+                anomaly_score=row[8],
+                timestamp=timestamp,
+                meta_extra=row[9],
+            )
+            for row in zip(
+                scores["decision"].tolist(),
+                scores["risk_score"].tolist(),
+                uncertainties,
+                scores["novelty_flag"].tolist(),
+                scores["tier"].tolist(),
+                scores["expected_loss"].tolist(),
+                scores["manual_review_cost"].tolist(),
+                scores["net_utility"].tolist(),
+                anomaly_scores,
+                meta_extra,
+            )
+        ]
+
+    # ============================================================
+    # RESPONSE SHAPE
+    # ============================================================
+
+    def _build_result(
+        self,
+        decision: str,
+        prob: float,
+        uncertainty: float | None,
+        novelty_flag: bool,
+        tier: str,
+        expected_loss: float,
+        manual_cost: float,
+        net_utility: float,
+        anomaly_score: float | None,
+        timestamp: str,
+        meta_extra: dict | None = None,
+    ) -> dict:
+
+        result = {
             "decision": decision,
             "risk_score": prob,
             "uncertainty": uncertainty,
             "novelty_flag": novelty_flag,
-            "tier": self.tier(prob),
+            "tier": tier,
             "costs": {
                 "expected_loss": expected_loss,
                 "manual_review_cost": manual_cost,
@@ -181,8 +962,13 @@ class DecisionEngine:
                 "top_features": [],
             },
             "meta": {
-                "model_version": "xgb_ensemble_v2",
+                "model_version": self.model_version,
                 "uncertainty_method": "bootstrap_std",
-                "timestamp": str(datetime.utcnow()),
+                "timestamp": timestamp,
             },
-        }
\ No newline at end of file
+        }
+
+        if meta_extra:
+            result["meta"].update(meta_extra)
+
+        return result
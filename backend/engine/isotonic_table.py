@@ -0,0 +1,236 @@
+"""
+Isotonic calibrators as one precomputed interpolation table.
+
+Every ensemble member is a `CalibratedClassifierCV(method="isotonic", cv=3)`,
+so each prediction calls `IsotonicRegression.predict` once per fold per
+member. This module extracts the fitted breakpoints at load time, stacks
+them into a single padded 2-D table and calibrates all folds of all members
+with one `np.searchsorted` pass, reproducing sklearn's clip-then-interp1d
+arithmetic.
+
+Benchmark against the sklearn path (from the project root):
+
+    python -m backend.engine.isotonic_table
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, List
+
+import numpy as np
+
+# Calibrator inputs are probabilities in [0, 1]. Shifting calibrator b by
+# b * KEY_SPACING keeps every table row in its own disjoint range, so one
+# sorted 1-D key array serves all rows. Padding sits inside the gap.
+KEY_SPACING = 2.0
+PAD_OFFSET = 1.5
+
+
+class IsotonicTable:
+    """
+    Stacked breakpoints of B isotonic calibrators, shape (B, K).
+
+    Row b holds calibrator b's `X_thresholds_` / `y_thresholds_`, padded to
+    the longest calibrator. `transform` maps raw scores of shape (N, B) to
+    calibrated probabilities of the same shape.
+    """
+
+    def __init__(self, x: List[np.ndarray], y: List[np.ndarray]) -> None:
+
+        self.n_calibrators = len(x)
+        self.lengths = np.array([len(xb) for xb in x], dtype=np.intp)
+        width = max(2, int(self.lengths.max()))
+
+        # sklearn fits on float32 XGBoost output, so breakpoints and the
+        # interp1d arithmetic are float32 throughout
+        self.x = np.empty((self.n_calibrators, width), dtype=np.float32)
+        self.y = np.empty((self.n_calibrators, width), dtype=np.float32)
+        for b, (xb, yb) in enumerate(zip(x, y)):
+            self.x[b, : len(xb)] = xb
+            self.x[b, len(xb):] = xb[-1]
+            self.y[b, : len(yb)] = yb
+            self.y[b, len(yb):] = yb[-1]
+
+        self.x_min = self.x[:, 0].copy()
+        self.x_max = self.x[np.arange(self.n_calibrators), self.lengths - 1].copy()
+
+        self._row_offset = np.arange(self.n_calibrators) * KEY_SPACING
+        self._row_start = np.arange(self.n_calibrators) * width
+
+        keys = self.x.astype(np.float64) + self._row_offset[:, None]
+        for b, n in enumerate(self.lengths):
+            keys[b, n:] = self._row_offset[b] + PAD_OFFSET
+        self._keys = keys.ravel()
+
+        self._x_flat = self.x.ravel()
+        self._y_flat = self.y.ravel()
+        self._constant = self.lengths == 1
+
+    @classmethod
+    def from_calibrators(cls, calibrators: List[Any]) -> "IsotonicTable":
+
+        return cls(
+            [np.asarray(c.X_thresholds_, dtype=np.float32) for c in calibrators],
+            [np.asarray(c.y_thresholds_, dtype=np.float32) for c in calibrators],
+        )
+
+    @classmethod
+    def from_models(cls, models: List[Any]) -> "IsotonicTable":
+        """One row per CV fold, in member-major order."""
+
+        calibrators = []
+        for member in models:
+            for calibrated in member.calibrated_classifiers_:
+                if calibrated.method != "isotonic":
+                    raise ValueError(f"Unsupported calibration: {calibrated.method}")
+                calibrators.append(calibrated.calibrators[0])
+
+        return cls.from_calibrators(calibrators)
+
+    @classmethod
+    def from_flat(cls, x: np.ndarray, y: np.ndarray, offsets: np.ndarray) -> "IsotonicTable":
+        """Build from concatenated breakpoints, as stored in the compiled export."""
+
+        x = np.asarray(x, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+
+        return cls(
+            [x[lo:hi] for lo, hi in zip(offsets[:-1], offsets[1:])],
+            [y[lo:hi] for lo, hi in zip(offsets[:-1], offsets[1:])],
+        )
+
+    def transform(self, raw: np.ndarray) -> np.ndarray:
+        """Calibrate raw scores of shape (N, B); returns float64 (N, B)."""
+
+        # out_of_bounds="clip", in the calibrator's float32 dtype
+        v = np.clip(np.asarray(raw, dtype=np.float32), self.x_min, self.x_max)
+
+        # float32 + small integer offset is exact in float64, so ordering and
+        # ties match a per-row searchsorted(side="left")
+        pos = np.searchsorted(self._keys, v + self._row_offset, side="left")
+        local = np.clip(pos - self._row_start, 1, np.maximum(self.lengths - 1, 1))
+        hi = self._row_start + local
+        lo = hi - 1
+
+        x_lo = self._x_flat[lo]
+        y_lo = self._y_flat[lo]
+
+        # Same expression order as scipy's interp1d._call_linear
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (self._y_flat[hi] - y_lo) / (self._x_flat[hi] - x_lo)
+            out = slope * (v - x_lo) + y_lo
+
+        out = np.where(self._constant, self.y[:, 0], out)
+
+        return out.astype(np.float64)
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+
+def _time(fn, repeats: int) -> float:
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def benchmark(model_path: str, batch_sizes: List[int], repeats: int) -> None:
+
+    import joblib
+
+    models = joblib.load(model_path)
+    calibrators = [
+        c.calibrators[0] for m in models for c in m.calibrated_classifiers_
+    ]
+
+    start = time.perf_counter()
+    table = IsotonicTable.from_models(models)
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    print(
+        f"[isotonic_table] {table.n_calibrators} calibrators, table "
+        f"{table.x.shape[0]}x{table.x.shape[1]}, built in {build_ms:.2f} ms"
+    )
+    print(f"{'rows':>6} {'sklearn (ms)':>14} {'table (ms)':>12} {'speedup':>9} {'max |diff|':>12}")
+
+    rng = np.random.default_rng(0)
+    for n in batch_sizes:
+        # Raw fraud scores are heavily skewed towards zero
+        raw = rng.beta(0.3, 8.0, size=(n, table.n_calibrators)).astype(np.float32)
+
+        def sklearn_path():
+            return np.column_stack(
+                [c.predict(raw[:, b]) for b, c in enumerate(calibrators)]
+            )
+
+        def table_path():
+            return table.transform(raw)
+
+        diff = np.abs(sklearn_path() - table_path()).max()
+        t_sk = _time(sklearn_path, repeats)
+        t_tab = _time(table_path, repeats)
+
+        print(
+            f"{n:>6} {t_sk * 1e3:>14.3f} {t_tab * 1e3:>12.3f} "
+            f"{t_sk / t_tab:>8.1f}x {diff:>12.2e}"
+        )
+
+    # End to end: CalibratedClassifierCV.predict_proba vs fold boosters + table
+    estimators = [c.estimator for m in models for c in m.calibrated_classifiers_]
+    n_features = estimators[0].n_features_in_
+
+    print("\n[isotonic_table] Ensemble predict_proba, all members")
+    print(f"{'rows':>6} {'sklearn (ms)':>14} {'table (ms)':>12} {'speedup':>9} {'max |diff|':>12}")
+
+    for n in batch_sizes:
+        X = rng.normal(size=(n, n_features))
+
+        def sklearn_path():
+            return np.column_stack([m.predict_proba(X)[:, 1] for m in models])
+
+        def table_path():
+            raw = np.column_stack([e.predict_proba(X)[:, 1] for e in estimators])
+            return table.transform(raw)
+
+        # Three folds per member: compare member means
+        folds = table_path()
+        members = folds.reshape(n, len(models), -1).mean(axis=2)
+        diff = np.abs(sklearn_path() - members).max()
+        t_sk = _time(sklearn_path, max(1, repeats // 10))
+        t_tab = _time(table_path, max(1, repeats // 10))
+
+        print(
+            f"{n:>6} {t_sk * 1e3:>14.3f} {t_tab * 1e3:>12.3f} "
+            f"{t_sk / t_tab:>8.1f}x {diff:>12.2e}"
+        )
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    engine_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.abspath(os.path.join(engine_dir, os.pardir, os.pardir))
+
+    parser = argparse.ArgumentParser(description="Benchmark isotonic calibration paths")
+    parser.add_argument(
+        "--model", default=os.path.join(project_root, "artifacts", "xgb_ensemble.pkl")
+    )
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 256, 4096])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    benchmark(args.model, args.batch_sizes, args.repeats)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
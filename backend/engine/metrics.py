@@ -0,0 +1,192 @@
+"""
+Low-overhead stage timing and decision counters for the engine and API.
+
+Stages are timed with `time.perf_counter` by the caller and recorded here
+in fixed-bucket histograms: one `bisect` and a few integer increments per
+observation, under an uncontended lock because engine calls run on several
+threads. `render` writes the Prometheus text exposition format for
+`/metrics`. When `enabled` is False, `record_*` return immediately.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable, List
+
+# Upper bounds in seconds; everything above the last lands in +Inf
+DURATION_BUCKETS = (
+    10e-6, 25e-6, 50e-6, 100e-6, 250e-6, 500e-6,
+    1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3, 250e-3, 1.0,
+)
+
+# Engine stages, in pipeline order, plus the API's codec stages
+STAGES = ("predict_proba", "anomaly_score", "decide", "estimate_cost", "parse", "serialize")
+
+# Exported engine work counters: (stats group, key) -> (name, help)
+WORK_COUNTERS = {
+    ("cascade", "rows"): ("fraud_cascade_rows_total", "Rows screened by the cascade."),
+    ("cascade", "fast_path"): (
+        "fraud_cascade_fast_path_total",
+        "Cascade rows decided by one member without the full ensemble.",
+    ),
+    ("early_exit", "rows"): ("fraud_early_exit_rows_total", "Rows scored with early exit."),
+    ("early_exit", "members"): (
+        "fraud_early_exit_members_evaluated_total",
+        "Ensemble members evaluated across early-exit rows.",
+    ),
+    ("anomaly", "evaluated"): (
+        "fraud_anomaly_evaluated_total",
+        "Rows scored by the Isolation Forest.",
+    ),
+    ("anomaly", "skipped"): (
+        "fraud_anomaly_skipped_total",
+        "Rows whose Isolation Forest call was skipped by lazy scoring.",
+    ),
+}
+
+
+class Histogram:
+
+    def __init__(self, buckets: Iterable[float] = DURATION_BUCKETS) -> None:
+
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.9g}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+
+        return lines
+
+
+class EngineMetrics:
+
+    def __init__(self, enabled: bool = True) -> None:
+
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.requests: dict = {}
+        self.decisions: Counter = Counter()
+        self.rows = 0
+        self.novel = 0
+
+    def record_stages(self, **durations: float) -> None:
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            for stage, seconds in durations.items():
+                self.stages[stage].observe(seconds)
+
+    def record_decisions(self, decisions, novelty_flags) -> None:
+        """`decisions` is one label or an array of them; flags likewise."""
+
+        if not self.enabled:
+            return
+
+        if isinstance(decisions, str):
+            with self._lock:
+                self.decisions[decisions] += 1
+                self.rows += 1
+                self.novel += bool(novelty_flags)
+            return
+
+        counts = Counter(decisions.tolist())
+        novel = int(novelty_flags.sum())
+        with self._lock:
+            self.decisions.update(counts)
+            self.rows += len(decisions)
+            self.novel += novel
+
+    def increment(self, stats: dict, **amounts: int) -> None:
+        """
+        Add to a plain stats dict under the lock. Always on: the engine's
+        cascade, early-exit and anomaly counts feed /health as well.
+        """
+
+        with self._lock:
+            for key, amount in amounts.items():
+                stats[key] += amount
+
+    def record_request(self, path: str, seconds: float) -> None:
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            histogram = self.requests.get(path)
+            if histogram is None:
+                histogram = self.requests[path] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self, extra: dict | None = None, work: dict | None = None) -> str:
+        """
+        Prometheus text format; `extra` adds plain gauges by name and `work`
+        maps a WORK_COUNTERS group to its stats dict.
+        """
+
+        with self._lock:
+            lines = [
+                "# HELP fraud_stage_duration_seconds Time spent per scoring stage.",
+                "# TYPE fraud_stage_duration_seconds histogram",
+            ]
+            for stage, histogram in self.stages.items():
+                lines += histogram.render("fraud_stage_duration_seconds", f'stage="{stage}"')
+
+            lines += [
+                "# HELP fraud_request_duration_seconds End-to-end request time per path.",
+                "# TYPE fraud_request_duration_seconds histogram",
+            ]
+            for path, histogram in sorted(self.requests.items()):
+                lines += histogram.render("fraud_request_duration_seconds", f'path="{path}"')
+
+            lines += [
+                "# HELP fraud_decisions_total Routed decisions by state.",
+                "# TYPE fraud_decisions_total counter",
+            ]
+            for decision, n in sorted(self.decisions.items()):
+                lines.append(f'fraud_decisions_total{{decision="{decision}"}} {n}')
+
+            lines += [
+                "# HELP fraud_rows_scored_total Transactions scored.",
+                "# TYPE fraud_rows_scored_total counter",
+                f"fraud_rows_scored_total {self.rows}",
+                "# HELP fraud_novelty_flagged_total Transactions flagged as novel.",
+                "# TYPE fraud_novelty_flagged_total counter",
+                f"fraud_novelty_flagged_total {self.novel}",
+                "# HELP fraud_novelty_rate Share of scored transactions flagged as novel.",
+                "# TYPE fraud_novelty_rate gauge",
+                f"fraud_novelty_rate {self.novel / self.rows if self.rows else 0.0:.9g}",
+            ]
+
+            # Read under the lock that increment() writes under
+            for (group, key), (name, help_text) in WORK_COUNTERS.items():
+                if work is not None and group in work:
+                    lines += [
+                        f"# HELP {name} {help_text}",
+                        f"# TYPE {name} counter",
+                        f"{name} {work[group][key]}",
+                    ]
+
+        for name, value in (extra or {}).items():
+            lines += [f"# TYPE {name} gauge", f"{name} {value:.9g}"]
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,302 @@
+"""
+Memory-mappable native export of the compiled models.
+
+`joblib.load` of `xgb_ensemble.pkl` rebuilds every sklearn and XGBoost
+wrapper, which makes startup slow and gives each uvicorn worker its own
+private copy. The compressed `.npz` exports still have to be read into
+memory. This format writes the flattened node arrays, isotonic breakpoints
+and Isolation Forest arrays as plain `.npy` files. A `manifest.json`
+records their shapes, dtypes and SHA-256 hashes, and the size, mtime and
+SHA-256 of the pickles they were exported from. Loading uses
+`np.load(mmap_mode="r")`, so workers on one host share the page cache
+instead of holding copies.
+
+Hashing an array reads every page of it, which is the cost the memory map
+avoids. A normal load checks only each file's shape and dtype, from its
+`.npy` header. The engine checks the pickle record, which takes one stat
+call while the pickle is unchanged. Full hashing is left to `verify`, or to
+`load(verify=True)`.
+
+Usage (from the project root):
+
+    python -m backend.engine.native_artifacts export
+    python -m backend.engine.native_artifacts verify
+    python -m backend.engine.native_artifacts benchmark
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from backend.engine.compiled_ensemble import CompiledEnsemble
+from backend.engine.compiled_forest import CompiledIsolationForest
+from backend.engine.provenance import file_sha256, source_record
+from backend.engine.replay import N_FEATURES
+
+FORMAT_VERSION = 1
+
+MANIFEST = "manifest.json"
+
+
+def _write_arrays(directory: str, prefix: str, arrays: dict) -> dict:
+
+    entries = {}
+    for name, array in arrays.items():
+        filename = f"{prefix}.{name}.npy"
+        path = os.path.join(directory, filename)
+        np.save(path, np.ascontiguousarray(array))
+        entries[name] = {
+            "file": filename,
+            "dtype": str(array.dtype),
+            "shape": list(array.shape),
+            "sha256": file_sha256(path),
+        }
+
+    return entries
+
+
+def _read_arrays(directory: str, entries: dict, verify: bool) -> dict:
+
+    arrays = {}
+    for name, entry in entries.items():
+        path = os.path.join(directory, entry["file"])
+        if verify and file_sha256(path) != entry["sha256"]:
+            raise ValueError(f"{path} does not match its manifest hash; re-run the export step.")
+        array = np.load(path, mmap_mode="r")
+        # Header only: catches a swapped or re-exported file without reading it
+        if str(array.dtype) != entry["dtype"] or list(array.shape) != entry["shape"]:
+            raise ValueError(f"{path} does not match its manifest shape or dtype; re-run the export step.")
+        arrays[name] = array
+
+    return arrays
+
+
+# ============================================================
+# EXPORT / LOAD
+# ============================================================
+
+
+def save(
+    directory: str,
+    ensemble: CompiledEnsemble,
+    forest: CompiledIsolationForest | None = None,
+) -> dict:
+
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "ensemble": {
+            "max_depth": ensemble.max_depth,
+            "n_features": ensemble.n_features,
+            "source": ensemble.source,
+            "arrays": _write_arrays(
+                directory,
+                "ensemble",
+                {name: getattr(ensemble, name) for name in CompiledEnsemble.ARRAY_FIELDS},
+            ),
+        },
+        "forest": None,
+    }
+
+    if forest is not None:
+        manifest["forest"] = {
+            "max_depth": forest.max_depth,
+            "n_features": forest.n_features_in_,
+            "denominator": forest.denominator,
+            "offset": forest.offset_,
+            "source": forest.source,
+            "arrays": _write_arrays(
+                directory,
+                "forest",
+                {name: getattr(forest, name) for name in CompiledIsolationForest.ARRAY_FIELDS},
+            ),
+        }
+
+    # Written last: a manifest only exists once every array it names does
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def load(
+    directory: str, verify: bool = False
+) -> Tuple[CompiledEnsemble, CompiledIsolationForest | None]:
+    """Memory-map an export; `verify` also checks every file against its hash."""
+
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+
+    version = manifest["format_version"]
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"Native artifact format {version} is not supported "
+            f"(expected {FORMAT_VERSION}); re-run the export step."
+        )
+
+    spec = manifest["ensemble"]
+    ensemble = CompiledEnsemble(
+        _read_arrays(directory, spec["arrays"], verify),
+        max_depth=spec["max_depth"],
+        n_features=spec["n_features"],
+    )
+    ensemble.source = spec.get("source")
+
+    forest = None
+    spec = manifest["forest"]
+    if spec is not None:
+        forest = CompiledIsolationForest(
+            _read_arrays(directory, spec["arrays"], verify),
+            max_depth=spec["max_depth"],
+            n_features=spec["n_features"],
+            denominator=spec["denominator"],
+            offset=spec["offset"],
+        )
+        forest.source = spec.get("source")
+
+    return ensemble, forest
+
+
+# ============================================================
+# COMMANDS
+# ============================================================
+
+
+def _default_paths() -> Tuple[str, str, str]:
+
+    engine_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.abspath(os.path.join(engine_dir, os.pardir, os.pardir))
+    artifacts_dir = os.path.join(project_root, "artifacts")
+
+    return (
+        os.path.join(artifacts_dir, "xgb_ensemble.pkl"),
+        os.path.join(artifacts_dir, "isolation_forest.pkl"),
+        os.path.join(artifacts_dir, "native"),
+    )
+
+
+def export(model_path: str, anomaly_path: str, directory: str) -> None:
+
+    import joblib
+
+    ensemble = CompiledEnsemble.from_models(joblib.load(model_path))
+    ensemble.source = source_record(model_path)
+    forest = None
+    if os.path.exists(anomaly_path):
+        forest = CompiledIsolationForest.from_model(joblib.load(anomaly_path))
+        forest.source = source_record(anomaly_path)
+
+    manifest = save(directory, ensemble, forest)
+
+    n_bytes = sum(
+        os.path.getsize(os.path.join(directory, entry["file"]))
+        for part in ("ensemble", "forest")
+        if manifest[part] is not None
+        for entry in manifest[part]["arrays"].values()
+    )
+    print(
+        f"[native_artifacts] Exported {ensemble.n_members} members"
+        f"{' + Isolation Forest' if forest is not None else ''} "
+        f"({n_bytes / 1e6:.1f} MB) -> {directory}"
+    )
+
+
+def verify(directory: str) -> bool:
+
+    try:
+        load(directory, verify=True)
+    except ValueError as exc:
+        print(f"[native_artifacts] {exc}")
+        return False
+
+    print(f"[native_artifacts] {directory}: all hashes match")
+
+    return True
+
+
+def benchmark(model_path: str, directory: str, compiled_path: str | None, repeats: int) -> None:
+    """Engine construction time per artifact format, best of `repeats`."""
+
+    from backend.engine.decision_engine import DecisionEngine
+
+    def build(**kwargs):
+        # Silence the engine's load messages while timing
+        with contextlib.redirect_stdout(io.StringIO()):
+            return DecisionEngine(**kwargs)
+
+    compiled_path = compiled_path or os.path.join(
+        os.path.dirname(directory), "xgb_ensemble_compiled.npz"
+    )
+    # Every row names its files, so none falls back to compiling in memory
+    formats = {
+        "pickle (sklearn mode)": (model_path, {"mode": "sklearn", "model_path": model_path}),
+        "npz (compiled mode)": (
+            compiled_path,
+            {"mode": "compiled", "model_path": model_path, "compiled_path": compiled_path},
+        ),
+        "native mmap (compiled mode)": (
+            os.path.join(directory, MANIFEST),
+            {"mode": "compiled", "model_path": model_path, "native_dir": directory},
+        ),
+    }
+
+    print(f"[native_artifacts] Engine startup, best of {repeats}")
+    print(f"{'format':<30} {'load (ms)':>10} {'first row (ms)':>15}")
+
+    for label, (required, kwargs) in formats.items():
+        if not os.path.exists(required):
+            print(f"{label:<30} skipped: {required} not found")
+            continue
+
+        best_load = best_first = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            engine = build(**kwargs)
+            loaded = time.perf_counter()
+            if kwargs["mode"] == "compiled" and engine.models:
+                print(f"{label:<30} skipped: export is stale; re-run the export step")
+                break
+            engine.evaluate_transaction(np.zeros((1, N_FEATURES)))
+            done = time.perf_counter()
+            best_load = min(best_load, loaded - start)
+            best_first = min(best_first, done - loaded)
+        else:
+            print(f"{label:<30} {best_load * 1e3:>10.1f} {best_first * 1e3:>15.2f}")
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    default_model, default_anomaly, default_directory = _default_paths()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["export", "verify", "benchmark"])
+    parser.add_argument("--model", default=default_model)
+    parser.add_argument("--anomaly", default=default_anomaly)
+    parser.add_argument("--directory", default=default_directory)
+    parser.add_argument(
+        "--compiled", default=None, help="Compiled .npz for benchmark (default: next to --directory)"
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export(args.model, args.anomaly, args.directory)
+        return 0
+
+    if args.command == "benchmark":
+        benchmark(args.model, args.directory, args.compiled, args.repeats)
+        return 0
+
+    return 0 if verify(args.directory) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Source-model records for exported artifacts.
+
+The compiled `.npz` files and the native export are derived from a pickle.
+Each export records the pickle's size, mtime and SHA-256, so a loader can
+tell when the pickle was retrained after the export and the export is
+stale. An unchanged size and mtime skip hashing.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+
+def file_sha256(path: str) -> str:
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def source_record(path: str) -> dict:
+
+    stat = os.stat(path)
+
+    return {
+        "path": os.path.basename(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(path),
+    }
+
+
+def stale_reason(record: dict | None, path: str) -> str | None:
+    """Why an export built from `path` no longer matches it, or None."""
+
+    # Nothing to compare against, e.g. a deployment that ships exports only
+    if not os.path.exists(path):
+        return None
+
+    if record is None:
+        return "it does not record which model it was exported from"
+
+    stat = os.stat(path)
+    if record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+        return None
+    if record["size"] == stat.st_size and record["sha256"] == file_sha256(path):
+        return None
+
+    return f"{path} has changed since it was exported"
+
+
+def npz_fields(source: dict | None) -> dict:
+    """Entries for np.savez recording `source`; optional in the npz formats."""
+
+    if source is None:
+        return {}
+
+    return {
+        "source_sha256": np.array(source["sha256"]),
+        "source_size": np.int64(source["size"]),
+        "source_mtime_ns": np.int64(source["mtime_ns"]),
+    }
+
+
+def read_npz_source(data) -> dict | None:
+
+    if "source_sha256" not in data.files:
+        return None
+
+    return {
+        "sha256": str(data["source_sha256"]),
+        "size": int(data["source_size"]),
+        "mtime_ns": int(data["source_mtime_ns"]),
+    }
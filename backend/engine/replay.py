@@ -0,0 +1,70 @@
+"""
+Model-ready feature matrices for offline replays of the decision engine.
+
+Engine inputs are the 31 columns of `creditcard_phase0_clean.csv` minus the
+label, with `Amount` replaced by `log1p(Amount)` exactly as the phase
+scripts do before training.
+"""
+
+import csv
+from typing import Tuple
+
+import numpy as np
+
+FEATURE_COLUMNS = [f"V{i}" for i in range(1, 29)] + ["Amount", "hour", "delta_time"]
+N_FEATURES = len(FEATURE_COLUMNS)
+
+LABEL_COLUMN = "Class"
+
+
+def load_rows(path: str, limit: int | None = None) -> Tuple[np.ndarray, np.ndarray | None]:
+    """
+    Load replay rows as (X, y).
+
+    `.npy` files are taken as already model-ready and carry no labels.
+    CSV files must have a header with the cleaned column names; `Amount` is
+    log-transformed and `Class`, when present, is returned as labels.
+    """
+
+    if path.endswith(".npy"):
+        X = np.load(path, mmap_mode="r")[:limit]
+        return np.asarray(X, dtype=np.float64), None
+
+    with open(path, newline="") as f:
+        header = next(csv.reader(f))
+
+    missing = [c for c in FEATURE_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"{path} is missing feature columns: {missing}")
+
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2, max_rows=limit)
+
+    X = data[:, [header.index(c) for c in FEATURE_COLUMNS]]
+    X[:, FEATURE_COLUMNS.index("Amount")] = np.log1p(X[:, FEATURE_COLUMNS.index("Amount")])
+
+    y = None
+    if LABEL_COLUMN in header:
+        y = data[:, header.index(LABEL_COLUMN)].astype(np.int64)
+
+    return X, y
+
+
+def synthetic_rows(n_rows: int, seed: int = 0) -> np.ndarray:
+    """
+    Synthetic rows with roughly the shape of the cleaned dataset.
+
+    The PCA components are standard normal; one row in ten is scaled up so
+    replays also reach high-risk and novel regions of the models.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    X = np.empty((n_rows, N_FEATURES))
+    X[:, :28] = rng.normal(size=(n_rows, 28))
+    X[: n_rows // 10, :28] *= 5.0
+    X[:, 28] = np.log1p(rng.lognormal(mean=3.0, sigma=1.5, size=n_rows))
+    X[:, 29] = rng.uniform(0.0, 24.0, size=n_rows)
+    # ~284k transactions over two days is about one every 0.6 s
+    X[:, 30] = rng.exponential(0.6, size=n_rows)
+
+    return X
@@ -0,0 +1,23 @@
+"""
+Thread-pool sizing shared by the multi-process entry points.
+
+OpenMP, BLAS and joblib read these variables once, when they are first
+imported, so `pin_threads` must run before numpy, sklearn or xgboost load
+in the process (or in the workers it starts). This module imports nothing
+heavy for that reason.
+"""
+
+import os
+
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "LOKY_MAX_CPU_COUNT",
+)
+
+
+def pin_threads(threads: int) -> None:
+
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
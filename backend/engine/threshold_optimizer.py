@@ -0,0 +1,449 @@
+"""
+Routing threshold search over cached predictions.
+
+Finds the auth / escalate / decline risk thresholds and a separate
+uncertainty threshold per risk zone (low, escalate..decline band, high)
+that minimize realized cost on labelled predictions. An optional cap on
+the share of transactions sent to review applies. Routing follows
+`DecisionEngine.decide`; costs come from a `cost_simulator.CostConfig`.
+
+Nothing is rerouted per candidate. Probabilities are sorted once per
+uncertainty candidate, with cumulative fraud counts, so the number of rows
+and frauds below any risk threshold is one `searchsorted`, O(log n). Zone
+costs are differences of those tables. The full grid is then combined with
+array operations: for each auth threshold, every escalate, decline and
+pair of low/high uncertainty cuts at once. Within the band, all rows go to
+review either way, so its uncertainty cut is chosen on cost alone. The
+winner is checked against a full `route_engine` + `simulate` pass.
+
+Left alone, the cheapest config on the test set tends to be degenerate:
+auth == escalate (no STEP_UP band) and an infinite high-zone uncertainty cut
+(no escalation of uncertain high-risk rows). Both bands must therefore be at
+least `--min-band-width` wide. Unless `--allow-no-abstention` is given, the
+low and high zones must each route at least one fitting row on uncertainty.
+This is counted from the same tables, so a finite cut above every
+uncertainty in the zone is rejected just like inf. Thresholds are fitted on
+one stratified part of the predictions and costed on a held-out part
+(`--holdout`). Any routing state the result never reaches on the fitting rows
+is reported.
+
+The output is a JSON config that `DecisionEngine(thresholds_path=...)`
+and `ENGINE_THRESHOLDS` load. Usage (from the project root):
+
+    python -m backend.engine.threshold_optimizer phase2_results.csv --max-review-rate 0.005 \
+        --output thresholds.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from backend.engine.cost_simulator import (
+    DECISIONS,
+    engine_costs,
+    route_engine,
+    simulate,
+)
+
+FORMAT_VERSION = 1
+
+APPROVE, STEP_UP, ESCALATE, ABSTAIN, DECLINE = range(len(DECISIONS))
+
+
+# ============================================================
+# CONFIG FILE
+# ============================================================
+
+
+def save_config(path: str, risk: dict, uncertainty: dict, extra: dict | None = None) -> None:
+
+    config = {
+        "format_version": FORMAT_VERSION,
+        "risk": risk,
+        # null means the zone never splits on uncertainty
+        "uncertainty": {k: (None if np.isinf(v) else v) for k, v in uncertainty.items()},
+        **(extra or {}),
+    }
+    with open(path, "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def load_config(path: str) -> dict:
+
+    with open(path) as f:
+        config = json.load(f)
+
+    if config.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported thresholds format {config.get('format_version')!r}")
+
+    risk = {k: float(config["risk"][k]) for k in ("auth", "escalate", "decline")}
+    if not risk["auth"] <= risk["escalate"] <= risk["decline"]:
+        raise ValueError(f"{path}: expected auth <= escalate <= decline, got {risk}")
+
+    uncertainty = {
+        k: float("inf") if config["uncertainty"][k] is None else float(config["uncertainty"][k])
+        for k in ("low", "band", "high")
+    }
+
+    return {"risk": risk, "uncertainty": uncertainty}
+
+
+# ============================================================
+# PREDICTIONS
+# ============================================================
+
+
+def load_predictions(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (prob, uncertainty, label, novelty) from a CSV with probability,
+    uncertainty and true_label columns (and optionally novelty_flag), such
+    as phase2_results.csv, or an .npz with the same keys.
+    """
+
+    if path.endswith(".npz"):
+        data = np.load(path)
+        keys = data.files
+    else:
+        data = np.genfromtxt(path, delimiter=",", names=True, dtype=None, encoding="utf-8")
+        keys = data.dtype.names
+
+    prob = np.asarray(data["probability"], dtype=np.float64)
+    uncertainty = np.asarray(data["uncertainty"], dtype=np.float64)
+    y = np.asarray(data["true_label"], dtype=np.int64)
+    novelty = (
+        np.asarray(data["novelty_flag"], dtype=bool)
+        if "novelty_flag" in keys
+        else np.zeros(len(prob), dtype=bool)
+    )
+
+    return prob, uncertainty, y, novelty
+
+
+def holdout_split(y: np.ndarray, fraction: float, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """(fit, held-out) row indices, stratified on the label."""
+
+    rng = np.random.default_rng(seed)
+    held_out = []
+    for label in np.unique(y):
+        rows = rng.permutation(np.flatnonzero(y == label))
+        held_out.append(rows[: int(round(fraction * len(rows)))])
+    held_out = np.sort(np.concatenate(held_out))
+
+    return np.setdiff1d(np.arange(len(y)), held_out), held_out
+
+
+# ============================================================
+# SEARCH
+# ============================================================
+
+
+def _below(prob: np.ndarray, y: np.ndarray, cuts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows and frauds with prob < each cut: one sort, then O(log n) per cut."""
+
+    order = np.argsort(prob, kind="stable")
+    cum_fraud = np.concatenate([[0], np.cumsum(y[order])])
+    idx = np.searchsorted(prob[order], cuts, side="left")
+
+    return idx.astype(np.float64), cum_fraud[idx].astype(np.float64)
+
+
+def default_uncertainty_grid(uncertainty: np.ndarray, size: int = 16) -> np.ndarray:
+    """Upper quantiles of the observed uncertainty, plus inf (no split)."""
+
+    levels = np.quantile(uncertainty, np.linspace(0.5, 0.999, size))
+
+    return np.append(np.unique(levels), np.inf)
+
+
+def optimize(
+    prob: np.ndarray,
+    uncertainty: np.ndarray,
+    y: np.ndarray,
+    novelty: np.ndarray,
+    costs,
+    risk_grid: np.ndarray,
+    uncertainty_grid: np.ndarray,
+    max_review_rate: float | None = None,
+    min_band_width: float = 0.0,
+    allow_no_abstention: bool = True,
+) -> dict:
+    """
+    Best thresholds on the grid; raises ValueError if none meet the review
+    cap and band-width constraints. Unless `allow_no_abstention`, at least
+    one row must be uncertain enough to abstain below auth and to escalate
+    above decline.
+    """
+
+    risk_grid = np.unique(risk_grid)
+    K, m = len(risk_grid), len(uncertainty_grid)
+    cuts = np.append(risk_grid, np.inf)
+    on_fraud, on_legit = costs.on_fraud, costs.on_legit
+
+    def cost(decision, n, f):
+        return f * on_fraud[decision] + (n - f) * on_legit[decision]
+
+    # Counts below each cut: all rows, and rows at or above each uncertainty
+    # candidate; the same for novel rows, which only matter where APPROVE is
+    T_n, T_f = _below(prob, y, cuts)
+    N_n, N_f = _below(prob[novelty], y[novelty], cuts)
+    A_n, A_f = np.empty((m, K + 1)), np.empty((m, K + 1))
+    NA_n, NA_f = np.empty((m, K + 1)), np.empty((m, K + 1))
+    for j, u in enumerate(uncertainty_grid):
+        uncertain = uncertainty >= u
+        A_n[j], A_f[j] = _below(prob[uncertain], y[uncertain], cuts)
+        both = uncertain & novelty
+        NA_n[j], NA_f[j] = _below(prob[both], y[both], cuts)
+
+    # Low zone [0, auth): uncertain -> ABSTAIN, certain novel -> ESCALATE,
+    # rest APPROVE. Indexed [auth, j]
+    hi_n, hi_f = A_n[:, :K].T, A_f[:, :K].T
+    nov_n = N_n[:K, None] - NA_n[:, :K].T
+    nov_f = N_f[:K, None] - NA_f[:, :K].T
+    low_cost = (
+        cost(ABSTAIN, hi_n, hi_f)
+        + cost(ESCALATE, nov_n, nov_f)
+        + cost(APPROVE, T_n[:K, None] - hi_n - nov_n, T_f[:K, None] - hi_f - nov_f)
+    )
+    low_review = hi_n + nov_n
+
+    # Step-up band [auth, escalate). Indexed [auth, escalate]
+    band1_n = T_n[None, :K] - T_n[:K, None]
+    band1_f = T_f[None, :K] - T_f[:K, None]
+    band1_cost = cost(STEP_UP, band1_n, band1_f)
+
+    # Escalate band [escalate, decline): uncertain -> ESCALATE, else STEP_UP;
+    # every row is reviewed, so the cut is picked on cost. [escalate, decline, j]
+    n2 = T_n[None, :K] - T_n[:K, None]
+    f2 = T_f[None, :K] - T_f[:K, None]
+    hi2_n = (A_n[:, None, :K] - A_n[:, :K, None]).transpose(1, 2, 0)
+    hi2_f = (A_f[:, None, :K] - A_f[:, :K, None]).transpose(1, 2, 0)
+    band2_all = cost(ESCALATE, hi2_n, hi2_f) + cost(STEP_UP, n2[..., None] - hi2_n, f2[..., None] - hi2_f)
+    band2_j = band2_all.argmin(axis=2)
+    band2_cost = band2_all.min(axis=2)
+
+    # High zone [decline, 1]: uncertain -> ESCALATE, else DECLINE. [decline, j]
+    hi3_n = (A_n[:, K:K + 1] - A_n[:, :K]).T
+    hi3_f = (A_f[:, K:K + 1] - A_f[:, :K]).T
+    high_cost = cost(ESCALATE, hi3_n, hi3_f) + cost(
+        DECLINE, (T_n[K] - T_n[:K])[:, None] - hi3_n, (T_f[K] - T_f[:K])[:, None] - hi3_f
+    )
+    high_review = hi3_n
+
+    # [from, to]: the band between two grid thresholds is wide enough
+    wide = (risk_grid[None, :] - risk_grid[:, None]) >= min_band_width - 1e-9
+    ordered = np.triu(np.ones((K, K), dtype=bool)) & wide  # escalate -> decline
+    # Realized uncertain rows per zone: low [auth, j], high [decline, j]
+    low_ok = np.ones((K, m), dtype=bool) if allow_no_abstention else hi_n > 0
+    high_ok = np.ones((K, m), dtype=bool) if allow_no_abstention else high_review > 0
+    budget = np.inf if max_review_rate is None else max_review_rate * len(prob)
+
+    best = (np.inf, None)
+    for a in range(K):
+        # [escalate, decline, low j, high j]
+        total = (
+            band1_cost[a][:, None, None, None]
+            + band2_cost[:, :, None, None]
+            + low_cost[a][None, None, :, None]
+            + high_cost[None, :, None, :]
+        )
+        review = (
+            band1_n[a][:, None, None, None]
+            + n2[:, :, None, None]
+            + low_review[a][None, None, :, None]
+            + high_review[None, :, None, :]
+        )
+        valid = (
+            (ordered & wide[a][:, None])[:, :, None, None]
+            & low_ok[a][None, None, :, None]
+            & high_ok[None, :, None, :]
+            & (review <= budget)
+        )
+        if not valid.any():
+            continue
+        total = np.where(valid, total, np.inf)
+        flat = int(total.argmin())
+        if total.flat[flat] < best[0]:
+            b, c, jl, jh = np.unravel_index(flat, total.shape)
+            best = (float(total.flat[flat]), (a, b, c, jl, band2_j[b, c], jh))
+
+    if best[1] is None:
+        raise ValueError(
+            f"No thresholds on the grid keep the review rate under {max_review_rate} "
+            f"with bands at least {min_band_width} wide"
+        )
+
+    a, b, c, jl, jb, jh = best[1]
+    risk = {
+        "auth": float(risk_grid[a]),
+        "escalate": float(risk_grid[b]),
+        "decline": float(risk_grid[c]),
+    }
+    zone_uncertainty = {
+        "low": float(uncertainty_grid[jl]),
+        "band": float(uncertainty_grid[jb]),
+        "high": float(uncertainty_grid[jh]),
+    }
+
+    # Full reroute of the winner as a check on the table arithmetic
+    report = evaluate(prob, uncertainty, y, novelty, costs, risk, zone_uncertainty)
+    if not np.isclose(report["total_cost"], best[0]):
+        raise RuntimeError(f"Search cost {best[0]} disagrees with reroute {report['total_cost']}")
+
+    return {"risk": risk, "uncertainty": zone_uncertainty, "expected": report}
+
+
+def evaluate(prob, uncertainty, y, novelty, costs, risk: dict, zone_uncertainty: dict) -> dict:
+
+    codes = route_engine(
+        prob,
+        uncertainty,
+        novelty,
+        risk["decline"],
+        risk["escalate"],
+        risk["auth"],
+        (zone_uncertainty["low"], zone_uncertainty["band"], zone_uncertainty["high"]),
+    )
+    report = simulate(codes, y, costs)
+    reviewed = np.isin(codes, [STEP_UP, ESCALATE, ABSTAIN]).sum()
+    report["review_rate"] = float(reviewed / len(codes)) if len(codes) else 0.0
+
+    return report
+
+
+def collapsed(prob: np.ndarray, uncertainty: np.ndarray, risk: dict, zone_uncertainty: dict) -> List[str]:
+    """Routing states no row reaches under a config, as readable warnings."""
+
+    high = prob >= risk["decline"]
+    band = ~high & (prob >= risk["escalate"])
+    step_up = ~high & ~band & (prob >= risk["auth"])
+    low = prob < risk["auth"]
+
+    checks = [
+        (step_up, "no row falls in the STEP_UP band (auth..escalate)"),
+        (band, "no row falls in the escalate band (escalate..decline)"),
+        (high, "no row reaches the decline threshold"),
+        (low & (uncertainty >= zone_uncertainty["low"]), "no low-risk row is uncertain enough to abstain"),
+        (band & (uncertainty >= zone_uncertainty["band"]), "no band row is uncertain enough to escalate"),
+        (high & (uncertainty >= zone_uncertainty["high"]), "no high-risk row is uncertain enough to escalate"),
+    ]
+
+    return [message for rows, message in checks if not rows.any()]
+
+
+def _print_summary(name: str, risk: dict, zone_uncertainty: dict, report: dict) -> None:
+
+    print(f"\n===== {name} =====")
+    print("Risk:        " + ", ".join(f"{k}={v:.4g}" for k, v in risk.items()))
+    print("Uncertainty: " + ", ".join(f"{k}={v:.4g}" for k, v in zone_uncertainty.items()))
+    print(f"Total cost:  {report['total_cost']:,.0f} ({report['cost_per_transaction']:.4f} per transaction)")
+    print(f"Review rate: {report['review_rate']:.4%}")
+    print("Decisions:   " + ", ".join(f"{d}={r['count']}" for d, r in report["by_decision"].items()))
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Search routing thresholds on labelled predictions")
+    parser.add_argument("predictions", help="CSV or .npz with probability, uncertainty, true_label")
+    # Not artifacts/: the served thresholds change only when asked to
+    parser.add_argument("--output", default="thresholds.json")
+    parser.add_argument("--max-review-rate", type=float, default=None, help="e.g. 0.005 = 0.5%% of rows")
+    parser.add_argument("--risk-step", type=float, default=0.02, help="Risk threshold grid spacing")
+    parser.add_argument("--uncertainty-candidates", type=int, default=16)
+    parser.add_argument("--min-band-width", type=float, default=0.05, help="Minimum escalate-auth and decline-escalate")
+    parser.add_argument(
+        "--allow-no-abstention",
+        action="store_true",
+        help="Let the low and high zones route no row on uncertainty",
+    )
+    parser.add_argument("--holdout", type=float, default=0.3, help="Share of rows held out for costing (0 = none)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the holdout split")
+    parser.add_argument("--fraud-cost", type=float, default=1000)
+    parser.add_argument("--review-cost", type=float, default=20)
+    parser.add_argument("--false-positive-cost", type=float, default=50)
+    args = parser.parse_args(argv)
+
+    prob, uncertainty, y, novelty = load_predictions(args.predictions)
+    costs = engine_costs(args.fraud_cost, args.review_cost, args.false_positive_cost)
+
+    if args.holdout > 0:
+        fit, held_out = holdout_split(y, args.holdout, args.seed)
+    else:
+        fit = held_out = np.arange(len(y))
+    fit_rows = (prob[fit], uncertainty[fit], y[fit], novelty[fit])
+    eval_rows = (prob[held_out], uncertainty[held_out], y[held_out], novelty[held_out])
+    eval_name = "held out" if args.holdout > 0 else "fit rows"
+
+    # The engine's built-in thresholds, for comparison on the same rows
+    default_risk = {"auth": 0.30, "escalate": 0.60, "decline": 0.80}
+    default_uncertainty = {"low": 0.02, "band": 0.02, "high": 0.02}
+    baseline = evaluate(*eval_rows, costs, default_risk, default_uncertainty)
+    _print_summary(f"ENGINE DEFAULTS ({eval_name})", default_risk, default_uncertainty, baseline)
+
+    risk_grid = np.round(np.arange(args.risk_step, 1.0, args.risk_step), 6)
+    uncertainty_grid = default_uncertainty_grid(fit_rows[1], args.uncertainty_candidates)
+
+    start = time.perf_counter()
+    result = optimize(
+        *fit_rows,
+        costs,
+        risk_grid,
+        uncertainty_grid,
+        args.max_review_rate,
+        min_band_width=args.min_band_width,
+        allow_no_abstention=args.allow_no_abstention,
+    )
+    elapsed = time.perf_counter() - start
+    expected = evaluate(*eval_rows, costs, result["risk"], result["uncertainty"])
+
+    if args.holdout > 0:
+        _print_summary("OPTIMIZED (fit rows)", result["risk"], result["uncertainty"], result["expected"])
+    _print_summary(f"OPTIMIZED ({eval_name})", result["risk"], result["uncertainty"], expected)
+    print(
+        f"\nSearched {len(risk_grid)} risk x {len(uncertainty_grid)} uncertainty candidates "
+        f"per threshold over {len(fit)} rows in {elapsed:.2f}s"
+    )
+
+    warnings = collapsed(fit_rows[0], fit_rows[1], result["risk"], result["uncertainty"])
+    if args.max_review_rate is not None and expected["review_rate"] > args.max_review_rate:
+        warnings.append(f"{eval_name} review rate {expected['review_rate']:.4%} exceeds the cap")
+    if expected["total_cost"] > baseline["total_cost"]:
+        warnings.append(f"costs more than the engine defaults ({eval_name})")
+    for warning in warnings:
+        print(f"[threshold_optimizer] Warning: {warning}")
+
+    save_config(
+        args.output,
+        result["risk"],
+        result["uncertainty"],
+        extra={
+            "expected": expected,
+            "fit": result["expected"],
+            "warnings": warnings,
+            "search": {
+                "predictions": args.predictions,
+                "rows": len(prob),
+                "fit_rows": len(fit),
+                "holdout_rows": len(held_out) if args.holdout > 0 else 0,
+                "seed": args.seed,
+                "max_review_rate": args.max_review_rate,
+                "min_band_width": args.min_band_width,
+                "allow_no_abstention": args.allow_no_abstention,
+                "costs": {
+                    "fraud": args.fraud_cost,
+                    "review": args.review_cost,
+                    "false_positive": args.false_positive_cost,
+                },
+            },
+        },
+    )
+    print(f"[threshold_optimizer] Config written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
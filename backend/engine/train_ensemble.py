@@ -0,0 +1,259 @@
+"""
+Parallel training of the bootstrap XGBoost ensemble.
+
+`phase2_uncertainty.py` fits each member as `CalibratedClassifierCV(cv=3)`
+on a bootstrap resample: three boosters per member, one after another.
+Here every (member, fold) pair is a separate task for a process pool. The
+training matrix is copied into shared memory once and every worker maps it,
+so tasks carry only a member seed and a fold number. With `--workers` processes
+each booster gets `cores // workers` threads, so the CPU is used fully
+without oversubscribing it.
+
+A task repeats what `CalibratedClassifierCV.fit` does for its fold. It
+draws the member's bootstrap indices with `np.random.seed(seed)`-compatible
+sampling, takes the same `StratifiedKFold` split, fits the booster and fits
+an isotonic calibrator on the held-out fold. The parent assembles the folds
+back into `CalibratedClassifierCV` objects. The saved list is the same
+artifact the sequential loop produced, and for a given seed the
+probabilities are identical.
+
+Usage (from the project root):
+
+    python -m backend.engine.train_ensemble --members 20 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.calibration import CalibratedClassifierCV, _CalibratedClassifier
+from sklearn.isotonic import IsotonicRegression
+from sklearn.model_selection import StratifiedKFold
+from xgboost import XGBClassifier
+
+DEFAULT_OUTPUT = "artifacts/xgb_ensemble.pkl"
+
+# Same booster and calibration as phase2_uncertainty.py
+BOOSTER_PARAMS = {
+    "n_estimators": 300,
+    "max_depth": 4,
+    "learning_rate": 0.05,
+    "eval_metric": "logloss",
+    "tree_method": "hist",
+    "device": "cpu",
+}
+CV_FOLDS = 3
+
+
+def base_model(seed: int, scale_pos_weight: float, n_jobs: int | None = None) -> XGBClassifier:
+
+    return XGBClassifier(
+        **BOOSTER_PARAMS, scale_pos_weight=scale_pos_weight, random_state=seed, n_jobs=n_jobs
+    )
+
+
+def bootstrap_indices(seed: int, n: int) -> np.ndarray:
+    """The resample `np.random.seed(seed); np.random.choice(n, n)` gives."""
+
+    return np.random.RandomState(seed).choice(n, n, replace=True)
+
+
+# ============================================================
+# SHARED MEMORY
+# ============================================================
+
+
+class SharedArrays:
+    """Named shared-memory copies of numpy arrays, owned by the parent."""
+
+    def __init__(self, arrays: dict) -> None:
+
+        self.blocks = {}
+        self.specs = {}
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            self.blocks[key] = block
+            self.specs[key] = (block.name, array.shape, array.dtype.str)
+
+    def close(self) -> None:
+
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+
+
+def attach(specs: dict) -> tuple:
+    """(arrays, blocks) mapped from SharedArrays.specs; keep the blocks alive."""
+
+    arrays, blocks = {}, []
+    for key, (name, shape, dtype) in specs.items():
+        # Pool workers share the parent's resource tracker, so the block is
+        # unlinked once, by SharedArrays.close
+        block = shared_memory.SharedMemory(name=name)
+        arrays[key] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        blocks.append(block)
+
+    return arrays, blocks
+
+
+# ============================================================
+# WORKERS
+# ============================================================
+
+_shared: dict = {}
+_blocks: list = []
+_task_config: dict = {}
+
+
+def _init_worker(specs: dict, config: dict) -> None:
+
+    global _shared, _blocks, _task_config
+    _shared, _blocks = attach(specs)
+    _task_config = config
+
+
+def _fit_fold(member: int, seed: int, fold: int) -> tuple:
+    """(member, fold, fitted _CalibratedClassifier) for one fold of one member."""
+
+    X, y = _shared["X"], _shared["y"]
+    config = _task_config
+
+    boot = bootstrap_indices(seed, len(y))
+    y_boot = y[boot]
+    # StratifiedKFold without shuffling is what cv=3 resolves to
+    splits = StratifiedKFold(n_splits=CV_FOLDS).split(np.zeros(len(boot)), y_boot)
+    train, test = next(split for i, split in enumerate(splits) if i == fold)
+
+    columns = config["columns"]
+    estimator = base_model(seed, config["scale_pos_weight"], n_jobs=config["nthread"])
+    estimator.fit(pd.DataFrame(X[boot[train]], columns=columns), y_boot[train])
+
+    held_out = estimator.predict_proba(pd.DataFrame(X[boot[test]], columns=columns))[:, 1]
+    calibrator = IsotonicRegression(out_of_bounds="clip").fit(held_out, y_boot[test] == 1)
+
+    # The artifact should not pin a thread count; the engine sets its own
+    estimator.set_params(n_jobs=None)
+    estimator.get_booster().set_param({"nthread": 0})
+
+    return member, fold, _CalibratedClassifier(
+        estimator, [calibrator], method="isotonic", classes=config["classes"]
+    )
+
+
+# ============================================================
+# DRIVER
+# ============================================================
+
+
+def thread_budget(tasks: int, workers: int | None = None, cores: int | None = None) -> tuple:
+    """(processes, threads per booster) with processes x threads <= cores."""
+
+    cores = cores or os.cpu_count() or 1
+    workers = max(1, min(workers or cores, tasks, cores))
+
+    return workers, max(1, cores // workers)
+
+
+def train_ensemble(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    n_models: int = 5,
+    seed: int = 0,
+    workers: int | None = None,
+) -> List[CalibratedClassifierCV]:
+    """Members with seeds seed .. seed + n_models - 1, trained in parallel."""
+
+    y = np.asarray(y_train)
+    classes = np.unique(y)
+    scale_pos_weight = (len(y) - y.sum()) / y.sum()
+    seeds = [seed + i for i in range(n_models)]
+
+    tasks = [(member, s, fold) for member, s in enumerate(seeds) for fold in range(CV_FOLDS)]
+    processes, nthread = thread_budget(len(tasks), workers)
+    print(f"[train_ensemble] {n_models} members x {CV_FOLDS} folds on {processes} processes x {nthread} threads")
+
+    config = {
+        "columns": list(X_train.columns),
+        "classes": classes,
+        "scale_pos_weight": scale_pos_weight,
+        "nthread": nthread,
+    }
+    shared = SharedArrays({"X": X_train.to_numpy(dtype=np.float64), "y": y})
+    folds = {}
+    started = time.perf_counter()
+
+    # Spawned workers re-import the calling script, and phase2_uncertainty.py
+    # has no __main__ guard; fork where the OS offers it
+    context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(shared.specs, config),
+        ) as pool:
+            futures = [pool.submit(_fit_fold, *task) for task in tasks]
+            for future in futures:
+                member, fold, calibrated = future.result()
+                folds[member, fold] = calibrated
+    finally:
+        shared.close()
+
+    models = []
+    for member, s in enumerate(seeds):
+        # What CalibratedClassifierCV.fit would have set
+        model = CalibratedClassifierCV(
+            base_model(s, scale_pos_weight), method="isotonic", cv=CV_FOLDS
+        )
+        model.calibrated_classifiers_ = [folds[member, fold] for fold in range(CV_FOLDS)]
+        model.classes_ = classes
+        first = model.calibrated_classifiers_[0].estimator
+        model.n_features_in_ = first.n_features_in_
+        model.feature_names_in_ = first.feature_names_in_
+        models.append(model)
+
+    print(f"[train_ensemble] Trained {len(tasks)} boosters in {time.perf_counter() - started:.1f}s")
+
+    return models
+
+
+def main(argv: List[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Train the bootstrap ensemble in parallel")
+    parser.add_argument("--members", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first member")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: one per core)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    from sklearn.metrics import roc_auc_score
+
+    from backend.engine.dataset import load_split
+
+    X_train, X_test, y_train, y_test = load_split(test_size=0.2, random_state=42)
+    models = train_ensemble(X_train, y_train, args.members, args.seed, args.workers)
+
+    probs = np.array([model.predict_proba(X_test)[:, 1] for model in models])
+    print(f"ROC-AUC (Mean Ensemble): {roc_auc_score(y_test, probs.mean(axis=0)):.4f}")
+    print(f"Mean uncertainty (std):  {probs.std(axis=0).mean():.5f}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    joblib.dump(models, args.output)
+    print(f"[train_ensemble] Saved {len(models)} members to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
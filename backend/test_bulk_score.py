@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Allow backend to see project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.engine import bulk_score
+from backend.engine.replay import synthetic_rows
+
+ARTIFACTS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "artifacts"))
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists(os.path.join(ARTIFACTS, "xgb_ensemble.pkl")),
+    reason="needs artifacts/xgb_ensemble.pkl",
+)
+
+ROWS = 3000
+CHUNK_SIZE = 400
+ENGINE_KWARGS = {"mode": "compiled", "native": False, "metrics": False}
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.fixture(scope="module")
+def raw_csv(tmp_path_factory) -> str:
+    """Raw (Time, V1..V28, Amount, Class) rows in Time order."""
+
+    X = synthetic_rows(ROWS, seed=3)
+    frame = pd.DataFrame(X[:, :28], columns=[f"V{i}" for i in range(1, 29)])
+    frame.insert(0, "Time", np.cumsum(np.random.default_rng(1).exponential(0.6, ROWS)))
+    frame["Amount"] = np.expm1(X[:, 28])
+    frame["Class"] = np.arange(ROWS) % 2
+
+    path = str(tmp_path_factory.mktemp("bulk") / "raw.csv")
+    frame.to_csv(path, index=False)
+
+    return path
+
+
+def score(input_path: str, output: str, resume: bool = False) -> int:
+
+    rows, _ = bulk_score.score_file(
+        input_path,
+        output,
+        ENGINE_KWARGS,
+        workers=1,
+        chunk_size=CHUNK_SIZE,
+        keep_columns=["Class"],
+        include_anomaly_score=True,
+        resume=resume,
+    )
+
+    return rows
+
+
+def crash_after(monkeypatch, checkpoints: int) -> None:
+    """Fail the save of checkpoint `checkpoints` + 1, after its chunk was written."""
+
+    save = bulk_score.save_progress
+    calls = {"n": 0}
+
+    def failing_save(output, progress):
+        calls["n"] += 1
+        # The first save is the empty file with its header
+        if calls["n"] > checkpoints + 1:
+            raise Crash()
+        save(output, progress)
+
+    monkeypatch.setattr(bulk_score, "save_progress", failing_save)
+
+
+@pytest.fixture(scope="module")
+def reference(raw_csv) -> bytes:
+
+    output = raw_csv + ".reference.csv"
+    assert score(raw_csv, output) == ROWS
+    with open(output, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("legacy_checkpoint", [False, True])
+def test_resume_after_crash_matches_uninterrupted_run(raw_csv, reference, tmp_path, monkeypatch, legacy_checkpoint):
+
+    output = str(tmp_path / "scored.csv")
+
+    crash_after(monkeypatch, checkpoints=3)
+    with pytest.raises(Crash):
+        score(raw_csv, output)
+    monkeypatch.undo()
+
+    progress_path = output + ".progress.json"
+    with open(progress_path) as f:
+        progress = json.load(f)
+    assert progress["rows"] == 3 * CHUNK_SIZE
+    # The crash left a chunk past the checkpoint
+    assert os.path.getsize(output) > progress["bytes"]
+
+    if legacy_checkpoint:
+        # Checkpoints written before byte offsets were recorded
+        del progress["offset"]
+        with open(progress_path, "w") as f:
+            json.dump(progress, f)
+
+    assert score(raw_csv, output, resume=True) == ROWS - 3 * CHUNK_SIZE
+    with open(output, "rb") as f:
+        assert f.read() == reference
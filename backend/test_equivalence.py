@@ -0,0 +1,126 @@
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Allow backend to see project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.engine.decision_engine import DecisionEngine
+from backend.engine.replay import synthetic_rows
+
+ARTIFACTS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "artifacts"))
+MODEL_PATH = os.path.join(ARTIFACTS, "xgb_ensemble.pkl")
+ANOMALY_PATH = os.path.join(ARTIFACTS, "isolation_forest.pkl")
+
+# The pickles are training outputs and are not checked in
+pytestmark = pytest.mark.skipif(
+    not (os.path.exists(MODEL_PATH) and os.path.exists(ANOMALY_PATH)),
+    reason="needs artifacts/xgb_ensemble.pkl and artifacts/isolation_forest.pkl",
+)
+
+# Score fields every engine configuration must agree on
+SCORE_FIELDS = ("risk_score", "uncertainty", "anomaly_score", "expected_loss")
+TOLERANCE = 1e-9
+
+
+def build_engine(**kwargs) -> DecisionEngine:
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DecisionEngine(metrics=False, **kwargs)
+
+
+def assert_same_scores(reference: dict, candidate: dict) -> None:
+
+    assert candidate["decision"].tolist() == reference["decision"].tolist()
+    assert candidate["novelty_flag"].tolist() == reference["novelty_flag"].tolist()
+    for field in SCORE_FIELDS:
+        np.testing.assert_allclose(candidate[field], reference[field], rtol=0, atol=TOLERANCE, err_msg=field)
+
+
+@pytest.fixture(scope="module")
+def rows() -> np.ndarray:
+
+    return synthetic_rows(2000, seed=7)
+
+
+@pytest.fixture(scope="module")
+def sklearn_scores(rows) -> dict:
+
+    return build_engine(mode="sklearn").score_batch(rows, include_anomaly_score=True)
+
+
+def test_compiled_engine_matches_sklearn(rows, sklearn_scores, tmp_path):
+
+    # A compiled path that does not exist: compile the pickle in memory
+    engine = build_engine(mode="compiled", native=False, compiled_path=str(tmp_path / "none.npz"))
+    assert engine.compiled is not None
+
+    assert_same_scores(sklearn_scores, engine.score_batch(rows, include_anomaly_score=True))
+
+
+def test_compiled_export_matches_sklearn(rows, sklearn_scores, tmp_path):
+
+    from backend.engine import compiled_ensemble
+
+    path = str(tmp_path / "xgb_ensemble_compiled.npz")
+    with contextlib.redirect_stdout(io.StringIO()):
+        compiled_ensemble.export(MODEL_PATH, path)
+
+    engine = build_engine(mode="compiled", compiled_path=path)
+    assert not engine.models, "the fresh export was refused"
+
+    assert_same_scores(sklearn_scores, engine.score_batch(rows, include_anomaly_score=True))
+
+
+def test_single_row_matches_batch(rows):
+
+    engine = build_engine(mode="sklearn")
+    batch = engine.evaluate_batch(rows[:20], include_anomaly_score=True)
+
+    for i, expected in enumerate(batch):
+        result = engine.evaluate_transaction(rows[i : i + 1], include_anomaly_score=True)
+        assert result["decision"] == expected["decision"]
+        assert result["risk_score"] == pytest.approx(expected["risk_score"], abs=TOLERANCE)
+        assert result["uncertainty"] == pytest.approx(expected["uncertainty"], abs=TOLERANCE)
+
+
+def test_native_export_matches_sklearn(rows, sklearn_scores, tmp_path):
+
+    from backend.engine import native_artifacts
+
+    directory = str(tmp_path / "native")
+    with contextlib.redirect_stdout(io.StringIO()):
+        native_artifacts.export(MODEL_PATH, ANOMALY_PATH, directory)
+    assert native_artifacts.load(directory, verify=True)
+
+    engine = build_engine(mode="compiled", native_dir=directory)
+    assert not engine.models, "the fresh export was refused"
+    assert os.path.join(directory, native_artifacts.MANIFEST) in engine.artifact_paths
+
+    assert_same_scores(sklearn_scores, engine.score_batch(rows, include_anomaly_score=True))
+
+
+def test_native_export_of_older_pickle_is_refused(tmp_path):
+
+    import shutil
+
+    from backend.engine import native_artifacts
+
+    model_path = str(tmp_path / "xgb_ensemble.pkl")
+    shutil.copy(MODEL_PATH, model_path)
+    directory = str(tmp_path / "native")
+    with contextlib.redirect_stdout(io.StringIO()):
+        native_artifacts.export(model_path, ANOMALY_PATH, directory)
+
+    # Same content, new mtime: still current
+    os.utime(model_path, ns=(0, 0))
+    assert not build_engine(mode="compiled", model_path=model_path, native_dir=directory).models
+
+    # Retrained: the engine falls back to the pickle
+    with open(model_path, "ab") as f:
+        f.write(b"\0")
+    assert build_engine(mode="compiled", model_path=model_path, native_dir=directory).models
@@ -0,0 +1,168 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+# Allow backend to see project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.engine.cost_simulator import (
+    DECISIONS,
+    PHASE2_DECISIONS,
+    engine_costs,
+    labels,
+    phase2_costs,
+    route_engine,
+    route_grid,
+    simulate,
+)
+from backend.engine.decision_engine import DecisionEngine
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+INF = float("inf")
+
+# Engine defaults, tuned-looking zone cuts, and zones that never split
+THRESHOLD_SETS = [
+    dict(auth=0.30, escalate=0.60, decline=0.80, low=0.02, band=0.02, high=0.02),
+    dict(auth=0.06, escalate=0.12, decline=0.18, low=0.0367, band=2.6e-05, high=0.0367),
+    dict(auth=0.10, escalate=0.10, decline=0.70, low=INF, band=0.01, high=INF),
+]
+
+
+def routing_engine(auth, escalate, decline, low, band, high) -> SimpleNamespace:
+    """Just the attributes decide and decide_batch read; no models."""
+
+    return SimpleNamespace(
+        auth_threshold=auth,
+        escalate_threshold=escalate,
+        decline_threshold=decline,
+        low_uncertainty_threshold=low,
+        band_uncertainty_threshold=band,
+        high_uncertainty_threshold=high,
+    )
+
+
+def routing_rows(thresholds: dict, n: int = 20000, seed: int = 0):
+    """Random (prob, uncertainty, novelty), with rows exactly on every cut."""
+
+    rng = np.random.default_rng(seed)
+    prob = rng.random(n)
+    uncertainty = rng.exponential(0.02, n)
+    novelty = rng.random(n) < 0.1
+
+    risk_cuts = [thresholds[k] for k in ("auth", "escalate", "decline")]
+    uncertainty_cuts = [thresholds[k] for k in ("low", "band", "high") if np.isfinite(thresholds[k])]
+    prob[: n // 4] = rng.choice(risk_cuts, n // 4)
+    uncertainty[n // 8 : n // 4 + n // 8] = rng.choice(uncertainty_cuts, n // 4)
+
+    return prob, uncertainty, novelty
+
+
+def test_decide_batch_matches_decide():
+
+    for thresholds in THRESHOLD_SETS:
+        engine = routing_engine(**thresholds)
+        prob, uncertainty, novelty = routing_rows(thresholds)
+
+        batch = DecisionEngine.decide_batch(engine, prob, uncertainty, novelty)
+        rows = [
+            DecisionEngine.decide(engine, p, u, bool(n))
+            for p, u, n in zip(prob.tolist(), uncertainty.tolist(), novelty.tolist())
+        ]
+
+        assert batch.tolist() == rows, thresholds
+
+
+# ============================================================
+# COST SIMULATION VS THE ORIGINAL LOOPS
+# ============================================================
+
+
+def phase2_loop(prob, uncertainty, y, T_block=0.8, T_review=0.1164, U_threshold=0.015):
+    """Routing and cost loops as phase2_uncertainty.py had them before the simulator."""
+
+    C_FN, C_FP_block, C_manual, C_step_up, C_escalate = 5000, 200, 50, 10, 100
+
+    decision = []
+    for p, u in zip(prob, uncertainty):
+        if p >= T_block:
+            decision.append("AUTO_BLOCK" if u < U_threshold else "ESCALATE_INVEST")
+        elif p >= T_review:
+            decision.append("MANUAL_REVIEW" if u < U_threshold else "ABSTAIN")
+        else:
+            decision.append("AUTO_APPROVE" if u < U_threshold else "STEP_UP_AUTH")
+
+    total_cost = 0
+    for d, true in zip(decision, y):
+        if d == "AUTO_BLOCK":
+            if true == 0:
+                total_cost += C_FP_block
+        elif d == "AUTO_APPROVE":
+            if true == 1:
+                total_cost += C_FN
+        elif d == "MANUAL_REVIEW":
+            total_cost += C_manual
+        elif d == "STEP_UP_AUTH":
+            total_cost += C_step_up
+        elif d == "ESCALATE_INVEST":
+            total_cost += C_escalate
+        elif d == "ABSTAIN":
+            total_cost += C_manual
+
+    return decision, total_cost
+
+
+def test_phase2_grid_cost_matches_loop():
+
+    data = np.genfromtxt(
+        os.path.join(PROJECT_ROOT, "phase2_results.csv"), delimiter=",", names=True, dtype=None, encoding="utf-8"
+    )
+    prob, uncertainty, y = data["probability"], data["uncertainty"], data["true_label"]
+
+    for T_review, U_threshold in [(0.1164, 0.015), (0.05, 0.002), (0.5, 0.05)]:
+        decision, total = phase2_loop(prob.tolist(), uncertainty.tolist(), y.tolist(), 0.8, T_review, U_threshold)
+
+        codes = route_grid(prob, uncertainty, T_review, 0.8, U_threshold)
+        report = simulate(codes, y, phase2_costs())
+
+        assert labels(codes, PHASE2_DECISIONS).tolist() == decision
+        assert report["total_cost"] == total
+
+
+def test_route_engine_cost_matches_loop():
+
+    costs = {"fraud": 1000, "review": 20, "false_positive": 50}
+    rng = np.random.default_rng(1)
+
+    for thresholds in THRESHOLD_SETS:
+        engine = routing_engine(**thresholds)
+        prob, uncertainty, novelty = routing_rows(thresholds, n=5000)
+        y = (rng.random(len(prob)) < prob).astype(int)
+
+        # Per row: decide, then charge what the engine's cost config says
+        total = 0.0
+        for p, u, n, label in zip(prob.tolist(), uncertainty.tolist(), novelty.tolist(), y.tolist()):
+            decision = DecisionEngine.decide(engine, p, u, bool(n))
+            if decision in ("STEP_UP_AUTH", "ESCALATE_INVEST", "ABSTAIN"):
+                total += costs["review"]
+            elif decision == "APPROVE" and label == 1:
+                total += costs["fraud"]
+            elif decision == "DECLINE" and label == 0:
+                total += costs["false_positive"]
+
+        codes = route_engine(
+            prob,
+            uncertainty,
+            novelty,
+            thresholds["decline"],
+            thresholds["escalate"],
+            thresholds["auth"],
+            (thresholds["low"], thresholds["band"], thresholds["high"]),
+        )
+        report = simulate(codes, y, engine_costs(costs["fraud"], costs["review"], costs["false_positive"]))
+
+        assert report["total_cost"] == total, thresholds
+        assert sum(r["count"] for r in report["by_decision"].values()) == len(prob)
+        assert set(report["by_decision"]) <= set(DECISIONS)
@@ -8,6 +8,12 @@ import { initLandscape, plotTransaction, clearHistory } from './landscape.js';
 // ---- Config ----
 const API_URL = '/api/predict';
 const DIRECT_API_URL = 'http://localhost:8000/predict';
+// The Vercel proxy cannot carry WebSockets, so the live feed goes direct
+const WS_URL = import.meta.env.VITE_WS_URL ||
+    (['localhost', '127.0.0.1'].includes(location.hostname)
+        ? 'ws://localhost:8000/ws/feed'
+        : 'wss://mari-production-40ce.up.railway.app/ws/feed');
+const LIVE_RATE = 2; // transactions per second shown in live mode
 
 // ---- Decision Metadata ----
 const DECISION_META = {
@@ -140,7 +146,7 @@ async function callAPI(features) {
             const res = await fetch(url, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ features }),
+                body: JSON.stringify({ features, include_anomaly_score: true }),
             });
             if (!res.ok) { lastErr = new Error(`HTTP ${res.status}`); continue; }
             const data = await res.json();
@@ -174,6 +180,48 @@ async function checkHealth() {
     return false;
 }
 
+// ---- Live Feed ----
+// One WebSocket instead of a fetch per point. The server scores the shared
+// feed once for all viewers and sends this client LIVE_RATE per second.
+let liveSocket = null;
+
+// Feed vectors are model-ready (V1..V28, log1p(Amount), hour, delta_time);
+// the display reads time from the first slot and dollars from the last
+function liveDisplayFeatures(t) {
+    return [t.time, ...t.features.slice(0, 28), t.amount];
+}
+
+function toggleLive() {
+    if (liveSocket) {
+        liveSocket.close();
+        return;
+    }
+
+    const btn = $('#btnLive');
+    liveSocket = new WebSocket(`${WS_URL}?rate=${LIVE_RATE}`);
+    btn.classList.add('active');
+
+    liveSocket.onmessage = (event) => {
+        const msg = JSON.parse(event.data);
+        if (msg.type !== 'transactions' || isAnalyzing) return;
+
+        // Earlier points in the batch go straight to the plot and history;
+        // the newest gets the full X-ray
+        const txns = msg.transactions;
+        txns.slice(0, -1).forEach(t => {
+            plotTransaction(t.result.risk_score, t.result.uncertainty, t.result.decision);
+            addToHistory(liveDisplayFeatures(t), t.result);
+        });
+        const last = txns[txns.length - 1];
+        showState('analysis');
+        renderAnalysis(liveDisplayFeatures(last), last.result);
+    };
+    liveSocket.onclose = () => {
+        liveSocket = null;
+        btn.classList.remove('active');
+    };
+}
+
 // ---- Rendering ----
 function showState(state) {
     const empty = $('#emptyState');
@@ -487,6 +535,9 @@ function init() {
         handleGenerate(features);
     });
 
+    // Live feed toggle
+    $('#btnLive').addEventListener('click', toggleLive);
+
     // Preset buttons
     $$('.btn-preset').forEach(btn => {
         btn.addEventListener('click', () => {
@@ -3,7 +3,6 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import (
@@ -12,35 +11,21 @@ from sklearn.metrics import (
     roc_auc_score
 )
 
+from backend.engine.dataset import load_split
+
 # ====================================
 # Phase 1 – Baseline Logistic Model
 # ====================================
 
-# 1️⃣ Load cleaned dataset
-df = pd.read_csv("creditcard_phase0_clean.csv")
-
-# 2️⃣ Log-transform skewed feature
-df["Amount"] = np.log1p(df["Amount"])
-
-# 3️⃣ Split features / target
-X = df.drop(columns=["Class"])
-y = df["Class"]
-
-# 4️⃣ Stratified split
-X_train, X_test, y_train, y_test = train_test_split(
-    X,
-    y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
+# 1️⃣ Load cleaned dataset (log1p Amount, stratified split; cached)
+X_train, X_test, y_train, y_test = load_split(test_size=0.2, random_state=42)
 
-# 5️⃣ Scale features
+# 2️⃣ Scale features
 scaler = StandardScaler()
 X_train_scaled = scaler.fit_transform(X_train)
 X_test_scaled = scaler.transform(X_test)
 
-# 6️⃣ Train baseline model
+# 3️⃣ Train baseline model
 model = LogisticRegression(
     max_iter=1000,
     class_weight="balanced"
@@ -48,11 +33,11 @@ model = LogisticRegression(
 
 model.fit(X_train_scaled, y_train)
 
-# 7️⃣ Predict probabilities
+# 4️⃣ Predict probabilities
 y_prob = model.predict_proba(X_test_scaled)[:, 1]
 y_pred_default = (y_prob >= 0.5).astype(int)
 
-# 8️⃣ Baseline evaluation
+# 5️⃣ Baseline evaluation
 print("===== BASELINE (Threshold = 0.5) =====")
 print("ROC-AUC:", roc_auc_score(y_test, y_prob))
 print(classification_report(y_test, y_pred_default))
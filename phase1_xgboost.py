@@ -2,7 +2,6 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     classification_report,
     roc_auc_score,
@@ -14,32 +13,19 @@ from sklearn.metrics import (
 from xgboost import XGBClassifier
 from sklearn.calibration import CalibratedClassifierCV
 
+from backend.engine.dataset import load_split
+
 # ====================================
 # Phase 1 – Calibrated XGBoost
 # ====================================
 
-# 1️⃣ Load dataset
-df = pd.read_csv("creditcard_phase0_clean.csv")
-
-# 2️⃣ Log-transform skewed feature
-df["Amount"] = np.log1p(df["Amount"])
-
-# 3️⃣ Split features / target
-X = df.drop(columns=["Class"])
-y = df["Class"]
-
-# 4️⃣ Stratified split
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
+# 1️⃣ Load cleaned dataset (log1p Amount, stratified split; cached)
+X_train, X_test, y_train, y_test = load_split(test_size=0.2, random_state=42)
 
-# 5️⃣ Class imbalance handling
+# 2️⃣ Class imbalance handling
 scale_pos_weight = (len(y_train) - y_train.sum()) / y_train.sum()
 
-# 6️⃣ Base XGBoost model
+# 3️⃣ Base XGBoost model
 base_model = XGBClassifier(
     n_estimators=300,
     max_depth=4,
@@ -51,7 +37,7 @@ base_model = XGBClassifier(
     device="cuda"   # GPU active
 )
 
-# 7️⃣ Isotonic Calibration
+# 4️⃣ Isotonic Calibration
 model = CalibratedClassifierCV(
     base_model,
     method="isotonic",
@@ -60,7 +46,7 @@ model = CalibratedClassifierCV(
 
 model.fit(X_train, y_train)
 
-# 8️⃣ Calibrated probabilities
+# 5️⃣ Calibrated probabilities
 y_prob = model.predict_proba(X_test)[:, 1]
 
 # ====================================
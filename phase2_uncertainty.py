@@ -2,10 +2,18 @@ import pandas as pd
 import numpy as np
 
 import joblib
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score
-from xgboost import XGBClassifier
-from sklearn.calibration import CalibratedClassifierCV
+
+from backend.engine.cost_simulator import (
+    PHASE2_DECISIONS,
+    labels,
+    phase2_costs,
+    print_report,
+    route_grid,
+    simulate,
+)
+from backend.engine.dataset import load_split
+from backend.engine.train_ensemble import train_ensemble
 
 # ======================================================
 # Phase 2 – Bootstrap Ensemble + 2D Risk Decision Engine
@@ -14,61 +22,16 @@ from sklearn.calibration import CalibratedClassifierCV
 # -----------------------------
 # 1️⃣ Load and Prepare Data
 # -----------------------------
-df = pd.read_csv("creditcard_phase0_clean.csv")
-df["Amount"] = np.log1p(df["Amount"])
-
-X = df.drop(columns=["Class"])
-y = df["Class"]
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
-
-scale_pos_weight = (len(y_train) - y_train.sum()) / y_train.sum()
+X_train, X_test, y_train, y_test = load_split(test_size=0.2, random_state=42)
 
 # -----------------------------
 # 2️⃣ Bootstrap Ensemble
 # -----------------------------
+# Members and calibration folds are fitted in parallel worker processes
 n_models = 5
-probs = []
-models = []
-
-for seed in range(n_models):
-
-    np.random.seed(seed)
-
-    # Bootstrap sampling
-    indices = np.random.choice(len(X_train), len(X_train), replace=True)
-    X_boot = X_train.iloc[indices]
-    y_boot = y_train.iloc[indices]
-
-    base_model = XGBClassifier(
-        n_estimators=300,
-        max_depth=4,
-        learning_rate=0.05,
-        scale_pos_weight=scale_pos_weight,
-        eval_metric="logloss",
-        random_state=seed,
-        tree_method="hist",
-        device="cpu"
-    )
-
-    model = CalibratedClassifierCV(
-        base_model,
-        method="isotonic",
-        cv=3
-    )
-
-    model.fit(X_boot, y_boot)
-    models.append(model)
-
-    prob = model.predict_proba(X_test)[:, 1]
-    probs.append(prob)
+models = train_ensemble(X_train, y_train, n_models=n_models, seed=0)
 
-probs = np.array(probs)
+probs = np.array([model.predict_proba(X_test)[:, 1] for model in models])
 
 # -----------------------------
 # 3️⃣ Mean Risk + Uncertainty
@@ -88,30 +51,9 @@ T_block = 0.8
 T_review = 0.1164
 U_threshold = 0.015   # Balanced configuration
 
-decision = []
-
-for p, u in zip(mean_prob, uncertainty):
-
-    # High Risk Zone
-    if p >= T_block:
-        if u < U_threshold:
-            decision.append("AUTO_BLOCK")
-        else:
-            decision.append("ESCALATE_INVEST")
-
-    # Medium Risk Zone
-    elif p >= T_review:
-        if u < U_threshold:
-            decision.append("MANUAL_REVIEW")
-        else:
-            decision.append("ABSTAIN")
-
-    # Low Risk Zone
-    else:
-        if u < U_threshold:
-            decision.append("AUTO_APPROVE")
-        else:
-            decision.append("STEP_UP_AUTH")
+# High / medium / low risk zone × certain / uncertain, vectorized
+decision_codes = route_grid(mean_prob, uncertainty, T_review, T_block, U_threshold)
+decision = labels(decision_codes, PHASE2_DECISIONS)
 
 # -----------------------------
 # 5️⃣ Final Output
@@ -140,42 +82,18 @@ C_manual = 50
 C_step_up = 10
 C_escalate = 100
 
-total_cost = 0
-
-for _, row in results.iterrows():
-
-    decision = row["decision"]
-    true = row["true_label"]
-
-    # AUTO BLOCK
-    if decision == "AUTO_BLOCK":
-        if true == 0:
-            total_cost += C_FP_block
-
-    # AUTO APPROVE
-    elif decision == "AUTO_APPROVE":
-        if true == 1:
-            total_cost += C_FN
-
-    # MANUAL REVIEW
-    elif decision == "MANUAL_REVIEW":
-        total_cost += C_manual
-
-    # STEP UP
-    elif decision == "STEP_UP_AUTH":
-        total_cost += C_step_up
-
-    # ESCALATE
-    elif decision == "ESCALATE_INVEST":
-        total_cost += C_escalate
-
-    # ABSTAIN (treated as manual)
-    elif decision == "ABSTAIN":
-        total_cost += C_manual
+# ABSTAIN is treated as manual review
+costs = phase2_costs(
+    missed_fraud=C_FN,
+    false_block=C_FP_block,
+    manual=C_manual,
+    step_up=C_step_up,
+    escalate=C_escalate,
+)
+cost_report = simulate(decision_codes, y_test.values, costs)
 
 print("\n===== TOTAL SYSTEM COST =====")
-print("Total Cost:", total_cost)
-print("Average Cost per Transaction:", total_cost / len(results))
+print_report(cost_report)
 
 import os
 os.makedirs("artifacts", exist_ok=True)
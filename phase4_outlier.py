@@ -2,26 +2,16 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-from sklearn.model_selection import train_test_split
 from sklearn.ensemble import IsolationForest
 
+from backend.engine.dataset import load_split
+
 # ==========================================
 # Phase 4 – Isolation Forest (Novelty Layer)
 # ==========================================
 
 # 1️⃣ Load data
-df = pd.read_csv("creditcard_phase0_clean.csv")
-df["Amount"] = np.log1p(df["Amount"])
-
-X = df.drop(columns=["Class"])
-y = df["Class"]
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
+X_train, X_test, y_train, y_test = load_split(test_size=0.2, random_state=42)
 
 # ------------------------------------------
 # 2️⃣ Train ONLY on Legitimate Transactions